@@ -8,7 +8,7 @@ from typing import List, Dict, Tuple, Optional
 import logging
 
 from backend.cache.cache_manager import get_cache_manager
-from backend.cache.feature_store import FeatureStore
+from backend.cache.feature_store import get_feature_store
 from backend.recall.popularity_recall import PopularityRecall
 from backend.recall.embedding_recall import EmbeddingRecall
 from backend.ranking.ranking_strategy import RankingStrategy
@@ -27,10 +27,12 @@ class RecommendationPipeline:
     def __init__(self):
         # 使用懒加载，避免在模块导入时初始化 Redis
         self._cache_manager = None
-        self._feature_store = None
-        self.popularity_recall = PopularityRecall()
-        self.embedding_recall = EmbeddingRecall()
-        self.ranking_strategy = RankingStrategy()
+        
+        # 召回与排序共享同一个特征存储（FeatureStore 内部懒加载 Redis 客户端）
+        self._feature_store = get_feature_store()
+        self.popularity_recall = PopularityRecall(self._feature_store)
+        self.embedding_recall = EmbeddingRecall(feature_store=self._feature_store)
+        self.ranking_strategy = RankingStrategy(self._feature_store)
     
     @property
     def cache_manager(self):
@@ -41,9 +43,7 @@ class RecommendationPipeline:
     
     @property
     def feature_store(self):
-        """懒加载特征存储"""
-        if self._feature_store is None:
-            self._feature_store = FeatureStore()
+        """共享的特征存储"""
         return self._feature_store
     
     async def recommend(
@@ -10,12 +10,13 @@ from backend.database.connection import get_db_session
 from backend.database.crud import game_crud
 from backend.schemas.games import (
     GameDetail,
-    GameListItem,
+    GameListItemList,
+    GameListFilters,
     GameListResponse,
     GenreResponse,
     TagResponse
 )
-from backend.schemas.common import ResponseModel
+from backend.schemas.common import ResponseModel, PaginationModel
 import logging
 
 logger = logging.getLogger(__name__)
@@ -119,25 +120,27 @@ async def get_games_list(
         price_max=price_max
     )
     
-    # 转换为响应模型
-    game_items = []
+    # 转换为响应模型（整页一次性校验）
+    rows = []
     for game in games:
         title = game.title or game.app_name or str(game.product_id)
         app_name = game.app_name or title
 
-        game_items.append(GameListItem(
-            app_id=str(game.product_id),
-            app_name=app_name,
-            genres=_split_text(game.genres),
-            tags=_split_text(game.tags),
-            price=float(game.price) if game.price is not None else 0.0,
-            discount_price=float(getattr(game, "discount_price", 0.0)) if getattr(game, "discount_price", None) else None,
-            developer=game.developer,
-            publisher=game.publisher,
-            release_date=str(game.release_date) if game.release_date else None,
-            specs=_split_text(getattr(game, "specs", None)),
-            early_access=bool(getattr(game, "early_access", False))
-        ))
+        rows.append({
+            "app_id": str(game.product_id),
+            "app_name": app_name,
+            "genres": _split_text(game.genres),
+            "tags": _split_text(game.tags),
+            "price": float(game.price) if game.price is not None else 0.0,
+            "discount_price": float(getattr(game, "discount_price", 0.0)) if getattr(game, "discount_price", None) else None,
+            "developer": game.developer,
+            "publisher": game.publisher,
+            "release_date": str(game.release_date) if game.release_date else None,
+            "specs": _split_text(getattr(game, "specs", None)),
+            "early_access": bool(getattr(game, "early_access", False))
+        })
+    
+    game_items = GameListItemList.validate_python(rows)
     
     # 构建分页信息
     total_pages = (total + limit - 1) // limit
@@ -145,21 +148,21 @@ async def get_games_list(
     
     response_data = GameListResponse(
         games=game_items,
-        pagination={
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "total_pages": total_pages,
-            "has_more": has_more
-        },
-        filters_applied={
-            "genre": genre,
-            "tags": tags,
-            "search": search,
-            "sort_by": sort_by,
-            "price_min": price_min,
-            "price_max": price_max
-        }
+        pagination=PaginationModel(
+            page=page,
+            limit=limit,
+            total=total,
+            total_pages=total_pages,
+            has_more=has_more
+        ),
+        filters_applied=GameListFilters(
+            genre=genre,
+            tags=tags,
+            search=search,
+            sort_by=sort_by,
+            price_min=price_min,
+            price_max=price_max
+        )
     )
     
     return ResponseModel(
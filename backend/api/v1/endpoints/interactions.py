@@ -13,7 +13,7 @@ from backend.schemas.recommendations import (
     InteractionData, InteractionResponse, 
     UserReviewCreate, UserReviewResponse, FeedbackData
 )
-from backend.cache.feature_store import FeatureStore
+from backend.cache.feature_store import get_feature_store
 from backend.cache.cache_manager import CacheManager
 
 router = APIRouter()
@@ -52,7 +52,7 @@ async def record_interaction(
         )
         
         # 更新Redis用户序列
-        feature_store = FeatureStore()
+        feature_store = get_feature_store()
         await feature_store.update_user_sequence(
             interaction.user_id, 
             interaction.product_id
@@ -248,7 +248,7 @@ async def get_interaction_history(
     """
     
     try:
-        feature_store = FeatureStore()
+        feature_store = get_feature_store()
         
         # 获取用户序列
         user_sequence = await feature_store.get_user_sequence(current_user_id, limit)
@@ -295,7 +295,7 @@ async def clear_interaction_history(
     """
     
     try:
-        feature_store = FeatureStore()
+        feature_store = get_feature_store()
         cache_manager = CacheManager()
         
         # 清除Redis中的用户序列
@@ -339,7 +339,7 @@ async def get_interaction_stats(
         interaction_count = await get_user_interaction_count(db, current_user_id)
         
         # 获取最近活动
-        feature_store = FeatureStore()
+        feature_store = get_feature_store()
         recent_games = await feature_store.get_user_sequence(current_user_id, 5)
         
         return {
@@ -4,6 +4,7 @@
 
 import time
 from typing import Optional
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,7 +12,7 @@ from backend.api.pipeline import RecommendationPipeline
 from backend.auth.dependencies import get_current_user_id, get_optional_current_user_id
 from backend.database.connection import get_db_session
 from backend.schemas.recommendations import (
-    RecommendationResponse, ExplanationResponse, GameInfo
+    RecommendationResponse, RecommendationResponseAdapter, ExplanationResponse
 )
 from backend.database.crud.user_crud import get_user_by_id
 from backend.database.crud import game_crud
@@ -115,44 +116,45 @@ async def get_recommendations(
                 return []
             return [segment.strip() for segment in value.split(",") if segment.strip()]
 
-        recommendations = []
+        rows = []
         for product_id, score in scored_recs:
             meta = game_map.get(product_id)
             title = (meta.title if meta and meta.title else None) \
                 or (meta.app_name if meta and meta.app_name else None) \
                 or f"Game {product_id}"
 
-            recommendations.append(GameInfo(
-                product_id=product_id,
-                app_name=meta.app_name if meta else None,
-                title=title,
-                genres=_split_text(meta.genres) if meta else [],
-                tags=_split_text(meta.tags) if meta else [],
-                developer=meta.developer if meta else None,
-                publisher=meta.publisher if meta else None,
-                metascore=meta.metascore if meta else None,
-                sentiment=meta.sentiment if meta else None,
-                release_date=meta.release_date if meta else None,
-                price=meta.price if meta else None,
-                discount_price=meta.discount_price if meta else None,
-                description=meta.description if meta else None,
-                short_description=meta.short_description if meta else None,
-                specs=_split_text(meta.specs) if meta and meta.specs else [],
-                url=meta.url if meta else None,
-                reviews_url=meta.reviews_url if meta else None,
-                early_access=meta.early_access if meta else None,
-                score=float(score) if score is not None else 0.0
-            ))
+            rows.append({
+                "product_id": product_id,
+                "app_name": meta.app_name if meta else None,
+                "title": title,
+                "genres": _split_text(meta.genres) if meta else [],
+                "tags": _split_text(meta.tags) if meta else [],
+                "developer": meta.developer if meta else None,
+                "publisher": meta.publisher if meta else None,
+                "metascore": meta.metascore if meta else None,
+                "sentiment": meta.sentiment if meta else None,
+                "release_date": meta.release_date if meta else None,
+                "price": meta.price if meta else None,
+                "discount_price": meta.discount_price if meta else None,
+                "description": meta.description if meta else None,
+                "short_description": meta.short_description if meta else None,
+                "specs": _split_text(meta.specs) if meta and meta.specs else [],
+                "url": meta.url if meta else None,
+                "reviews_url": meta.reviews_url if meta else None,
+                "early_access": meta.early_access if meta else None,
+                "score": float(score) if score is not None else 0.0
+            })
         
-        return RecommendationResponse(
-            user_id=user_id,
-            recommendations=recommendations,
-            algorithm=result["algorithm"],
-            timestamp=result["timestamp"],
-            total_time_ms=result["total_time_ms"],
-            recall_time_ms=result.get("recall_time_ms"),
-            ranking_time_ms=result.get("ranking_time_ms")
-        )
+        # 整个响应一次性校验（模块级 TypeAdapter，嵌套的 GameInfo 列表随之校验）
+        return RecommendationResponseAdapter.validate_python({
+            "user_id": user_id,
+            "recommendations": rows,
+            "algorithm": result["algorithm"],
+            "timestamp": result["timestamp"],
+            "total_time_ms": result["total_time_ms"],
+            "recall_time_ms": result.get("recall_time_ms"),
+            "ranking_time_ms": result.get("ranking_time_ms")
+        })
         
     except Exception as e:
         raise HTTPException(
@@ -215,25 +217,22 @@ async def get_popular_games(
     """
     
     try:
-        from backend.cache.feature_store import FeatureStore
-        feature_store = FeatureStore()
+        from backend.cache.feature_store import get_feature_store
+        feature_store = get_feature_store()
         
         if genre:
             # 获取特定类型的热门游戏
             genre_games = await feature_store.get_games_by_genre(genre)
-            popular_games = await feature_store.get_popular_games(limit=1000)
+            popular_ids, popular_scores = await feature_store.get_popular_games_arrays(limit=1000)
             
-            # 筛选该类型的游戏
-            popular_dict = dict(popular_games)
-            filtered_games = [
-                {"product_id": game_id, "score": popular_dict.get(game_id, 0.0)}
-                for game_id in genre_games
-                if game_id in popular_dict
+            # 筛选该类型的游戏：榜单已按分数降序排列，掩码筛选后保持顺序，直接截取前 limit 个
+            mask = np.isin(popular_ids, np.asarray(genre_games, dtype=np.int64))
+            result = [
+                {"product_id": game_id, "score": score}
+                for game_id, score in zip(
+                    popular_ids[mask][:limit].tolist(), popular_scores[mask][:limit].tolist()
+                )
             ]
-            
-            # 排序并限制数量
-            filtered_games.sort(key=lambda x: x["score"], reverse=True)
-            result = filtered_games[:limit]
         else:
             # 获取总体热门游戏
             popular_games = await feature_store.get_popular_games(limit=limit)
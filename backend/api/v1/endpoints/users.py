@@ -166,8 +166,8 @@ async def get_user_preferences(
     """
     
     try:
-        from backend.cache.feature_store import FeatureStore
-        feature_store = FeatureStore()
+        from backend.cache.feature_store import get_feature_store
+        feature_store = get_feature_store()
         
         # 获取用户交互序列
         user_sequence = await feature_store.get_user_sequence(current_user_id, 20)
@@ -225,8 +225,8 @@ async def delete_user_account(
         await cache_manager.invalidate_user_cache(current_user_id)
         
         # 清除用户序列
-        from backend.cache.feature_store import FeatureStore
-        feature_store = FeatureStore()
+        from backend.cache.feature_store import get_feature_store
+        feature_store = get_feature_store()
         from backend.cache.redis_client import RedisKeyManager
         key_manager = RedisKeyManager()
         
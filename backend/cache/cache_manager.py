@@ -133,8 +133,16 @@ class CacheManager:
         keys_to_delete = [
             self.key_manager.recommendation_cache_key(user_id),
             self.key_manager.user_profile_key(user_id),
+            self.key_manager.user_preferences_key(user_id),
         ]
         
+        # 排序结果缓存按摘要分键，用 SCAN 找出该用户的全部条目
+        async for key in self.redis.scan_iter(
+            match=self.key_manager.ranking_cache_key(user_id, "*"),
+            count=100
+        ):
+            keys_to_delete.append(key)
+        
         # 批量删除
         if keys_to_delete:
             await self.redis.delete(*keys_to_delete)
@@ -2,6 +2,8 @@
 FAISS 向量索引管理
 """
 
+import os
+import asyncio
 import faiss
 import numpy as np
 import pickle
@@ -9,39 +11,52 @@ import logging
 from typing import List, Tuple, Optional, Dict
 from pathlib import Path
 
-from backend.cache.feature_store import FeatureStore
-from backend.cache.redis_client import get_redis_client, RedisKeyManager
+from backend.cache.feature_store import INT8_SCALE, get_feature_store
+from backend.cache.redis_client import RedisKeyManager
 from backend.config import settings
 
 logger = logging.getLogger(__name__)
 
+# 训练 8 bit PQ 码本（每个子空间 256 个中心）所需的最少向量数
+PQ_MIN_TRAINING_VECTORS = 256 * 39
+
 
 class FaissIndexManager:
     """FAISS 索引管理器"""
     
-    def __init__(self, model_name: str = "lightgcn", index_type: str = "IVF"):
+    def __init__(self, model_name: str = "lightgcn", index_type: Optional[str] = None):
         """
         初始化 FAISS 索引管理器
         
         Args:
             model_name: 模型名称
-            index_type: 索引类型 (IVF, Flat, HNSW)
+            index_type: 索引类型 (IVF, IVFPQ, SQ8, IVFSQ8, Flat, HNSW 或 index_factory 描述串)，默认使用 settings.FAISS_INDEX_TYPE
         """
         self.model_name = model_name
-        self.index_type = index_type
-        self.feature_store = FeatureStore()
+        self.index_type = index_type or settings.FAISS_INDEX_TYPE
+        self.feature_store = get_feature_store()
         self.key_manager = RedisKeyManager()
         
         # 索引和ID映射
         self.index: Optional[faiss.Index] = None
         self.id_to_index: Dict[int, int] = {}  # item_id -> faiss_index
         self.index_to_id: Dict[int, int] = {}  # faiss_index -> item_id
+        self.item_ids: np.ndarray = np.empty(0, dtype=np.int64)  # faiss_index -> item_id（数组形式，供向量化映射）
         
         # 索引参数
         self.embedding_dim = settings.EMBEDDING_DIM
-        self.nlist = 100  # IVF 聚类中心数
-        self.nprobe = 10  # 搜索时探查的聚类数
+        self.nlist = 4096  # IVF 聚类中心数上限（实际取 sqrt(N)）
+        self.nprobe = settings.FAISS_NPROBE  # 搜索时探查的聚类数
+        self.ef_search = settings.FAISS_EF_SEARCH  # HNSW 搜索时的候选队列长度
         self.m = 32  # HNSW 参数：每个节点的连接数
+        # PQ 子量化器数量（需整除向量维度）
+        self.pq_m = next(m for m in (16, 8, 4, 2, 1) if self.embedding_dim % m == 0)
+        
+        # 并发查询合并器（首次 search_async 时在当前事件循环中创建）
+        self._batcher: Optional["FaissSearchBatcher"] = None
+        
+        # 索引构建锁，避免冷启动时并发请求重复构建
+        self._build_lock: Optional[asyncio.Lock] = None
         
     def _create_index(self, num_vectors: int) -> faiss.Index:
         """
@@ -53,36 +68,132 @@ class FaissIndexManager:
         Returns:
             FAISS 索引对象
         """
+        nlist = self._compute_nlist(num_vectors)
+        
         if self.index_type == "IVF":
             # IVF (Inverted File Index) - 适合大规模数据
             quantizer = faiss.IndexFlatIP(self.embedding_dim)  # 内积（余弦相似度需要归一化）
-            nlist = min(self.nlist, num_vectors // 10)  # 确保 nlist 不超过向量数
-            nlist = max(nlist, 1)  # 至少为1
+            index = faiss.IndexIVFFlat(quantizer, self.embedding_dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            
+            logger.info(f"Created IVF index with nlist={nlist}")
+            
+        elif self.index_type == "IVFPQ":
+            # IVF + 乘积量化：每个向量压缩为 pq_m 字节，适合大规模、内存带宽受限的场景
+            if num_vectors < PQ_MIN_TRAINING_VECTORS:
+                logger.warning(
+                    f"Too few vectors ({num_vectors}) to train PQ codebooks, using IVF index instead"
+                )
+                quantizer = faiss.IndexFlatIP(self.embedding_dim)
+                index = faiss.IndexIVFFlat(quantizer, self.embedding_dim, nlist, faiss.METRIC_INNER_PRODUCT)
+                
+                logger.info(f"Created IVF index with nlist={nlist}")
+            else:
+                index = faiss.index_factory(
+                    self.embedding_dim, f"IVF{nlist},PQ{self.pq_m}", faiss.METRIC_INNER_PRODUCT
+                )
+                
+                logger.info(f"Created IVFPQ index with nlist={nlist}, pq_m={self.pq_m}")
             
-            index = faiss.IndexIVFFlat(quantizer, self.embedding_dim, nlist)
-            index.nprobe = min(self.nprobe, nlist)  # 搜索时探查的聚类数
+        elif self.index_type in ("SQ8", "IVFSQ8"):
+            # int8 标量量化：每个维度 1 字节，内存与带宽降为 float32 的 1/4，召回损失很小
+            if self.index_type == "SQ8":
+                index = faiss.IndexScalarQuantizer(
+                    self.embedding_dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+                )
+            else:
+                index = faiss.index_factory(self.embedding_dim, f"IVF{nlist},SQ8", faiss.METRIC_INNER_PRODUCT)
             
-            logger.info(f"Created IVF index with nlist={nlist}, nprobe={index.nprobe}")
-            return index
+            logger.info(f"Created {self.index_type} index")
             
         elif self.index_type == "HNSW":
             # HNSW (Hierarchical Navigable Small World) - 高质量近似搜索
-            index = faiss.IndexHNSWFlat(self.embedding_dim, self.m)
+            # 使用内积度量（向量已归一化，内积即余弦相似度）；默认的 L2 度量返回的是距离
+            index = faiss.IndexHNSWFlat(self.embedding_dim, self.m, faiss.METRIC_INNER_PRODUCT)
             index.hnsw.efConstruction = 200  # 构建时的搜索范围
-            index.hnsw.efSearch = 64  # 搜索时的搜索范围
             
             logger.info(f"Created HNSW index with m={self.m}")
-            return index
             
-        else:  # Flat
+        elif self.index_type == "Flat":
             # Flat - 精确搜索，适合小规模数据
             index = faiss.IndexFlatIP(self.embedding_dim)  # 内积
             logger.info("Created Flat index")
-            return index
+            
+        else:
+            # 其他取值视为 faiss.index_factory 描述串，如 "OPQ16_64,IVF{nlist}_HNSW32,PQ16"
+            factory_string = self.index_type.format(nlist=nlist)
+            index = faiss.index_factory(self.embedding_dim, factory_string, faiss.METRIC_INNER_PRODUCT)
+            logger.info(f"Created index from factory string: {factory_string}")
+        
+        self._apply_search_params(index)
+        return index
+    
+    def _compute_nlist(self, num_vectors: int) -> int:
+        """
+        计算 IVF 聚类中心数：约 sqrt(N)，且保证每个中心至少有 39 个训练样本
+        
+        Args:
+            num_vectors: 向量数量
+            
+        Returns:
+            聚类中心数
+        """
+        nlist = min(self.nlist, int(np.sqrt(num_vectors)), num_vectors // 39)
+        return max(nlist, 1)
+    
+    def _apply_search_params(self, index: faiss.Index) -> None:
+        """
+        设置搜索参数（IVF 的 nprobe、HNSW 的 efSearch）
+        
+        Args:
+            index: FAISS 索引对象
+        """
+        try:
+            ivf = faiss.extract_index_ivf(index)
+            # nprobe 未配置（<=0）时随聚类数缩放，约探查 1/32 的聚类
+            nprobe = self.nprobe if self.nprobe > 0 else max(1, ivf.nlist // 32)
+            ivf.nprobe = min(nprobe, ivf.nlist)
+        except RuntimeError:
+            pass  # 非 IVF 索引
+        
+        hnsw_index = faiss.downcast_index(index)
+        if hasattr(hnsw_index, "hnsw"):
+            hnsw_index.hnsw.efSearch = self.ef_search
+    
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+        """
+        调整搜索参数（在召回率与延迟之间权衡），对已构建的索引立即生效
+        
+        Args:
+            nprobe: IVF 搜索时探查的聚类数
+            ef_search: HNSW 搜索时的候选队列长度
+        """
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        if self.index is not None:
+            self._apply_search_params(self.index)
+    
+    def _training_sample(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        抽取训练样本：约 10% 的向量，但不少于聚类所需的样本量
+        
+        Args:
+            vectors: 全部向量 (N, dim)
+            
+        Returns:
+            训练向量
+        """
+        num_vectors = len(vectors)
+        sample_size = max(num_vectors // 10, PQ_MIN_TRAINING_VECTORS, 39 * self._compute_nlist(num_vectors))
+        if sample_size >= num_vectors:
+            return vectors
+        rng = np.random.default_rng(0)
+        return vectors[np.sort(rng.choice(num_vectors, sample_size, replace=False))]
     
     async def build_index(self, force_rebuild: bool = False) -> bool:
         """
-        从 Redis 构建 FAISS 索引
+        构建 FAISS 索引；并发调用时只有第一个调用者执行构建，其余等待并复用结果
         
         Args:
             force_rebuild: 是否强制重建索引
@@ -90,86 +201,155 @@ class FaissIndexManager:
         Returns:
             是否成功构建
         """
-        try:
-            redis = get_redis_client()
-            key = self.key_manager.item_embedding_key(self.model_name)
-            
-            # 检查是否已有索引且不需要重建
+        # 检查是否已有索引且不需要重建
+        if self.index is not None and not force_rebuild:
+            return True
+        
+        # 在事件循环内懒创建锁（Python 3.9 的 asyncio.Lock 创建时绑定事件循环）
+        if self._build_lock is None:
+            self._build_lock = asyncio.Lock()
+        
+        async with self._build_lock:
+            # 等待锁期间索引可能已由其他协程构建完成
             if self.index is not None and not force_rebuild:
                 logger.info("Index already exists, skipping build")
                 return True
+            return await self._build_index(force_rebuild)
+    
+    async def _build_index(self, force_rebuild: bool) -> bool:
+        """
+        基于 FeatureStore 缓存的归一化物品矩阵构建 FAISS 索引
+        
+        Args:
+            force_rebuild: 是否强制重建索引
             
+        Returns:
+            是否成功构建
+        """
+        try:
             logger.info(f"Building FAISS index for model {self.model_name}...")
             
-            # 获取所有物品嵌入
-            all_embeddings = await redis.hgetall(key)
+            # 重建时丢弃旧的物品矩阵缓存，确保读取最新嵌入
+            if force_rebuild:
+                self.feature_store.invalidate_item_matrix(self.model_name)
             
-            if not all_embeddings:
+            item_matrix = await self.feature_store.get_item_matrix(self.model_name)
+            if item_matrix is None:
                 logger.warning(f"No embeddings found in Redis for model {self.model_name}")
                 return False
             
-            # 解析嵌入向量
-            vectors = []
-            item_ids = []
-            
-            for item_id_str, embedding_bytes in all_embeddings.items():
-                try:
-                    item_id = int(item_id_str)
-                    embedding = pickle.loads(embedding_bytes)
-                    
-                    # 确保是 numpy 数组
-                    if not isinstance(embedding, np.ndarray):
-                        continue
-                    
-                    # 归一化向量（用于余弦相似度）
-                    norm = np.linalg.norm(embedding)
-                    if norm > 0:
-                        embedding = embedding / norm
-                    
-                    vectors.append(embedding.astype(np.float32))
-                    item_ids.append(item_id)
-                    
-                except Exception as e:
-                    logger.error(f"Failed to parse embedding for item {item_id_str}: {e}")
-                    continue
-            
-            if not vectors:
-                logger.warning("No valid embeddings found")
-                return False
-            
-            num_vectors = len(vectors)
-            logger.info(f"Loaded {num_vectors} embeddings from Redis")
-            
-            # 转换为 numpy 数组
-            vectors_array = np.vstack(vectors).astype(np.float32)
-            
-            # 创建索引
-            self.index = self._create_index(num_vectors)
-            
-            # 训练索引（IVF 需要训练）
-            if isinstance(self.index, faiss.IndexIVFFlat):
-                logger.info("Training IVF index...")
-                self.index.train(vectors_array)
-            
-            # 添加向量到索引
-            logger.info("Adding vectors to index...")
-            self.index.add(vectors_array)
-            
-            # 构建 ID 映射
-            self.id_to_index = {item_id: idx for idx, item_id in enumerate(item_ids)}
-            self.index_to_id = {idx: item_id for idx, item_id in enumerate(item_ids)}
-            
-            logger.info(
-                f"FAISS index built successfully: {num_vectors} vectors, "
-                f"index type: {self.index_type}"
-            )
+            ids, mat_norm = item_matrix
+            if mat_norm.dtype == np.int8:
+                vectors_array = mat_norm.astype(np.float32) / INT8_SCALE
+            else:
+                vectors_array = np.ascontiguousarray(mat_norm, dtype=np.float32)
             
+            logger.info(f"Loaded {len(ids)} embeddings from item matrix")
+            self._build_from_matrix(ids, vectors_array)
             return True
             
         except Exception as e:
             logger.error(f"Failed to build FAISS index: {e}", exc_info=True)
             return False
     
+    async def build_index_from_arrays(self, ids: np.ndarray, vectors: np.ndarray) -> bool:
+        """
+        直接由 (N,) 物品ID数组和 (N, dim) 嵌入矩阵构建索引，不经 Redis 往返
+        
+        供离线导入脚本在写入缓存的同时构建索引：矩阵只堆叠、归一化一次，
+        与 FeatureStore.get_item_matrix 一样按ID升序排列并做 L2 归一化。
+        
+        Args:
+            ids: 物品ID数组
+            vectors: 对应行的原始嵌入矩阵
+            
+        Returns:
+            是否成功构建
+        """
+        if self._build_lock is None:
+            self._build_lock = asyncio.Lock()
+        
+        async with self._build_lock:
+            try:
+                ids = np.asarray(ids, dtype=np.int64)
+                order = np.argsort(ids)
+                # 花式索引得到新的连续数组，原地归一化不影响调用方
+                vectors_array = np.ascontiguousarray(vectors[order], dtype=np.float32)
+                norms = np.linalg.norm(vectors_array, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                vectors_array /= norms
+                
+                self._build_from_matrix(ids[order], vectors_array)
+                return True
+                
+            except Exception as e:
+                logger.error(f"Failed to build FAISS index: {e}", exc_info=True)
+                return False
+    
+    def _build_from_matrix(self, ids: np.ndarray, vectors_array: np.ndarray) -> None:
+        """
+        由归一化后的连续 float32 矩阵训练并填充索引，同时建立 ID 映射
+        
+        Args:
+            ids: 物品ID数组 (N,)
+            vectors_array: 归一化向量矩阵 (N, dim)
+        """
+        num_vectors = len(ids)
+        
+        # 创建索引
+        index = self._create_index(num_vectors)
+        
+        # 训练索引（IVF/PQ 需要训练，使用抽样子集）
+        if not index.is_trained:
+            training_vectors = self._training_sample(vectors_array)
+            logger.info(f"Training index on {len(training_vectors)} vectors...")
+            index = self._train_index(index, training_vectors)
+        
+        # 添加向量到索引
+        logger.info("Adding vectors to index...")
+        index.add(vectors_array)
+        
+        # 构建 ID 映射
+        item_ids = ids.tolist()
+        self.id_to_index = {item_id: idx for idx, item_id in enumerate(item_ids)}
+        self.index_to_id = {idx: item_id for idx, item_id in enumerate(item_ids)}
+        self.item_ids = np.asarray(ids, dtype=np.int64)
+        self.index = index
+        
+        logger.info(
+            f"FAISS index built successfully: {num_vectors} vectors, "
+            f"index type: {self.index_type}"
+        )
+    
+    def _train_index(self, index: faiss.Index, training_vectors: np.ndarray) -> faiss.Index:
+        """
+        训练索引；有可用 GPU 时把 k-means 训练放到 GPU 上，完成后转回 CPU 索引
+        
+        GPU 不支持的索引类型（如 IVF + HNSW 粗量化器）或转换失败时回退到 CPU 训练。
+        
+        Args:
+            index: 未训练的 CPU 索引
+            training_vectors: 训练向量
+            
+        Returns:
+            训练完成的 CPU 索引
+        """
+        if settings.FAISS_GPU_TRAINING and getattr(faiss, "get_num_gpus", lambda: 0)() > 0:
+            try:
+                resources = faiss.StandardGpuResources()
+                gpu_index = faiss.index_cpu_to_gpu(resources, 0, index)
+                gpu_index.train(training_vectors)
+                trained = faiss.index_gpu_to_cpu(gpu_index)
+                # 转换会丢失搜索参数，重新设置
+                self._apply_search_params(trained)
+                logger.info("Trained index on GPU")
+                return trained
+            except Exception as e:
+                logger.warning(f"GPU training unavailable for this index, training on CPU: {e}")
+        
+        index.train(training_vectors)
+        return index
+    
     def search(
         self, 
         query_vector: np.ndarray, 
@@ -192,40 +372,17 @@ class FaissIndexManager:
             return []
         
         try:
-            # 确保查询向量是归一化的
+            # 转换为 float32 行向量并归一化（索引为内积度量，内积即余弦相似度）
+            query_vector = np.array(query_vector, dtype=np.float32).reshape(1, -1)
             norm = np.linalg.norm(query_vector)
             if norm > 0:
-                query_vector = query_vector / norm
-            
-            # 转换为 float32 并 reshape
-            query_vector = query_vector.astype(np.float32).reshape(1, -1)
+                query_vector /= norm
             
-            # 搜索（返回 top_k * 2 以便后续过滤）
-            search_k = top_k * 2 if exclude_ids else top_k
+            # 多取排除项数量的结果，过滤后仍能凑满 top_k
+            search_k = top_k + len(exclude_ids or ())
             distances, indices = self.index.search(query_vector, search_k)
             
-            # 转换为结果列表
-            results = []
-            for dist, idx in zip(distances[0], indices[0]):
-                if idx < 0:  # FAISS 返回 -1 表示无效结果
-                    continue
-                
-                item_id = self.index_to_id.get(idx)
-                if item_id is None:
-                    continue
-                
-                # 排除指定ID
-                if exclude_ids and item_id in exclude_ids:
-                    continue
-                
-                # 距离转换为相似度分数（内积就是余弦相似度，因为向量已归一化）
-                score = float(dist)
-                results.append((item_id, score))
-                
-                if len(results) >= top_k:
-                    break
-            
-            return results
+            return self._to_results(distances[0], indices[0], top_k, exclude_ids)
             
         except Exception as e:
             logger.error(f"FAISS search failed: {e}", exc_info=True)
@@ -240,6 +397,10 @@ class FaissIndexManager:
         """
         批量搜索相似向量
         
+        每个查询需多取自己排除项数量的结果。按多取数量向上取到 2 的幂分组，
+        每组各做一次搜索：排除项很多的查询不会拉高同批其他查询的 k，
+        每个查询最多多取约一倍。
+        
         Args:
             query_vectors: 查询向量数组 (n, dim)
             top_k: 每个查询返回数量
@@ -253,49 +414,112 @@ class FaissIndexManager:
             return [[] for _ in range(len(query_vectors))]
         
         try:
-            # 归一化查询向量
+            # 转换为 float32 并原地归一化查询向量
+            query_vectors = np.array(query_vectors, dtype=np.float32)
             norms = np.linalg.norm(query_vectors, axis=1, keepdims=True)
             norms[norms == 0] = 1  # 避免除零
-            query_vectors = query_vectors / norms
-            
-            # 转换为 float32
-            query_vectors = query_vectors.astype(np.float32)
-            
-            # 批量搜索
-            search_k = top_k * 2 if exclude_ids_list else top_k
-            distances, indices = self.index.search(query_vectors, search_k)
-            
-            # 转换结果
-            all_results = []
-            for i, (dists, idxs) in enumerate(zip(distances, indices)):
-                exclude_ids = exclude_ids_list[i] if exclude_ids_list else None
-                results = []
-                
-                for dist, idx in zip(dists, idxs):
-                    if idx < 0:
-                        continue
-                    
-                    item_id = self.index_to_id.get(idx)
-                    if item_id is None:
-                        continue
-                    
-                    if exclude_ids and item_id in exclude_ids:
-                        continue
-                    
-                    score = float(dist)
-                    results.append((item_id, score))
-                    
-                    if len(results) >= top_k:
-                        break
-                
-                all_results.append(results)
+            query_vectors /= norms
+            
+            # 各查询的多取数量向上取到 2 的幂，作为分组的 k（不超过索引中的向量数）
+            num_queries = len(query_vectors)
+            extra = np.zeros(num_queries, dtype=np.int64)
+            if exclude_ids_list:
+                extra[:] = [len(ids) if ids else 0 for ids in exclude_ids_list]
+            padded = np.where(extra > 0, 1 << np.ceil(np.log2(np.maximum(extra, 1))).astype(np.int64), 0)
+            search_ks = np.minimum(top_k + padded, max(top_k, self.index.ntotal))
+            
+            # 按 k 分组批量搜索并转换结果
+            results: List[List[Tuple[int, float]]] = [[] for _ in range(num_queries)]
+            for search_k in np.unique(search_ks):
+                rows = np.flatnonzero(search_ks == search_k)
+                distances, indices = self.index.search(query_vectors[rows], int(search_k))
+                for row, dists, idxs in zip(rows, distances, indices):
+                    results[row] = self._to_results(
+                        dists, idxs, top_k, exclude_ids_list[row] if exclude_ids_list else None
+                    )
             
-            return all_results
+            return results
             
         except Exception as e:
             logger.error(f"FAISS batch search failed: {e}", exc_info=True)
             return [[] for _ in range(len(query_vectors))]
     
+    def search_arrays(self, query_vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量搜索并以数组形式返回结果（供需要向量化后处理的调用方使用）
+        
+        Args:
+            query_vectors: 查询向量数组 (n, dim)
+            k: 每个查询返回数量
+            
+        Returns:
+            (scores, item_ids)：均为 (n, k) 数组，无效结果的 item_id 为 -1
+        """
+        if self.index is None:
+            raise RuntimeError("Index not built, call build_index() first")
+        
+        query_vectors = np.array(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1  # 避免除零
+        query_vectors /= norms
+        
+        distances, indices = self.index.search(query_vectors, k)
+        item_ids = np.where(indices >= 0, self.item_ids[indices], -1)
+        return distances, item_ids
+    
+    def _to_results(
+        self,
+        distances: np.ndarray,
+        indices: np.ndarray,
+        top_k: int,
+        exclude_ids: Optional[List[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        将单个查询的搜索结果转换为 (item_id, score) 列表，排除项用布尔掩码过滤
+        
+        Args:
+            distances: 内积分数（已按降序排列）
+            indices: FAISS 内部行号，-1 表示无效结果
+            top_k: 返回数量
+            exclude_ids: 要排除的物品ID列表
+            
+        Returns:
+            [(item_id, score), ...] 列表
+        """
+        valid = indices >= 0
+        item_ids = self.item_ids[indices[valid]]
+        scores = distances[valid]
+        
+        if exclude_ids:
+            keep = ~np.isin(item_ids, np.asarray(exclude_ids, dtype=np.int64))
+            item_ids = item_ids[keep]
+            scores = scores[keep]
+        
+        # 内积就是余弦相似度（向量已归一化）
+        return list(zip(item_ids[:top_k].tolist(), scores[:top_k].tolist()))
+    
+    async def search_async(
+        self,
+        query_vector: np.ndarray,
+        top_k: int,
+        exclude_ids: Optional[List[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        搜索相似向量（并发请求在短时间窗口内合并为一次批量搜索）
+        
+        Args:
+            query_vector: 查询向量
+            top_k: 返回数量
+            exclude_ids: 要排除的物品ID列表
+            
+        Returns:
+            [(item_id, score), ...] 列表，按相似度降序排列
+        """
+        loop = asyncio.get_running_loop()
+        if self._batcher is None or self._batcher.loop is not loop:
+            self._batcher = FaissSearchBatcher(self)
+        return await self._batcher.submit(query_vector, top_k, exclude_ids)
+    
     def get_index_size(self) -> int:
         """获取索引中的向量数量"""
         if self.index is None:
@@ -356,6 +580,9 @@ class FaissIndexManager:
                 mapping_data = pickle.load(f)
                 self.id_to_index = mapping_data['id_to_index']
                 self.index_to_id = mapping_data['index_to_id']
+                self.item_ids = np.array(
+                    [self.index_to_id[idx] for idx in range(len(self.index_to_id))], dtype=np.int64
+                )
             
             logger.info(f"Index loaded from {filepath}, {self.index.ntotal} vectors")
             return True
@@ -365,24 +592,155 @@ class FaissIndexManager:
             return False
 
 
+class FaissSearchBatcher:
+    """
+    FAISS 查询合并器
+    
+    单个后台消费者从队列中收集窗口期内的并发查询，堆叠成 (N, dim) 矩阵后
+    调用一次 batch_search，使 FAISS 在一个 OpenMP 区域内完成矩阵乘，
+    避免多个请求各自发起单向量搜索互相争抢线程。
+    """
+    
+    def __init__(
+        self,
+        manager: FaissIndexManager,
+        window_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None
+    ):
+        self.manager = manager
+        self.window = (settings.FAISS_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_batch_size = max_batch_size or settings.FAISS_BATCH_MAX_SIZE
+        self.loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._consumer: Optional[asyncio.Task] = None
+    
+    async def submit(
+        self,
+        query_vector: np.ndarray,
+        top_k: int,
+        exclude_ids: Optional[List[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        提交一个查询并等待所在批次的搜索结果
+        
+        Args:
+            query_vector: 查询向量
+            top_k: 返回数量
+            exclude_ids: 要排除的物品ID列表
+            
+        Returns:
+            [(item_id, score), ...] 列表
+        """
+        if self._consumer is None or self._consumer.done():
+            self._consumer = self.loop.create_task(self._run())
+        
+        future = self.loop.create_future()
+        await self._queue.put((query_vector, top_k, exclude_ids, future))
+        return await future
+    
+    async def _collect(self) -> list:
+        """收集一个批次：阻塞等待第一个查询，然后在窗口期内尽量凑满批次"""
+        batch = [await self._queue.get()]
+        deadline = self.loop.time() + self.window
+        
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        # 窗口结束时已在队列中的查询一并带上
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        
+        return batch
+    
+    async def _run(self) -> None:
+        """后台消费者：逐批执行搜索并回填各请求的 future，队列清空后退出（下次提交时重新启动）"""
+        while True:
+            batch = [entry for entry in await self._collect() if not entry[3].done()]
+            if batch:
+                await self._search_batch(batch)
+            if self._queue.empty():
+                return
+    
+    async def _search_batch(self, batch: list) -> None:
+        """对一个批次执行一次 batch_search 并回填结果"""
+        query_vectors = np.stack(
+            [np.asarray(vector, dtype=np.float32).ravel() for vector, _, _, _ in batch]
+        )
+        max_k = max(top_k for _, top_k, _, _ in batch)
+        exclude_ids_list = None
+        if any(exclude_ids for _, _, exclude_ids, _ in batch):
+            exclude_ids_list = [exclude_ids or [] for _, _, exclude_ids, _ in batch]
+        
+        try:
+            # 在线程池中执行，FAISS 搜索期间释放 GIL，不阻塞事件循环
+            results = await self.loop.run_in_executor(
+                None, self.manager.batch_search, query_vectors, max_k, exclude_ids_list
+            )
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        if len(batch) > 1:
+            logger.debug("FAISS batched search: %d queries, k=%d", len(batch), max_k)
+        
+        for (_, top_k, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result[:top_k])
+
+
 # 全局索引管理器实例（按模型名称缓存）
 _index_managers: Dict[str, FaissIndexManager] = {}
+_omp_configured = False
+
+
+def _configure_openmp() -> None:
+    """
+    设置 FAISS 的 OpenMP 线程数（进程内只设置一次）
+    
+    线程数是每个 worker 进程的：默认 1，多个 worker 同时搜索时不会超额占用 CPU；
+    FAISS_OMP_THREADS=0 时按 CPU 核数除以 worker 数（WEB_CONCURRENCY）均分。
+    OMP_WAIT_POLICY=PASSIVE 属于进程级 OpenMP 设置，在部署/启动时设置（见 Dockerfile），不在此处修改。
+    """
+    global _omp_configured
+    if _omp_configured:
+        return
+    
+    num_threads = settings.FAISS_OMP_THREADS
+    if num_threads <= 0:
+        workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+    faiss.omp_set_num_threads(num_threads)
+    _omp_configured = True
+    logger.info(
+        "FAISS OpenMP threads: %d (OMP_WAIT_POLICY=%s)",
+        num_threads, os.environ.get("OMP_WAIT_POLICY")
+    )
 
 
-def get_faiss_index_manager(model_name: str = "lightgcn", index_type: str = "IVF") -> FaissIndexManager:
+def get_faiss_index_manager(model_name: str = "lightgcn", index_type: Optional[str] = None) -> FaissIndexManager:
     """
     获取 FAISS 索引管理器实例（单例模式）
     
     Args:
         model_name: 模型名称
-        index_type: 索引类型
+        index_type: 索引类型，默认使用 settings.FAISS_INDEX_TYPE
         
     Returns:
         FaissIndexManager 实例
     """
+    index_type = index_type or settings.FAISS_INDEX_TYPE
     key = f"{model_name}_{index_type}"
     
     if key not in _index_managers:
+        _configure_openmp()
         _index_managers[key] = FaissIndexManager(model_name, index_type)
     
     return _index_managers[key]
@@ -3,6 +3,7 @@ Redis特征存储
 """
 
 import json
+import time
 import pickle
 from typing import List, Dict, Optional, Any, Tuple
 import numpy as np
@@ -13,6 +14,98 @@ from backend.config import settings
 
 logger = logging.getLogger(__name__)
 
+# int8 对称量化比例：归一化向量分量在 [-1, 1]，映射到 [-127, 127]
+INT8_SCALE = 127.0
+
+# 进程内归一化物品矩阵缓存：model_name -> (嵌入版本号, ids, mat_norm)
+_item_matrix_cache: Dict[str, Tuple[Optional[bytes], np.ndarray, np.ndarray]] = {}
+
+# 进程内热门榜单缓存：(过期时间, 读取条数, ids, scores)
+_popular_games_cache: Optional[Tuple[float, int, np.ndarray, np.ndarray]] = None
+
+# 热门榜单每次从 Redis 读取的最少条数（召回各路径的常用 limit 都在此范围内）
+POPULAR_GAMES_FETCH_SIZE = 1000
+
+# 嵌入向量原始字节格式的标记头（pickle 流总以 0x80 开头，不会与之混淆；4 字节保持 float32 对齐）
+_RAW_EMBEDDING_MAGIC = b"F32\x00"
+_RAW_EMBEDDING_F16_MAGIC = b"F16\x00"
+
+# 批量写入嵌入向量时每条 HSET 命令携带的字段数（一次往返，同时限制单批序列化内存）
+EMBEDDING_WRITE_CHUNK = 5000
+
+
+def _dumps_metadata(metadata: Dict[str, Any]) -> bytes:
+    """序列化游戏元数据（pickle 保留原生 list/int 类型，解码比 JSON 快）"""
+    return pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _loads_metadata(raw) -> Dict[str, Any]:
+    """反序列化游戏元数据，兼容旧的 JSON 格式"""
+    if isinstance(raw, bytes) and raw[:1] == b"\x80":
+        return pickle.loads(raw)
+    return json.loads(raw)
+
+
+def _embedding_storage_format() -> Tuple[bytes, str]:
+    """写入 Redis 的嵌入向量格式：(标记头, 小端 dtype)，由 EMBEDDING_CACHE_FLOAT16 决定"""
+    if settings.EMBEDDING_CACHE_FLOAT16:
+        return _RAW_EMBEDDING_F16_MAGIC, "<f2"
+    return _RAW_EMBEDDING_MAGIC, "<f4"
+
+
+def _dumps_embedding(embedding: np.ndarray) -> bytes:
+    """序列化嵌入向量：标记头 + float32（或 float16）原始字节，不带 pickle 的类型信息"""
+    magic, dtype = _embedding_storage_format()
+    return magic + np.ascontiguousarray(embedding, dtype=dtype).tobytes()
+
+
+def _loads_embedding(raw: bytes) -> np.ndarray:
+    """
+    反序列化嵌入向量，统一为 C 连续的 float32 数组
+    
+    float32 原始字节格式直接以 np.frombuffer 零拷贝解码（返回只读数组）；
+    float16 格式解码后转换为 float32；兼容旧的 pickle 格式。
+    """
+    magic = raw[:len(_RAW_EMBEDDING_MAGIC)]
+    if magic == _RAW_EMBEDDING_MAGIC:
+        return np.frombuffer(raw, dtype="<f4", offset=len(_RAW_EMBEDDING_MAGIC))
+    if magic == _RAW_EMBEDDING_F16_MAGIC:
+        return np.frombuffer(raw, dtype="<f2", offset=len(_RAW_EMBEDDING_F16_MAGIC)).astype(np.float32)
+    return np.ascontiguousarray(pickle.loads(raw), dtype=np.float32)
+
+
+def _normalize_genres(genres: Any) -> List[str]:
+    """将 JSON 字符串或逗号分隔字符串形式的 genres 统一为列表"""
+    if isinstance(genres, str):
+        try:
+            parsed = json.loads(genres)
+            if isinstance(parsed, list):
+                return parsed
+        except ValueError:
+            pass
+        return [g.strip() for g in genres.split(",") if g.strip()]
+    return list(genres) if genres else []
+
+
+def _prepare_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    整理待缓存的元数据（返回副本）
+    
+    genres 以原生列表存储，读取方无需再解析；预先解析发布年份，排序时无需再解析日期字符串。
+    """
+    metadata = dict(metadata)
+    
+    if "genres" in metadata:
+        metadata["genres"] = _normalize_genres(metadata["genres"])
+    
+    release_date = metadata.get("release_date")
+    if "release_year" not in metadata and isinstance(release_date, str):
+        year_part = release_date.split("-")[0]
+        if year_part.isdigit():
+            metadata["release_year"] = int(year_part)
+    
+    return metadata
+
 
 class FeatureStore:
     """Redis特征存储"""
@@ -48,6 +141,9 @@ class FeatureStore:
         # 设置过期时间（30天）
         await self.redis.expire(key, 30 * 24 * 3600)
         
+        # 序列变化后，基于序列计算的偏好缓存失效
+        await self.redis.delete(self.key_manager.user_preferences_key(user_id))
+        
         logger.debug(f"Updated user sequence for user {user_id}, added product {product_id}")
     
     async def get_user_sequence(self, user_id: int, max_len: int = 50) -> List[int]:
@@ -69,6 +165,108 @@ class FeatureStore:
         # 转换为整数列表
         return [int(item_id) for item_id in sequence]
     
+    async def get_user_sequence_length(self, user_id: int) -> int:
+        """
+        获取用户行为序列长度（LLEN，不传输序列内容）
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            序列长度
+        """
+        key = self.key_manager.user_sequence_key(user_id)
+        return await self.redis.llen(key)
+    
+    async def cache_user_preferences(
+        self,
+        user_id: int,
+        preferences: Dict[str, Any],
+        ttl: Optional[int] = None
+    ) -> None:
+        """
+        缓存用户偏好（由排序层基于行为序列计算）
+        
+        Args:
+            user_id: 用户ID
+            preferences: 偏好字典
+            ttl: 过期时间（秒），默认 USER_PREFERENCES_TTL_SECONDS
+        """
+        key = self.key_manager.user_preferences_key(user_id)
+        ttl = ttl or settings.USER_PREFERENCES_TTL_SECONDS
+        
+        await self.redis.setex(key, ttl, json.dumps(preferences, ensure_ascii=False))
+    
+    async def get_cached_user_preferences(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        获取缓存的用户偏好
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            偏好字典或None
+        """
+        key = self.key_manager.user_preferences_key(user_id)
+        
+        preferences_json = await self.redis.get(key)
+        if not preferences_json:
+            return None
+        
+        try:
+            return json.loads(preferences_json)
+        except Exception as e:
+            logger.error(f"Failed to deserialize user preferences for user {user_id}: {e}")
+            return None
+    
+    async def cache_ranking_result(
+        self,
+        user_id: int,
+        digest: str,
+        ranked: List[Tuple[int, float]],
+        ttl: Optional[int] = None
+    ) -> None:
+        """
+        缓存排序结果
+        
+        Args:
+            user_id: 用户ID
+            digest: 候选集与排序配置的摘要
+            ranked: 排序后的候选集 [(item_id, score)]
+            ttl: 过期时间（秒），默认 RANKING_CACHE_TTL_SECONDS
+        """
+        key = self.key_manager.ranking_cache_key(user_id, digest)
+        ttl = ttl or settings.RANKING_CACHE_TTL_SECONDS
+        
+        await self.redis.setex(key, ttl, json.dumps(ranked))
+    
+    async def get_cached_ranking_result(
+        self,
+        user_id: int,
+        digest: str
+    ) -> Optional[List[Tuple[int, float]]]:
+        """
+        获取缓存的排序结果
+        
+        Args:
+            user_id: 用户ID
+            digest: 候选集与排序配置的摘要
+            
+        Returns:
+            排序后的候选集或None
+        """
+        key = self.key_manager.ranking_cache_key(user_id, digest)
+        
+        ranked_json = await self.redis.get(key)
+        if not ranked_json:
+            return None
+        
+        try:
+            return [(int(item_id), float(score)) for item_id, score in json.loads(ranked_json)]
+        except Exception as e:
+            logger.error(f"Failed to deserialize ranking result for user {user_id}: {e}")
+            return None
+    
     async def cache_embeddings(
         self, 
         model_name: str, 
@@ -86,28 +284,43 @@ class FeatureStore:
         # 缓存用户嵌入
         if user_embeddings:
             user_key = self.key_manager.user_embedding_key(model_name)
-            
-            # 序列化嵌入向量并批量存储
-            pipeline = self.redis.pipeline()
-            for user_id, embedding in user_embeddings.items():
-                embedding_bytes = pickle.dumps(embedding.astype(np.float32))
-                pipeline.hset(user_key, user_id, embedding_bytes)
-            
-            await pipeline.execute()
+            await self._hset_embeddings(user_key, user_embeddings)
             logger.info(f"Cached {len(user_embeddings)} user embeddings for model {model_name}")
         
         # 缓存物品嵌入
         if item_embeddings:
             item_key = self.key_manager.item_embedding_key(model_name)
+            await self._hset_embeddings(item_key, item_embeddings)
+            logger.info(f"Cached {len(item_embeddings)} item embeddings for model {model_name}")
             
-            # 序列化嵌入向量并批量存储
-            pipeline = self.redis.pipeline()
-            for item_id, embedding in item_embeddings.items():
-                embedding_bytes = pickle.dumps(embedding.astype(np.float32))
-                pipeline.hset(item_key, item_id, embedding_bytes)
+            # 物品嵌入已更新：递增版本号通知所有进程，并丢弃本进程的归一化矩阵
+            await self.redis.incr(self.key_manager.item_embedding_version_key(model_name))
+            self.invalidate_item_matrix(model_name)
+    
+    async def _hset_embeddings(self, key: str, embeddings: Dict[int, np.ndarray]) -> None:
+        """
+        分块写入嵌入向量
+        
+        每 EMBEDDING_WRITE_CHUNK 个向量合并为一条多字段 HSET：往返次数为每块一次，
+        不再把全部命令堆进一个 MULTI/EXEC 事务管道，序列化结果也只保留一块。
+        每块先拼成一个连续的 float32（或 float16）矩阵整体转成字节，各字段只是按行切片，
+        格式与 _dumps_embedding 相同。
+        """
+        magic, dtype = _embedding_storage_format()
+        entity_ids = list(embeddings.keys())
+        vectors = list(embeddings.values())
+        for start in range(0, len(entity_ids), EMBEDDING_WRITE_CHUNK):
+            chunk_ids = entity_ids[start:start + EMBEDDING_WRITE_CHUNK]
+            matrix = np.asarray(vectors[start:start + EMBEDDING_WRITE_CHUNK], dtype=dtype)
+            matrix = matrix.reshape(len(chunk_ids), -1)
             
-            await pipeline.execute()
-            logger.info(f"Cached {len(item_embeddings)} item embeddings for model {model_name}")
+            blob = matrix.tobytes()
+            row_bytes = matrix.shape[1] * matrix.itemsize
+            mapping = {
+                entity_id: magic + blob[i * row_bytes:(i + 1) * row_bytes]
+                for i, entity_id in enumerate(chunk_ids)
+            }
+            await self.redis.hset(key, mapping=mapping)
     
     async def get_user_embedding(self, user_id: int, model_name: str = "lightgcn") -> Optional[np.ndarray]:
         """
@@ -127,7 +340,7 @@ class FeatureStore:
             return None
         
         try:
-            return pickle.loads(embedding_bytes)
+            return _loads_embedding(embedding_bytes)
         except Exception as e:
             logger.error(f"Failed to deserialize user embedding for user {user_id}: {e}")
             return None
@@ -150,7 +363,7 @@ class FeatureStore:
             return None
         
         try:
-            return pickle.loads(embedding_bytes)
+            return _loads_embedding(embedding_bytes)
         except Exception as e:
             logger.error(f"Failed to deserialize item embedding for item {item_id}: {e}")
             return None
@@ -179,12 +392,89 @@ class FeatureStore:
         for item_id, embedding_bytes in zip(item_ids, embeddings):
             if embedding_bytes:
                 try:
-                    result[item_id] = pickle.loads(embedding_bytes)
+                    result[item_id] = _loads_embedding(embedding_bytes)
                 except Exception as e:
                     logger.error(f"Failed to deserialize item embedding for item {item_id}: {e}")
         
         return result
     
+    async def get_item_matrix(
+        self,
+        model_name: str = "lightgcn"
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        获取 L2 归一化后的物品嵌入矩阵
+        
+        进程内缓存，每次先读取 Redis 中的嵌入版本号（cache_embeddings 写入物品嵌入时递增），
+        版本号未变时直接复用，其他进程更新嵌入后本进程会重新加载。
+        
+        Args:
+            model_name: 模型名称
+            
+        Returns:
+            (ids, mat_norm)：ids 为升序排列的物品ID数组 (N,)，
+            mat_norm 为对应行的归一化矩阵 (N, dim)；无嵌入时返回 None。
+            开启 EMBEDDING_INT8_QUANTIZATION 时 mat_norm 为按 INT8_SCALE
+            量化的 int8 矩阵，否则为 float32
+        """
+        version = await self.redis.get(self.key_manager.item_embedding_version_key(model_name))
+        cached = _item_matrix_cache.get(model_name)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        
+        key = self.key_manager.item_embedding_key(model_name)
+        all_embeddings = await self.redis.hgetall(key)
+        if not all_embeddings:
+            return None
+        
+        item_ids = []
+        vectors = []
+        for item_id_raw, embedding_bytes in all_embeddings.items():
+            try:
+                embedding = _loads_embedding(embedding_bytes)
+                item_ids.append(int(item_id_raw))
+                vectors.append(embedding)
+            except Exception as e:
+                logger.error(f"Failed to deserialize item embedding for item {item_id_raw}: {e}")
+        
+        if not vectors:
+            return None
+        
+        ids = np.asarray(item_ids, dtype=np.int64)
+        matrix = np.vstack(vectors)
+        
+        # 按ID排序，便于用 searchsorted 做 ID -> 行号 的向量化查找
+        order = np.argsort(ids)
+        ids = ids[order]
+        matrix = matrix[order]
+        
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        mat_norm = matrix
+        
+        if settings.EMBEDDING_INT8_QUANTIZATION:
+            mat_norm = np.round(mat_norm * INT8_SCALE).astype(np.int8)
+        
+        _item_matrix_cache[model_name] = (version, ids, mat_norm)
+        logger.info(
+            f"Loaded normalized item matrix for model {model_name}: {mat_norm.shape}, version={version!r}"
+        )
+        
+        return ids, mat_norm
+    
+    def invalidate_item_matrix(self, model_name: Optional[str] = None) -> None:
+        """
+        丢弃进程内的归一化物品矩阵缓存
+        
+        Args:
+            model_name: 模型名称，为 None 时清空所有模型
+        """
+        if model_name is None:
+            _item_matrix_cache.clear()
+        else:
+            _item_matrix_cache.pop(model_name, None)
+    
     async def update_popular_games(self, game_scores: List[Tuple[int, float]]) -> None:
         """
         更新热门游戏榜单
@@ -194,22 +484,28 @@ class FeatureStore:
         """
         key = self.key_manager.POPULAR_GAMES
         
+        # 清空、写入、设置过期放在同一个事务管道中：一次往返，读取方也不会看到空榜单
+        pipeline = self.redis.pipeline()
+        
         # 清空现有榜单
-        await self.redis.delete(key)
+        pipeline.delete(key)
         
         # 添加新的榜单
         if game_scores:
-            # Redis ZADD 需要 score, member 的顺序
-            zadd_data = {}
-            for game_id, score in game_scores:
-                zadd_data[game_id] = score
-            
-            await self.redis.zadd(key, zadd_data)
+            # 整个榜单合并为一条 ZADD（member -> score 映射）
+            pipeline.zadd(key, dict(game_scores))
             
             # 设置过期时间（1天）
-            await self.redis.expire(key, 24 * 3600)
-            
+            pipeline.expire(key, 24 * 3600)
+        
+        await pipeline.execute()
+        
+        if game_scores:
             logger.info(f"Updated popular games list with {len(game_scores)} games")
+        
+        # 榜单已更新，丢弃本进程的缓存（其他进程等待 TTL 过期）
+        global _popular_games_cache
+        _popular_games_cache = None
     
     async def get_popular_games(self, limit: int = 100) -> List[Tuple[int, float]]:
         """
@@ -221,12 +517,44 @@ class FeatureStore:
         Returns:
             (游戏ID, 分数)元组列表
         """
+        ids, scores = await self.get_popular_games_arrays(limit)
+        return list(zip(ids.tolist(), scores.tolist()))
+    
+    async def get_popular_games_arrays(self, limit: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取热门游戏榜单（数组形式，带进程内 TTL 缓存）
+        
+        Args:
+            limit: 限制数量
+            
+        Returns:
+            (ids, scores)：按分数降序排列的 int64 游戏ID数组和 float64 分数数组
+        """
+        global _popular_games_cache
+        
+        cached = _popular_games_cache
+        if cached is not None:
+            expires_at, fetched, ids, scores = cached
+            # 缓存条数不少于 limit，或榜单本身不足已读取的条数
+            if time.monotonic() < expires_at and (fetched >= limit or len(ids) < fetched):
+                return ids[:limit], scores[:limit]
+        
         key = self.key_manager.POPULAR_GAMES
+        fetch_size = max(limit, POPULAR_GAMES_FETCH_SIZE)
         
         # 获取分数最高的游戏（降序）
-        games = await self.redis.zrevrange(key, 0, limit - 1, withscores=True)
+        games = await self.redis.zrevrange(key, 0, fetch_size - 1, withscores=True)
         
-        return [(int(game_id), float(score)) for game_id, score in games]
+        ids = np.fromiter((int(game_id) for game_id, _ in games), dtype=np.int64, count=len(games))
+        scores = np.fromiter((score for _, score in games), dtype=np.float64, count=len(games))
+        
+        # 榜单为空（尚未计算）时不缓存，计算完成后立即可见
+        if len(ids) > 0:
+            _popular_games_cache = (
+                time.monotonic() + settings.POPULAR_GAMES_CACHE_TTL_SECONDS, fetch_size, ids, scores
+            )
+        
+        return ids[:limit], scores[:limit]
     
     async def cache_game_metadata(self, game_id: int, metadata: Dict[str, Any]) -> None:
         """
@@ -238,14 +566,29 @@ class FeatureStore:
         """
         key = self.key_manager.game_metadata_key(game_id)
         
-        # 序列化元数据
-        metadata_json = json.dumps(metadata, ensure_ascii=False)
-        
         # 存储并设置过期时间（永久）
-        await self.redis.set(key, metadata_json)
+        await self.redis.set(key, _dumps_metadata(_prepare_metadata(metadata)))
         
         logger.debug(f"Cached metadata for game {game_id}")
     
+    async def cache_batch_game_metadata(self, metadata_by_game: Dict[int, Dict[str, Any]]) -> None:
+        """
+        批量缓存游戏元数据（单条 MSET，一次往返）
+        
+        Args:
+            metadata_by_game: 游戏ID到元数据字典的映射
+        """
+        if not metadata_by_game:
+            return
+        
+        mapping = {
+            self.key_manager.game_metadata_key(game_id): _dumps_metadata(_prepare_metadata(metadata))
+            for game_id, metadata in metadata_by_game.items()
+        }
+        await self.redis.mset(mapping)
+        
+        logger.debug(f"Cached metadata for {len(mapping)} games")
+    
     async def get_game_metadata(self, game_id: int) -> Optional[Dict[str, Any]]:
         """
         获取游戏元数据
@@ -263,11 +606,40 @@ class FeatureStore:
             return None
         
         try:
-            return json.loads(metadata_json)
+            return _loads_metadata(metadata_json)
         except Exception as e:
             logger.error(f"Failed to deserialize game metadata for game {game_id}: {e}")
             return None
-    
+
+    async def get_batch_game_metadata(self, game_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        批量获取游戏元数据（单次 MGET 往返）
+
+        Args:
+            game_ids: 游戏ID列表
+
+        Returns:
+            游戏ID到元数据字典的映射（缺失的游戏不包含在结果中）
+        """
+        # 去重并保持顺序
+        unique_ids = list(dict.fromkeys(game_ids))
+        if not unique_ids:
+            return {}
+
+        keys = [self.key_manager.game_metadata_key(game_id) for game_id in unique_ids]
+        metadata_list = await self.redis.mget(keys)
+
+        result = {}
+        for game_id, metadata_json in zip(unique_ids, metadata_list):
+            if not metadata_json:
+                continue
+            try:
+                result[game_id] = _loads_metadata(metadata_json)
+            except Exception as e:
+                logger.error(f"Failed to deserialize game metadata for game {game_id}: {e}")
+
+        return result
+
     async def build_genre_index(self, genre_games: Dict[str, List[int]]) -> None:
         """
         构建类型倒排索引
@@ -312,7 +684,8 @@ class FeatureStore:
         min_interactions: int = 3,
         fusion_weight: float = 0.1,
         max_sequence_len: int = 10,
-        use_time_decay: bool = True
+        use_time_decay: bool = True,
+        user_sequence: Optional[List[int]] = None
     ) -> Optional[np.ndarray]:
         """
         获取动态用户向量（融合用户交互历史）
@@ -327,6 +700,7 @@ class FeatureStore:
             fusion_weight: 交互向量的融合权重 (0-1)，原始向量权重为 1-fusion_weight
             max_sequence_len: 用于融合的最大序列长度
             use_time_decay: 是否使用时间衰减（最近交互权重更高）
+            user_sequence: 调用方已获取的用户交互序列（最近的在前），避免重复读取
             
         Returns:
             动态用户向量，如果用户不存在则返回 None
@@ -337,7 +711,10 @@ class FeatureStore:
             return None
         
         # 2. 获取用户交互序列
-        user_sequence = await self.get_user_sequence(user_id, max_sequence_len)
+        if user_sequence is None:
+            user_sequence = await self.get_user_sequence(user_id, max_sequence_len)
+        else:
+            user_sequence = user_sequence[:max_sequence_len]
         
         # 交互次数不足，直接返回原始向量
         if len(user_sequence) < min_interactions:
@@ -350,33 +727,27 @@ class FeatureStore:
             return original_embedding
         
         # 4. 计算交互向量（加权平均）
-        valid_embeddings = []
-        weights = []
-        
-        for i, item_id in enumerate(user_sequence):
-            if item_id in item_embeddings:
-                valid_embeddings.append(item_embeddings[item_id])
-                
-                if use_time_decay:
-                    # 时间衰减：最近的交互权重更高
-                    # 使用指数衰减：weight = exp(-decay_rate * position)
-                    decay_rate = 0.1
-                    weight = np.exp(-decay_rate * i)
-                else:
-                    weight = 1.0
-                weights.append(weight)
-        
-        if not valid_embeddings:
+        positions = [i for i, item_id in enumerate(user_sequence) if item_id in item_embeddings]
+        
+        if not positions:
             return original_embedding
         
+        # 有嵌入的交互物品堆叠为 (n, dim) 矩阵
+        valid_embeddings = np.stack([item_embeddings[user_sequence[i]] for i in positions])
+        
+        if use_time_decay:
+            # 时间衰减：最近的交互权重更高
+            # 使用指数衰减：weight = exp(-decay_rate * position)
+            decay_rate = 0.1
+            weights = np.exp(-decay_rate * np.asarray(positions, dtype=np.float64))
+        else:
+            weights = np.ones(len(positions), dtype=np.float64)
+        
         # 归一化权重
-        weights = np.array(weights)
         weights = weights / weights.sum()
         
-        # 加权平均计算交互向量
-        interaction_vector = np.zeros_like(original_embedding)
-        for emb, w in zip(valid_embeddings, weights):
-            interaction_vector += w * emb
+        # 加权平均计算交互向量（一次矩阵-向量乘）
+        interaction_vector = (weights.astype(np.float32) @ valid_embeddings)
         
         # 5. 融合原始向量和交互向量
         dynamic_embedding = (1 - fusion_weight) * original_embedding + fusion_weight * interaction_vector
@@ -392,3 +763,20 @@ class FeatureStore:
         )
         
         return dynamic_embedding
+
+
+# 全局特征存储实例（懒加载），供召回、排序等组件共享
+_feature_store: Optional[FeatureStore] = None
+
+
+def get_feature_store() -> FeatureStore:
+    """
+    获取共享的特征存储实例（懒加载）
+    
+    Returns:
+        FeatureStore实例
+    """
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = FeatureStore()
+    return _feature_store
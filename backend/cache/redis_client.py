@@ -16,9 +16,12 @@ redis_client: Optional[redis.Redis] = None
 
 
 async def init_redis() -> None:
-    """初始化Redis连接"""
+    """初始化Redis连接（幂等：已初始化时直接返回，复用现有连接池）"""
     global redis_pool, redis_client
     
+    if redis_client is not None:
+        return
+    
     redis_url = get_redis_url()
     logger.info(f"Connecting to Redis: {redis_url}")
     
@@ -45,6 +48,9 @@ async def init_redis() -> None:
         logger.info("Redis connection established successfully")
     except Exception as e:
         logger.error(f"Failed to connect to Redis: {e}")
+        # 连接失败不保留客户端，下次调用会重新初始化
+        redis_pool = None
+        redis_client = None
         raise
 
 
@@ -90,6 +96,8 @@ class RedisKeyManager:
     GENRE_INDEX_PREFIX = "genre_index"
     GAME_META_PREFIX = "game_meta"
     USER_PROFILE_PREFIX = "user_profile"
+    USER_PREFS_PREFIX = "user_prefs"
+    RANK_CACHE_PREFIX = "rank_cache"
     
     @staticmethod
     def user_sequence_key(user_id: int) -> str:
@@ -106,6 +114,11 @@ class RedisKeyManager:
         """物品嵌入键"""
         return f"{RedisKeyManager.EMBEDDINGS_PREFIX}:{model_name}:item"
     
+    @staticmethod
+    def item_embedding_version_key(model_name: str) -> str:
+        """物品嵌入版本号键"""
+        return f"{RedisKeyManager.EMBEDDINGS_PREFIX}:{model_name}:item_version"
+    
     @staticmethod
     def recommendation_cache_key(user_id: int) -> str:
         """推荐缓存键"""
@@ -125,3 +138,13 @@ class RedisKeyManager:
     def user_profile_key(user_id: int) -> str:
         """用户资料键"""
         return f"{RedisKeyManager.USER_PROFILE_PREFIX}:{user_id}"
+    
+    @staticmethod
+    def user_preferences_key(user_id: int) -> str:
+        """用户偏好键"""
+        return f"{RedisKeyManager.USER_PREFS_PREFIX}:{user_id}"
+    
+    @staticmethod
+    def ranking_cache_key(user_id: int, digest: str) -> str:
+        """排序结果缓存键"""
+        return f"{RedisKeyManager.RANK_CACHE_PREFIX}:{user_id}:{digest}"
@@ -58,11 +58,23 @@ class Settings(BaseSettings):
     DEFAULT_TOPK: int = 10
     MAX_TOPK: int = 100
     CACHE_TTL_SECONDS: int = 3600
+    USER_PREFERENCES_TTL_SECONDS: int = 600  # 排序用户偏好缓存时间
+    RANKING_CACHE_TTL_SECONDS: int = 60  # 排序结果缓存时间（按候选集+策略）
+    POPULAR_GAMES_CACHE_TTL_SECONDS: int = 60  # 热门榜单进程内缓存时间
     
     # 召回配置
     RECALL_SIZE: int = 500
     EMBEDDING_DIM: int = 64
     MAX_SEQUENCE_LENGTH: int = 50
+    EMBEDDING_INT8_QUANTIZATION: bool = False  # 物品矩阵以 int8 对称量化存储（内存降为 1/4）
+    EMBEDDING_CACHE_FLOAT16: bool = False  # Redis 中的嵌入向量以 float16 存储（内存与传输量减半，读取时还原为 float32）
+    FAISS_INDEX_TYPE: str = "HNSW"  # 召回使用的 ANN 索引类型 (HNSW, IVF, IVFPQ, SQ8, IVFSQ8, Flat)，或 faiss.index_factory 描述串（可用 {nlist} 占位）
+    FAISS_NPROBE: int = 16  # IVF 搜索时探查的聚类数，0 表示按 nlist/32 自动取值
+    FAISS_EF_SEARCH: int = 64  # HNSW 搜索时的候选队列长度
+    FAISS_GPU_TRAINING: bool = True  # 有可用 GPU（faiss-gpu）时在 GPU 上训练 IVF 聚类，训练完成后转回 CPU 提供服务
+    FAISS_OMP_THREADS: int = 1  # 每个 worker 进程的 FAISS OpenMP 线程数，0 表示 CPU 核数 / WEB_CONCURRENCY（worker 数）
+    FAISS_BATCH_WINDOW_MS: float = 5.0  # 并发召回请求合并为一次 FAISS 批量搜索的等待窗口
+    FAISS_BATCH_MAX_SIZE: int = 64  # 单次批量搜索的最大查询数
     
     # 业务规则配置
     MAX_SAME_DEVELOPER: int = 2
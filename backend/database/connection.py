@@ -20,9 +20,12 @@ async_session_maker = None
 
 
 async def init_db() -> None:
-    """初始化数据库连接"""
+    """初始化数据库连接（幂等：已初始化时直接返回，复用现有引擎与连接池）"""
     global engine, async_session_maker
     
+    if engine is not None:
+        return
+    
     database_url = get_database_url()
     # 脱敏数据库URL（隐藏密码）
     safe_url = database_url.split('@')[1] if '@' in database_url else database_url
@@ -60,10 +63,12 @@ async def init_db() -> None:
 
 async def close_db() -> None:
     """关闭数据库连接"""
-    global engine
+    global engine, async_session_maker
     
     if engine:
         await engine.dispose()
+        engine = None
+        async_session_maker = None
         logger.info("Database connection closed")
 
 
@@ -79,14 +79,14 @@ async def get_user_library(
                 "genres": game_meta.genres.split(",") if game_meta.genres else [],
                 "tags": game_meta.tags.split(",") if game_meta.tags else [],
                 "playtime_hours": float(library_item.playtime_hours) if library_item.playtime_hours else 0.0,
-                "last_played_at": library_item.last_played_at.isoformat() if library_item.last_played_at else None,
+                "last_played_at": library_item.last_played_at,
                 "last_played_relative": last_played_relative,
                 "is_installed": library_item.is_installed,
                 "is_favorite": library_item.is_favorite,
                 "achievement_progress": library_item.achievement_progress,
                 "achievements_unlocked": library_item.achievements_unlocked,
                 "achievements_total": library_item.achievements_total,
-                "purchase_date": str(library_item.purchase_date) if library_item.purchase_date else None,
+                "purchase_date": library_item.purchase_date,
                 "purchase_price": float(library_item.purchase_price) if library_item.purchase_price else None
             })
         
@@ -7,7 +7,7 @@ import time
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from backend.config import settings
@@ -105,6 +105,7 @@ def create_application() -> FastAPI:
         version="1.0.0",
         docs_url="/docs" if settings.DEBUG else None,
         redoc_url="/redoc" if settings.DEBUG else None,
+        default_response_class=ORJSONResponse,
     )
     
     # 添加中间件
@@ -238,7 +239,7 @@ def setup_event_handlers(app: FastAPI) -> None:
 
         # 初始化 FAISS 索引（后台异步初始化，不阻塞启动）
         try:
-            faiss_manager = get_faiss_index_manager(model_name="lightgcn", index_type="IVF")
+            faiss_manager = get_faiss_index_manager(model_name="lightgcn", index_type=settings.FAISS_INDEX_TYPE)
             # 在后台任务中初始化索引，避免阻塞应用启动
             asyncio.create_task(_init_faiss_index_background(faiss_manager))
         except Exception as e:
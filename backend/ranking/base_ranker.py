@@ -21,6 +21,7 @@ class BaseRanker(ABC):
         self, 
         candidates: List[Tuple[int, float]], 
         user_id: int,
+        weights: Optional[Dict[str, float]] = None,
         **kwargs
     ) -> List[Tuple[int, float]]:
         """
@@ -29,6 +30,7 @@ class BaseRanker(ABC):
         Args:
             candidates: [(product_id, recall_score)] 召回的候选集
             user_id: 用户ID
+            weights: 本次排序使用的权重（None 时使用排序器自身配置）
             **kwargs: 其他参数
             
         Returns:
@@ -85,8 +87,8 @@ class BaseRanker(ABC):
             elapsed_time: 耗时（秒）
         """
         self.logger.info(
-            f"Ranking completed for user {user_id}: "
-            f"{input_count} -> {output_count} candidates in {elapsed_time:.3f}s"
+            "Ranking completed for user %s: %d -> %d candidates in %.3fs",
+            user_id, input_count, output_count, elapsed_time
         )
     
     def _normalize_scores(self, candidates: List[Tuple[int, float]]) -> List[Tuple[int, float]]:
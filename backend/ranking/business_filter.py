@@ -3,11 +3,11 @@
 """
 
 import json
-from typing import List, Tuple, Set, Dict, Any
+from typing import List, Tuple, Set, Dict, Any, Optional
 from collections import defaultdict
 import logging
 
-from backend.cache.feature_store import FeatureStore
+from backend.cache.feature_store import FeatureStore, get_feature_store
 from backend.config import settings
 
 logger = logging.getLogger(__name__)
@@ -16,8 +16,8 @@ logger = logging.getLogger(__name__)
 class BusinessFilter:
     """业务过滤器"""
     
-    def __init__(self):
-        self.feature_store = FeatureStore()
+    def __init__(self, feature_store: Optional[FeatureStore] = None):
+        self.feature_store = feature_store or get_feature_store()
         
         # 业务规则配置
         self.max_same_developer = settings.MAX_SAME_DEVELOPER  # 同一开发商最大数量
@@ -29,6 +29,7 @@ class BusinessFilter:
         self, 
         candidates: List[Tuple[int, float]], 
         user_id: int,
+        metadata_map: Optional[Dict[int, Dict[str, Any]]] = None,
         **kwargs
     ) -> List[Tuple[int, float]]:
         """
@@ -37,6 +38,7 @@ class BusinessFilter:
         Args:
             candidates: 排序后的候选集
             user_id: 用户ID
+            metadata_map: 预取的游戏元数据（None 时批量获取一次）
             **kwargs: 其他参数
             
         Returns:
@@ -46,20 +48,25 @@ class BusinessFilter:
             if not candidates:
                 return candidates
             
+            if metadata_map is None:
+                metadata_map = await self.feature_store.get_batch_game_metadata(
+                    [item_id for item_id, _ in candidates]
+                )
+            
             # 1. 过滤用户已玩游戏
             filtered = await self._filter_played_games(candidates, user_id)
             
             # 2. 开发商多样性过滤
-            filtered = await self._filter_by_developer_diversity(filtered)
+            filtered = await self._filter_by_developer_diversity(filtered, metadata_map)
             
             # 3. 类型多样性过滤
-            filtered = await self._filter_by_genre_diversity(filtered)
+            filtered = await self._filter_by_genre_diversity(filtered, metadata_map)
             
             # 4. 价格过滤（可选）
-            filtered = await self._filter_by_price(filtered, kwargs.get('price_range'))
+            filtered = await self._filter_by_price(filtered, metadata_map, kwargs.get('price_range'))
             
             # 5. 年龄限制过滤（可选）
-            filtered = await self._filter_by_age_rating(filtered, kwargs.get('user_age'))
+            filtered = await self._filter_by_age_rating(filtered, metadata_map, kwargs.get('user_age'))
             
             self.logger.info(
                 f"Business filter for user {user_id}: "
@@ -109,13 +116,15 @@ class BusinessFilter:
     
     async def _filter_by_developer_diversity(
         self, 
-        candidates: List[Tuple[int, float]]
+        candidates: List[Tuple[int, float]],
+        metadata_map: Dict[int, Dict[str, Any]]
     ) -> List[Tuple[int, float]]:
         """
         按开发商多样性过滤
         
         Args:
             candidates: 候选集
+            metadata_map: 游戏元数据映射
             
         Returns:
             过滤后的候选集
@@ -125,8 +134,7 @@ class BusinessFilter:
             filtered = []
             
             for item_id, score in candidates:
-                # 获取游戏元数据
-                metadata = await self.feature_store.get_game_metadata(item_id)
+                metadata = metadata_map.get(item_id)
                 
                 if not metadata:
                     # 没有元数据，直接添加
@@ -152,13 +160,15 @@ class BusinessFilter:
     
     async def _filter_by_genre_diversity(
         self, 
-        candidates: List[Tuple[int, float]]
+        candidates: List[Tuple[int, float]],
+        metadata_map: Dict[int, Dict[str, Any]]
     ) -> List[Tuple[int, float]]:
         """
         按类型多样性过滤
         
         Args:
             candidates: 候选集
+            metadata_map: 游戏元数据映射
             
         Returns:
             过滤后的候选集
@@ -168,8 +178,7 @@ class BusinessFilter:
             filtered = []
             
             for item_id, score in candidates:
-                # 获取游戏元数据
-                metadata = await self.feature_store.get_game_metadata(item_id)
+                metadata = metadata_map.get(item_id)
                 
                 if not metadata:
                     # 没有元数据，直接添加
@@ -210,6 +219,7 @@ class BusinessFilter:
     async def _filter_by_price(
         self, 
         candidates: List[Tuple[int, float]],
+        metadata_map: Dict[int, Dict[str, Any]],
         price_range: Tuple[float, float] = None
     ) -> List[Tuple[int, float]]:
         """
@@ -217,6 +227,7 @@ class BusinessFilter:
         
         Args:
             candidates: 候选集
+            metadata_map: 游戏元数据映射
             price_range: 价格范围 (min_price, max_price)
             
         Returns:
@@ -230,8 +241,7 @@ class BusinessFilter:
             filtered = []
             
             for item_id, score in candidates:
-                # 获取游戏元数据
-                metadata = await self.feature_store.get_game_metadata(item_id)
+                metadata = metadata_map.get(item_id)
                 
                 if not metadata:
                     # 没有价格信息，直接添加
@@ -258,6 +268,7 @@ class BusinessFilter:
     async def _filter_by_age_rating(
         self, 
         candidates: List[Tuple[int, float]],
+        metadata_map: Dict[int, Dict[str, Any]],
         user_age: int = None
     ) -> List[Tuple[int, float]]:
         """
@@ -265,6 +276,7 @@ class BusinessFilter:
         
         Args:
             candidates: 候选集
+            metadata_map: 游戏元数据映射
             user_age: 用户年龄
             
         Returns:
@@ -277,8 +289,7 @@ class BusinessFilter:
             filtered = []
             
             for item_id, score in candidates:
-                # 获取游戏元数据
-                metadata = await self.feature_store.get_game_metadata(item_id)
+                metadata = metadata_map.get(item_id)
                 
                 if not metadata:
                     # 没有年龄限制信息，直接添加
@@ -3,12 +3,12 @@
 """
 
 import json
-from typing import List, Tuple, Dict, Any, Set
+from typing import List, Tuple, Dict, Any, Set, Optional
 from collections import defaultdict
 import random
 import logging
 
-from backend.cache.feature_store import FeatureStore
+from backend.cache.feature_store import FeatureStore, get_feature_store
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +16,8 @@ logger = logging.getLogger(__name__)
 class DiversityController:
     """多样性控制器"""
     
-    def __init__(self):
-        self.feature_store = FeatureStore()
+    def __init__(self, feature_store: Optional[FeatureStore] = None):
+        self.feature_store = feature_store or get_feature_store()
         self.logger = logging.getLogger(__name__)
         
         # 多样性控制参数
@@ -33,7 +33,8 @@ class DiversityController:
         self, 
         candidates: List[Tuple[int, float]], 
         user_id: int,
-        diversity_strength: float = 0.5
+        diversity_strength: float = 0.5,
+        metadata_map: Optional[Dict[int, Dict[str, Any]]] = None
     ) -> List[Tuple[int, float]]:
         """
         应用多样性控制
@@ -42,6 +43,7 @@ class DiversityController:
             candidates: 排序后的候选集
             user_id: 用户ID
             diversity_strength: 多样性强度 (0-1)
+            metadata_map: 预取的游戏元数据（None 时批量获取一次）
             
         Returns:
             应用多样性控制后的候选集
@@ -51,7 +53,7 @@ class DiversityController:
                 return candidates
             
             # 获取游戏元数据
-            candidates_with_metadata = await self._enrich_with_metadata(candidates)
+            candidates_with_metadata = await self._enrich_with_metadata(candidates, metadata_map)
             
             # 应用多样性重排序
             diversified = await self._diversify_recommendations(
@@ -74,26 +76,28 @@ class DiversityController:
     
     async def _enrich_with_metadata(
         self, 
-        candidates: List[Tuple[int, float]]
+        candidates: List[Tuple[int, float]],
+        metadata_map: Optional[Dict[int, Dict[str, Any]]] = None
     ) -> List[Tuple[int, float, Dict[str, Any]]]:
         """
         为候选集添加元数据
         
         Args:
             candidates: 候选集
+            metadata_map: 预取的游戏元数据（None 时批量获取一次）
             
         Returns:
             带元数据的候选集
         """
-        enriched = []
-        
-        for item_id, score in candidates:
-            metadata = await self.feature_store.get_game_metadata(item_id)
-            if not metadata:
-                metadata = {}
-            enriched.append((item_id, score, metadata))
+        if metadata_map is None:
+            metadata_map = await self.feature_store.get_batch_game_metadata(
+                [item_id for item_id, _ in candidates]
+            )
         
-        return enriched
+        return [
+            (item_id, score, metadata_map.get(item_id) or {})
+            for item_id, score in candidates
+        ]
     
     async def _diversify_recommendations(
         self, 
@@ -3,9 +3,15 @@
 """
 
 import time
+import asyncio
+import hashlib
 from typing import List, Tuple, Optional, Dict, Any
 import logging
 
+import numpy as np
+import orjson
+
+from backend.cache.feature_store import FeatureStore, get_feature_store
 from backend.ranking.base_ranker import BaseRanker
 from backend.ranking.rule_ranker import RuleBasedRanker
 from backend.ranking.business_filter import BusinessFilter
@@ -17,14 +23,82 @@ logger = logging.getLogger(__name__)
 class RankingStrategy:
     """排序策略管理器"""
     
-    def __init__(self):
+    # 各策略的排序权重（按请求传入排序器，不修改共享的排序器状态）
+    STRATEGY_WEIGHTS: Dict[str, Dict[str, float]] = {
+        # 默认策略
+        "default": {
+            "recall_score": 0.5,
+            "genre_match": 0.3,
+            "rating_boost": 0.2,
+        },
+        # 质量优先：增加评分权重
+        "quality_focused": {
+            "recall_score": 0.3,
+            "genre_match": 0.2,
+            "rating_boost": 0.5,
+        },
+        # 多样性优先：平衡各个因子
+        "diversity_focused": {
+            "recall_score": 0.4,
+            "genre_match": 0.3,
+            "rating_boost": 0.3,
+        },
+    }
+    
+    # 各策略的多样性强度
+    STRATEGY_DIVERSITY_STRENGTH: Dict[str, float] = {
+        "default": 0.5,            # 默认多样性
+        "quality_focused": 0.2,    # 低多样性，更注重质量
+        "diversity_focused": 0.8,  # 高多样性
+    }
+    
+    def __init__(self, feature_store: Optional[FeatureStore] = None):
+        # 各组件共享同一个特征存储实例
+        self.feature_store = feature_store or get_feature_store()
+        
         # 初始化各个组件
-        self.rule_ranker = RuleBasedRanker()
-        self.business_filter = BusinessFilter()
-        self.diversity_controller = DiversityController()
+        self.rule_ranker = RuleBasedRanker(self.feature_store)
+        self.business_filter = BusinessFilter(self.feature_store)
+        self.diversity_controller = DiversityController(self.feature_store)
         
         self.logger = logging.getLogger(__name__)
     
+    def _config_fingerprint(self) -> bytes:
+        """
+        序列化当前生效的排序配置，参与结果缓存键计算
+        
+        各 worker 进程独立更新配置，按配置内容而非进程内版本号区分缓存，
+        配置不同的进程不会读到彼此的排序结果，配置变化后旧缓存自然失效。
+        """
+        config = self.get_ranking_config()
+        config["time_decay"] = {
+            "time_decay_factor": self.rule_ranker.time_decay_factor,
+            "min_time_decay": self.rule_ranker.min_time_decay,
+            "current_year": self.rule_ranker.current_year,
+            "diversity_penalty": self.rule_ranker.diversity_penalty,
+        }
+        config["strategy_weights"] = self.STRATEGY_WEIGHTS
+        config["strategy_diversity_strength"] = self.STRATEGY_DIVERSITY_STRENGTH
+        # 非 JSON 原生类型（如 Decimal）按字符串序列化
+        return orjson.dumps(config, option=orjson.OPT_SORT_KEYS, default=str)
+    
+    def _ranking_cache_digest(
+        self,
+        candidates: List[Tuple[int, float]],
+        user_id: int,
+        strategy: str,
+        kwargs: Dict[str, Any]
+    ) -> str:
+        """
+        计算排序结果缓存摘要（候选ID与召回分数、用户、策略、生效配置、额外参数）
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.asarray(candidates, dtype=np.float64).tobytes())
+        digest.update(int(user_id).to_bytes(8, "little", signed=True))
+        digest.update(self._config_fingerprint())
+        digest.update(f"{strategy}|{sorted(kwargs.items())!r}".encode())
+        return digest.hexdigest()
+    
     async def rank_and_filter(
         self, 
         candidates: List[Tuple[int, float]], 
@@ -44,53 +118,79 @@ class RankingStrategy:
         Returns:
             排序和过滤后的候选集
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             if not candidates:
                 return candidates
             
+            # 预取三个阶段共用的游戏元数据，与排序缓存查询并发进行
+            metadata_task = asyncio.create_task(
+                self.feature_store.get_batch_game_metadata([item_id for item_id, _ in candidates])
+            )
+            
+            # 候选集与策略不变时直接返回缓存的排序结果
+            cache_digest = self._ranking_cache_digest(candidates, user_id, strategy, kwargs)
+            try:
+                cached_result = await self.feature_store.get_cached_ranking_result(user_id, cache_digest)
+                if cached_result is not None:
+                    metadata_task.cancel()
+                    self.logger.debug("Ranking cache hit for user %s", user_id)
+                    return cached_result
+            except Exception as e:
+                self.logger.warning("Failed to read ranking cache for user %s: %s", user_id, e)
+            
+            try:
+                metadata_map = await metadata_task
+            except Exception as e:
+                # 预取失败时由各阶段自行获取
+                self.logger.warning("Failed to prefetch game metadata for user %s: %s", user_id, e)
+                metadata_map = None
+            
             self.logger.info(
-                f"Starting ranking and filtering for user {user_id}: "
-                f"{len(candidates)} candidates, strategy={strategy}"
+                "Starting ranking and filtering for user %s: %d candidates, strategy=%s",
+                user_id, len(candidates), strategy
             )
             
             # 1. 排序阶段
-            ranking_start = time.time()
+            ranking_start = time.perf_counter()
             ranked_candidates = await self._apply_ranking(
-                candidates, user_id, strategy, **kwargs
+                candidates, user_id, strategy, metadata_map=metadata_map, **kwargs
             )
-            ranking_time = (time.time() - ranking_start) * 1000
+            ranking_time = (time.perf_counter() - ranking_start) * 1000
             
             # 2. 业务过滤阶段
-            filter_start = time.time()
+            filter_start = time.perf_counter()
             filtered_candidates = await self.business_filter.filter(
-                ranked_candidates, user_id, **kwargs
+                ranked_candidates, user_id, metadata_map=metadata_map, **kwargs
             )
-            filter_time = (time.time() - filter_start) * 1000
+            filter_time = (time.perf_counter() - filter_start) * 1000
             
             # 3. 多样性控制阶段
-            diversity_start = time.time()
+            diversity_start = time.perf_counter()
             final_candidates = await self._apply_diversity_control(
-                filtered_candidates, user_id, strategy, **kwargs
+                filtered_candidates, user_id, strategy, metadata_map=metadata_map, **kwargs
             )
-            diversity_time = (time.time() - diversity_start) * 1000
+            diversity_time = (time.perf_counter() - diversity_start) * 1000
             
-            total_time = (time.time() - start_time) * 1000
+            if self.logger.isEnabledFor(logging.INFO):
+                total_time = (time.perf_counter() - start_time) * 1000
+                self.logger.info(
+                    "Ranking and filtering completed for user %s: %d -> %d candidates, "
+                    "ranking: %.2fms, filter: %.2fms, diversity: %.2fms, total: %.2fms",
+                    user_id, len(candidates), len(final_candidates),
+                    ranking_time, filter_time, diversity_time, total_time
+                )
             
-            self.logger.info(
-                f"Ranking and filtering completed for user {user_id}: "
-                f"{len(candidates)} -> {len(final_candidates)} candidates, "
-                f"ranking: {ranking_time:.2f}ms, "
-                f"filter: {filter_time:.2f}ms, "
-                f"diversity: {diversity_time:.2f}ms, "
-                f"total: {total_time:.2f}ms"
-            )
+            try:
+                await self.feature_store.cache_ranking_result(user_id, cache_digest, final_candidates)
+            except Exception as e:
+                self.logger.warning("Failed to cache ranking result for user %s: %s", user_id, e)
             
             return final_candidates
             
         except Exception as e:
-            self.logger.error(f"Ranking and filtering failed for user {user_id}: {e}")
+            self.logger.error("Ranking and filtering failed for user %s: %s", user_id, e)
             return candidates  # 返回原始候选集
     
     async def _apply_ranking(
@@ -112,36 +212,17 @@ class RankingStrategy:
         Returns:
             排序后的候选集
         """
-        if strategy == "quality_focused":
-            # 质量优先：增加评分权重
-            self.rule_ranker.update_weights({
-                "recall_score": 0.3,
-                "genre_match": 0.2,
-                "rating_boost": 0.5,
-            })
-        elif strategy == "diversity_focused":
-            # 多样性优先：平衡各个因子
-            self.rule_ranker.update_weights({
-                "recall_score": 0.4,
-                "genre_match": 0.3,
-                "rating_boost": 0.3,
-            })
-        else:
-            # 默认策略
-            self.rule_ranker.update_weights({
-                "recall_score": 0.5,
-                "genre_match": 0.3,
-                "rating_boost": 0.2,
-            })
+        weights = self.STRATEGY_WEIGHTS.get(strategy, self.STRATEGY_WEIGHTS["default"])
         
         # 应用规则排序
-        return await self.rule_ranker.rank(candidates, user_id, **kwargs)
+        return await self.rule_ranker.rank(candidates, user_id, weights=weights, **kwargs)
     
     async def _apply_diversity_control(
         self, 
         candidates: List[Tuple[int, float]], 
         user_id: int,
         strategy: str,
+        metadata_map: Optional[Dict[int, Dict[str, Any]]] = None,
         **kwargs
     ) -> List[Tuple[int, float]]:
         """
@@ -151,24 +232,22 @@ class RankingStrategy:
             candidates: 候选集
             user_id: 用户ID
             strategy: 排序策略
+            metadata_map: 预取的游戏元数据
             **kwargs: 其他参数
             
         Returns:
             应用多样性控制后的候选集
         """
         # 根据策略调整多样性强度
-        if strategy == "diversity_focused":
-            diversity_strength = 0.8  # 高多样性
-        elif strategy == "quality_focused":
-            diversity_strength = 0.2  # 低多样性，更注重质量
-        else:
-            diversity_strength = 0.5  # 默认多样性
+        diversity_strength = self.STRATEGY_DIVERSITY_STRENGTH.get(
+            strategy, self.STRATEGY_DIVERSITY_STRENGTH["default"]
+        )
         
         # 从kwargs中获取用户指定的多样性强度
         diversity_strength = kwargs.get("diversity_strength", diversity_strength)
         
         return await self.diversity_controller.apply_diversity_control(
-            candidates, user_id, diversity_strength
+            candidates, user_id, diversity_strength, metadata_map=metadata_map
         )
     
     async def rank_only(
@@ -193,7 +272,7 @@ class RankingStrategy:
         if ranker_type == "rule_based":
             return await self.rule_ranker.rank(candidates, user_id, **kwargs)
         else:
-            self.logger.warning(f"Unknown ranker type: {ranker_type}, using rule_based")
+            self.logger.warning("Unknown ranker type: %s, using rule_based", ranker_type)
             return await self.rule_ranker.rank(candidates, user_id, **kwargs)
     
     async def filter_only(
@@ -231,15 +310,15 @@ class RankingStrategy:
         """
         if ranking_weights:
             self.rule_ranker.update_weights(ranking_weights)
-            self.logger.info(f"Updated ranking weights: {ranking_weights}")
+            self.logger.info("Updated ranking weights: %s", ranking_weights)
         
         if filter_rules:
             self.business_filter.update_filter_rules(**filter_rules)
-            self.logger.info(f"Updated filter rules: {filter_rules}")
+            self.logger.info("Updated filter rules: %s", filter_rules)
         
         if diversity_params:
             self.diversity_controller.update_diversity_parameters(**diversity_params)
-            self.logger.info(f"Updated diversity parameters: {diversity_params}")
+            self.logger.info("Updated diversity parameters: %s", diversity_params)
     
     def get_ranking_config(self) -> Dict[str, Any]:
         """
@@ -4,18 +4,105 @@
 
 import time
 import json
-from typing import List, Tuple, Dict, Any, Optional
+import asyncio
+import logging
+import numpy as np
+from functools import lru_cache
+from typing import List, Tuple, Dict, Any, Optional, FrozenSet
 from backend.ranking.base_ranker import BaseRanker
-from backend.cache.feature_store import FeatureStore
+from backend.cache.feature_store import FeatureStore, get_feature_store
 from backend.config import settings
 
 
+@lru_cache(maxsize=100_000)
+def _parse_genres_json(genres_json: str) -> FrozenSet[str]:
+    """解析 JSON 编码的类型列表（结果缓存，元数据中的 genres 字符串基本不变）"""
+    try:
+        genres = json.loads(genres_json)
+    except (ValueError, TypeError):
+        return frozenset()
+    return frozenset(genres) if isinstance(genres, list) else frozenset()
+
+
+def _parse_genres(genres: Any) -> FrozenSet[str]:
+    """
+    将元数据中的 genres 字段统一为 frozenset
+    
+    Args:
+        genres: JSON 字符串或类型列表
+        
+    Returns:
+        类型集合
+    """
+    if isinstance(genres, str):
+        return _parse_genres_json(genres)
+    if isinstance(genres, (list, tuple, set, frozenset)):
+        return frozenset(genres)
+    return frozenset()
+
+
+@lru_cache(maxsize=10_000)
+def _parse_release_year(release_date: Any) -> Optional[int]:
+    """从 "YYYY-MM-DD" 格式的发布日期中解析年份，无法解析时返回 None"""
+    if not isinstance(release_date, str):
+        return None
+    year_part = release_date.split("-")[0]
+    return int(year_part) if year_part.isdigit() else None
+
+
+# 类型 -> 比特位，首次出现时分配（仅在进程内有效）
+GENRE_TO_BIT: Dict[str, int] = {}
+
+# int.bit_count 需要 Python 3.10+
+_popcount = getattr(int, "bit_count", None) or (lambda x: bin(x).count("1"))
+
+
+def _mask_of(genres) -> int:
+    mask = 0
+    for genre in genres:
+        bit = GENRE_TO_BIT.get(genre)
+        if bit is None:
+            bit = GENRE_TO_BIT.setdefault(genre, len(GENRE_TO_BIT))
+        mask |= 1 << bit
+    return mask
+
+
+@lru_cache(maxsize=100_000)
+def _genre_mask_json(genres_json: str) -> int:
+    return _mask_of(_parse_genres_json(genres_json))
+
+
+@lru_cache(maxsize=100_000)
+def _genre_mask_tuple(genres: Tuple[str, ...]) -> int:
+    return _mask_of(genres)
+
+
+def _genre_mask(genres: Any) -> int:
+    """
+    将 genres 字段编码为位掩码，类型交集/并集变为整数按位运算
+    
+    Args:
+        genres: JSON 字符串或类型列表
+        
+    Returns:
+        类型位掩码
+    """
+    if isinstance(genres, list):
+        return _genre_mask_tuple(tuple(genres))
+    if isinstance(genres, str):
+        # 兼容以 JSON 字符串存储 genres 的旧缓存
+        return _genre_mask_json(genres)
+    if isinstance(genres, (tuple, set, frozenset)):
+        return _mask_of(genres)
+    return 0
+
+
 class RuleBasedRanker(BaseRanker):
     """基于规则的排序器"""
     
-    def __init__(self):
+    def __init__(self, feature_store: Optional[FeatureStore] = None):
         super().__init__("rule_based")
-        self.feature_store = FeatureStore()
+        self.feature_store = feature_store or get_feature_store()
         
         # 排序权重配置
         self.weights = {
@@ -26,6 +113,10 @@ class RuleBasedRanker(BaseRanker):
         
         # 时间衰减参数
         self.time_decay_factor = 0.95
+        self.min_time_decay = 0.7
+        self.current_year = 2023  # 可以改为动态获取当前年份
+        self._decay_table: Dict[int, float] = {}
+        self._build_decay_table()
         
         # 多样性控制参数
         self.diversity_penalty = 0.1
@@ -34,6 +125,8 @@ class RuleBasedRanker(BaseRanker):
         self, 
         candidates: List[Tuple[int, float]], 
         user_id: int,
+        weights: Optional[Dict[str, float]] = None,
+        metadata_map: Optional[Dict[int, Dict[str, Any]]] = None,
         **kwargs
     ) -> List[Tuple[int, float]]:
         """
@@ -42,71 +135,122 @@ class RuleBasedRanker(BaseRanker):
         排序公式：
         综合分数 = 召回分数 * 0.5 + 类型匹配度 * 0.3 + 评分加权 * 0.2
                  * 时间衰减因子 * 多样性惩罚因子
+        
+        weights 指定时只作用于本次调用，不修改 self.weights；
+        metadata_map 为调用方预取的游戏元数据，未提供时在此批量获取
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             if not candidates:
                 return candidates
             
-            # 获取用户偏好信息
-            user_preferences = await self._get_user_preferences(user_id)
+            if metadata_map is None:
+                # 并发获取用户偏好与所有候选的游戏元数据（一次批量请求）
+                user_preferences, metadata_map = await asyncio.gather(
+                    self._get_user_preferences(user_id),
+                    self.feature_store.get_batch_game_metadata(
+                        [item_id for item_id, _ in candidates]
+                    )
+                )
+            else:
+                user_preferences = await self._get_user_preferences(user_id)
             
-            # 计算每个候选的最终分数
-            scored_candidates = []
+            # 用户偏好类型掩码每次请求只计算一次
+            user_genre_mask = _genre_mask(user_preferences.get("favorite_genres"))
             
-            for item_id, recall_score in candidates:
-                # 获取游戏元数据
-                game_metadata = await self.feature_store.get_game_metadata(item_id)
-                
+            # 单次遍历收集各分数分量，再统一做向量化加权
+            num_candidates = len(candidates)
+            recall_vec = np.empty(num_candidates, dtype=np.float64)
+            genre_vec = np.zeros(num_candidates, dtype=np.float64)
+            rating_vec = np.zeros(num_candidates, dtype=np.float64)
+            decay_vec = np.ones(num_candidates, dtype=np.float64)
+            has_metadata = np.zeros(num_candidates, dtype=bool)
+            
+            for i, (item_id, recall_score) in enumerate(candidates):
+                recall_vec[i] = recall_score
+                game_metadata = metadata_map.get(item_id)
                 if not game_metadata:
-                    # 没有元数据，只使用召回分数
-                    final_score = recall_score
-                else:
-                    # 计算各个分数组件
-                    genre_score = await self._calculate_genre_match_score(
-                        game_metadata, user_preferences
-                    )
-                    rating_score = self._calculate_rating_score(game_metadata)
-                    
-                    # 计算综合分数
-                    final_score = (
-                        recall_score * self.weights["recall_score"] +
-                        genre_score * self.weights["genre_match"] +
-                        rating_score * self.weights["rating_boost"]
-                    )
+                    continue
                 
-                # 应用时间衰减
-                final_score = self._apply_time_decay(final_score, game_metadata)
-                
-                scored_candidates.append((item_id, final_score))
-            
-            # 按分数排序
-            scored_candidates.sort(key=lambda x: x[1], reverse=True)
+                has_metadata[i] = True
+                genre_vec[i] = self._calculate_genre_match_score(game_metadata, user_genre_mask)
+                rating_vec[i] = self._calculate_rating_score(game_metadata)
+                decay_vec[i] = self._time_decay_factor(game_metadata)
             
-            # 应用多样性惩罚
-            final_candidates = self._calculate_diversity_penalty(
-                scored_candidates, self.diversity_penalty
+            # 综合分数；没有元数据的候选只使用召回分数
+            weights = weights or self.weights
+            final_vec = np.where(
+                has_metadata,
+                recall_vec * weights["recall_score"] +
+                genre_vec * weights["genre_match"] +
+                rating_vec * weights["rating_boost"],
+                recall_vec
             )
             
-            # 重新排序
-            final_candidates.sort(key=lambda x: x[1], reverse=True)
+            # 应用时间衰减
+            final_vec *= decay_vec
+            
+            # 按分数排序（稳定排序，同分保持召回顺序）
+            order = np.argsort(-final_vec, kind="stable")
+            sorted_scores = final_vec[order]
+            
+            # 应用多样性惩罚：按排序位置线性衰减（同 _calculate_diversity_penalty）
+            sorted_scores *= 1.0 - self.diversity_penalty * np.arange(num_candidates) / num_candidates
+            
+            # 非负分数乘以非增的惩罚系数后仍保持降序，只有出现负分时才需要重新排序
+            if not (0.0 <= self.diversity_penalty <= 1.0) or sorted_scores[-1] < 0:
+                reorder = np.argsort(-sorted_scores, kind="stable")
+                order = order[reorder]
+                sorted_scores = sorted_scores[reorder]
+            
+            final_candidates = [
+                (candidates[i][0], score)
+                for i, score in zip(order.tolist(), sorted_scores.tolist())
+            ]
             
             # 记录统计信息
-            elapsed_time = time.time() - start_time
-            self.log_ranking_stats(
-                user_id, len(candidates), len(final_candidates), elapsed_time
-            )
+            if self.logger.isEnabledFor(logging.INFO):
+                elapsed_time = time.perf_counter() - start_time
+                self.log_ranking_stats(
+                    user_id, len(candidates), len(final_candidates), elapsed_time
+                )
             
             return final_candidates
             
         except Exception as e:
-            self.logger.error(f"Rule-based ranking failed for user {user_id}: {e}")
+            self.logger.error("Rule-based ranking failed for user %s: %s", user_id, e)
             return candidates  # 返回原始候选集
     
     async def _get_user_preferences(self, user_id: int) -> Dict[str, Any]:
         """
-        获取用户偏好信息
+        获取用户偏好信息（优先读取缓存，未命中时基于行为序列计算并回写）
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            用户偏好字典
+        """
+        try:
+            cached_preferences = await self.feature_store.get_cached_user_preferences(user_id)
+            if cached_preferences is not None:
+                return cached_preferences
+        except Exception as e:
+            self.logger.warning(f"Failed to read cached preferences for user {user_id}: {e}")
+        
+        user_preferences = await self._compute_user_preferences(user_id)
+        
+        try:
+            await self.feature_store.cache_user_preferences(user_id, user_preferences)
+        except Exception as e:
+            self.logger.warning(f"Failed to cache preferences for user {user_id}: {e}")
+        
+        return user_preferences
+    
+    async def _compute_user_preferences(self, user_id: int) -> Dict[str, Any]:
+        """
+        基于用户行为序列计算偏好信息
         
         Args:
             user_id: 用户ID
@@ -126,18 +270,13 @@ class RuleBasedRanker(BaseRanker):
             total_rating = 0.0
             rating_count = 0
             
+            metadata_map = await self.feature_store.get_batch_game_metadata(user_sequence)
+            
             for game_id in user_sequence:
-                metadata = await self.feature_store.get_game_metadata(game_id)
+                metadata = metadata_map.get(game_id)
                 if metadata:
                     # 统计类型偏好
-                    genres = metadata.get("genres", [])
-                    if isinstance(genres, str):
-                        try:
-                            genres = json.loads(genres)
-                        except:
-                            genres = []
-                    
-                    for genre in genres:
+                    for genre in _parse_genres(metadata.get("genres")):
                         genre_counts[genre] = genre_counts.get(genre, 0) + 1
                     
                     # 统计评分偏好
@@ -166,37 +305,32 @@ class RuleBasedRanker(BaseRanker):
             self.logger.error(f"Failed to get user preferences for user {user_id}: {e}")
             return {"favorite_genres": [], "avg_rating": 0.0}
     
-    async def _calculate_genre_match_score(
+    def _calculate_genre_match_score(
         self, 
         game_metadata: Dict[str, Any], 
-        user_preferences: Dict[str, Any]
+        user_genre_mask: int
     ) -> float:
         """
-        计算类型匹配度分数
+        计算类型匹配度分数（Jaccard，基于类型位掩码）
         
         Args:
             game_metadata: 游戏元数据
-            user_preferences: 用户偏好
+            user_genre_mask: 用户偏好类型位掩码
             
         Returns:
             类型匹配度分数 (0-1)
         """
         try:
-            game_genres = game_metadata.get("genres", [])
-            if isinstance(game_genres, str):
-                try:
-                    game_genres = json.loads(game_genres)
-                except:
-                    game_genres = []
-            
-            favorite_genres = user_preferences.get("favorite_genres", [])
+            game_genre_mask = _genre_mask(game_metadata.get("genres"))
             
-            if not game_genres or not favorite_genres:
+            if not game_genre_mask or not user_genre_mask:
                 return 0.0
             
             # 计算交集比例
-            genre_intersection = set(game_genres) & set(favorite_genres)
-            match_score = len(genre_intersection) / len(set(game_genres) | set(favorite_genres))
+            match_score = (
+                _popcount(game_genre_mask & user_genre_mask) /
+                _popcount(game_genre_mask | user_genre_mask)
+            )
             
             return min(match_score, 1.0)
             
@@ -228,6 +362,46 @@ class RuleBasedRanker(BaseRanker):
             self.logger.error(f"Failed to calculate rating score: {e}")
             return 0.5
     
+    def _year_decay(self, release_year: int) -> float:
+        """每年衰减5%，但不低于 min_time_decay"""
+        year_diff = self.current_year - release_year
+        return max(self.time_decay_factor ** year_diff, self.min_time_decay)
+    
+    def _build_decay_table(self) -> None:
+        """
+        预计算近 100 年按发布年份的衰减系数表（表外年份在查表时按需计算）
+        """
+        self._decay_table = {
+            year: self._year_decay(year)
+            for year in range(self.current_year - 100, self.current_year + 1)
+        }
+    
+    def _time_decay_factor(self, game_metadata: Optional[Dict[str, Any]]) -> float:
+        """
+        获取游戏的时间衰减系数
+        
+        Args:
+            game_metadata: 游戏元数据
+            
+        Returns:
+            衰减系数（无法确定发布年份时为 1.0）
+        """
+        if not game_metadata:
+            return 1.0
+        
+        release_year = game_metadata.get("release_year")
+        if release_year is None:
+            # 兼容未写入 release_year 的旧缓存
+            release_year = _parse_release_year(game_metadata.get("release_date"))
+            if release_year is None:
+                return 1.0
+        
+        decay_factor = self._decay_table.get(release_year)
+        if decay_factor is None:
+            decay_factor = self._year_decay(release_year)
+        
+        return decay_factor
+    
     def _apply_time_decay(
         self, 
         score: float, 
@@ -243,33 +417,7 @@ class RuleBasedRanker(BaseRanker):
         Returns:
             应用时间衰减后的分数
         """
-        try:
-            if not game_metadata:
-                return score
-            
-            release_date = game_metadata.get("release_date")
-            if not release_date:
-                return score
-            
-            # 简化处理：根据发布年份应用衰减
-            # 实际应该根据具体的时间差计算
-            try:
-                release_year = int(release_date.split("-")[0])
-                current_year = 2023  # 可以改为动态获取当前年份
-                
-                year_diff = current_year - release_year
-                
-                # 每年衰减5%，但不低于0.7
-                decay_factor = max(self.time_decay_factor ** year_diff, 0.7)
-                
-                return score * decay_factor
-                
-            except (ValueError, IndexError):
-                return score
-            
-        except Exception as e:
-            self.logger.error(f"Failed to apply time decay: {e}")
-            return score
+        return score * self._time_decay_factor(game_metadata)
     
     def update_weights(self, new_weights: Dict[str, float]) -> None:
         """
@@ -295,6 +443,7 @@ class RuleBasedRanker(BaseRanker):
         """
         if time_decay_factor is not None:
             self.time_decay_factor = time_decay_factor
+            self._build_decay_table()
         
         if diversity_penalty is not None:
             self.diversity_penalty = diversity_penalty
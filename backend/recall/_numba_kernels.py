@@ -0,0 +1,134 @@
+"""
+召回打分内核
+
+安装了 numba 时使用 JIT 编译的并行内核（按行 prange 计算内积，堆选择 top-k），
+否则回退到等价的 NumPy 实现。
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba 为可选依赖
+    NUMBA_AVAILABLE = False
+
+
+def _dot_scores_numpy(mat: np.ndarray, query: np.ndarray) -> np.ndarray:
+    return mat @ query
+
+
+def _topk_indices_numpy(scores: np.ndarray, k: int) -> np.ndarray:
+    if k < len(scores):
+        indices = np.argpartition(-scores, k - 1)[:k]
+    else:
+        indices = np.arange(len(scores))
+    return indices[np.argsort(-scores[indices], kind="stable")]
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _dot_scores_numba(mat, query):
+        n, dim = mat.shape
+        out = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            acc = np.float32(0.0)
+            for j in range(dim):
+                acc += mat[i, j] * query[j]
+            out[i] = acc
+        return out
+
+    @njit(cache=True)
+    def _topk_indices_numba(scores, k):
+        n = scores.shape[0]
+        k = min(k, n)
+        # 大小为 k 的最小堆，堆顶为当前第 k 大的分数
+        heap_scores = np.empty(k, dtype=scores.dtype)
+        heap_indices = np.empty(k, dtype=np.int64)
+        size = 0
+        for i in range(n):
+            s = scores[i]
+            if size < k:
+                pos = size
+                size += 1
+                while pos > 0:
+                    parent = (pos - 1) // 2
+                    if heap_scores[parent] <= s:
+                        break
+                    heap_scores[pos] = heap_scores[parent]
+                    heap_indices[pos] = heap_indices[parent]
+                    pos = parent
+                heap_scores[pos] = s
+                heap_indices[pos] = i
+            elif s > heap_scores[0]:
+                pos = 0
+                while True:
+                    child = 2 * pos + 1
+                    if child >= k:
+                        break
+                    if child + 1 < k and heap_scores[child + 1] < heap_scores[child]:
+                        child += 1
+                    if heap_scores[child] >= s:
+                        break
+                    heap_scores[pos] = heap_scores[child]
+                    heap_indices[pos] = heap_indices[child]
+                    pos = child
+                heap_scores[pos] = s
+                heap_indices[pos] = i
+        order = np.argsort(-heap_scores[:size])
+        return heap_indices[:size][order]
+
+
+def dot_scores(mat: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    计算矩阵每一行与查询向量的内积
+
+    Args:
+        mat: (N, dim) float32 矩阵
+        query: (dim,) float32 向量
+
+    Returns:
+        (N,) float32 分数
+    """
+    if NUMBA_AVAILABLE:
+        return _dot_scores_numba(
+            np.ascontiguousarray(mat, dtype=np.float32),
+            np.ascontiguousarray(query, dtype=np.float32)
+        )
+    return _dot_scores_numpy(mat, query)
+
+
+def topk_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    选出分数最高的 k 个位置
+
+    Args:
+        scores: (N,) 分数数组
+        k: 返回数量
+
+    Returns:
+        按分数降序排列的下标数组（长度为 min(k, N)）
+    """
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if NUMBA_AVAILABLE:
+        return _topk_indices_numba(np.ascontiguousarray(scores), k)
+    return _topk_indices_numpy(scores, k)
+
+
+def topk_cosine(mat: np.ndarray, query: np.ndarray, k: int):
+    """
+    在已归一化的矩阵上计算余弦相似度并返回 top-k
+
+    Args:
+        mat: (N, dim) 行已 L2 归一化的 float32 矩阵
+        query: (dim,) 已 L2 归一化的 float32 查询向量
+        k: 返回数量
+
+    Returns:
+        (indices, scores)：按相似度降序排列的行号及其分数
+    """
+    scores = dot_scores(mat, query)
+    indices = topk_indices(scores, k)
+    return indices, scores[indices]
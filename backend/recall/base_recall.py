@@ -2,6 +2,7 @@
 召回基类
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import List, Tuple, Optional
 import logging
@@ -40,29 +41,32 @@ class BaseRecall(ABC):
         self,
         user_ids: List[int],
         top_k: int = 500,
+        concurrency: int = 32,
         **kwargs
     ) -> List[List[Tuple[int, float]]]:
         """
-        批量召回
+        批量召回（并发执行，结果顺序与 user_ids 一致）
         
         Args:
             user_ids: 用户ID列表
             top_k: 召回数量
+            concurrency: 最大并发召回数，避免压垮特征存储
             **kwargs: 其他参数
             
         Returns:
             每个用户的候选集列表
         """
-        results = []
-        for user_id in user_ids:
-            try:
-                candidates = await self.recall(user_id, top_k, **kwargs)
-                results.append(candidates)
-            except Exception as e:
-                self.logger.error(f"Failed to recall for user {user_id}: {e}")
-                results.append([])
+        semaphore = asyncio.Semaphore(max(1, concurrency))
         
-        return results
+        async def _recall_one(user_id: int) -> List[Tuple[int, float]]:
+            async with semaphore:
+                try:
+                    return await self.recall(user_id, top_k, **kwargs)
+                except Exception as e:
+                    self.logger.error(f"Failed to recall for user {user_id}: {e}")
+                    return []
+        
+        return list(await asyncio.gather(*(_recall_one(user_id) for user_id in user_ids)))
     
     def get_name(self) -> str:
         """获取召回器名称"""
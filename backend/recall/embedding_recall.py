@@ -7,30 +7,58 @@
 """
 
 import time
+import asyncio
 import numpy as np
 from typing import List, Tuple, Optional, Dict
 from backend.recall.base_recall import BaseRecall
-from backend.cache.feature_store import FeatureStore
+from backend.cache.feature_store import FeatureStore, INT8_SCALE, get_feature_store
 from backend.cache.faiss_index import get_faiss_index_manager
+from backend.recall._numba_kernels import dot_scores, topk_indices
 from backend.config import settings
 
 
+def _match_rows(ids: np.ndarray, item_ids) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将物品ID映射为物品矩阵中的行号
+    
+    Args:
+        ids: 升序排列的物品ID数组
+        item_ids: 待查找的物品ID列表
+        
+    Returns:
+        (found_ids, positions)：存在于矩阵中的物品ID及其行号
+    """
+    item_ids = np.asarray(item_ids, dtype=np.int64)
+    if len(ids) == 0 or len(item_ids) == 0:
+        return item_ids[:0], np.empty(0, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(ids, item_ids), len(ids) - 1)
+    found = ids[positions] == item_ids
+    return item_ids[found], positions[found]
+
+
 class EmbeddingRecall(BaseRecall):
     """基于嵌入的召回器（使用 FAISS 进行高效向量搜索，支持动态向量融合）"""
     
-    def __init__(self, model_name: str = "lightgcn", use_faiss: bool = True, index_type: str = "IVF"):
+    def __init__(
+        self,
+        model_name: str = "lightgcn",
+        use_faiss: bool = True,
+        index_type: Optional[str] = None,
+        feature_store: Optional[FeatureStore] = None
+    ):
         """
         初始化嵌入召回器
         
         Args:
             model_name: 模型名称
             use_faiss: 是否使用 FAISS（默认 True）
-            index_type: FAISS 索引类型 (IVF, HNSW, Flat)
+            index_type: FAISS 索引类型 (IVF, IVFPQ, SQ8, IVFSQ8, HNSW, Flat 或 index_factory 描述串)，默认使用 settings.FAISS_INDEX_TYPE
+            feature_store: 特征存储（默认使用共享实例）
         """
         super().__init__(f"embedding_{model_name}")
         self.model_name = model_name
         self.use_faiss = use_faiss
-        self.feature_store = FeatureStore()
+        self.feature_store = feature_store or get_feature_store()
         
         # 初始化 FAISS 索引管理器
         if self.use_faiss:
@@ -45,6 +73,11 @@ class EmbeddingRecall(BaseRecall):
         if not self.use_faiss or self._index_initialized:
             return True
         
+        # 索引管理器为进程内共享实例，启动时已在后台构建过索引则直接复用
+        if self.faiss_manager.index is not None:
+            self._index_initialized = True
+            return True
+        
         try:
             # 尝试构建索引
             success = await self.faiss_manager.build_index(force_rebuild=False)
@@ -86,21 +119,36 @@ class EmbeddingRecall(BaseRecall):
         """
         start_time = time.time()
         used_dynamic = False
+        user_sequence = None
         
         try:
-            # 获取用户嵌入（根据配置决定是否使用动态融合）
-            if use_dynamic_fusion and settings.DYNAMIC_FUSION_ENABLED:
+            dynamic_fusion = use_dynamic_fusion and settings.DYNAMIC_FUSION_ENABLED
+            
+            # 用户交互序列只读取一次，供动态融合和已玩游戏排除共用；
+            # 不需要排除已玩游戏时只用 LLEN 判断是否达到融合阈值
+            sequence_length = 0
+            if exclude_played:
+                user_sequence = await self.feature_store.get_user_sequence(user_id)
+                sequence_length = len(user_sequence)
+            elif dynamic_fusion:
+                sequence_length = await self.feature_store.get_user_sequence_length(user_id)
+            
+            # 交互次数达到阈值才做动态融合，否则直接读取原始用户向量
+            used_dynamic = dynamic_fusion and (
+                min(sequence_length, settings.DYNAMIC_FUSION_MAX_SEQUENCE)
+                >= settings.DYNAMIC_FUSION_MIN_INTERACTIONS
+            )
+            
+            if used_dynamic:
                 user_embedding = await self.feature_store.get_dynamic_user_embedding(
                     user_id,
                     self.model_name,
                     min_interactions=settings.DYNAMIC_FUSION_MIN_INTERACTIONS,
                     fusion_weight=settings.DYNAMIC_FUSION_WEIGHT,
                     max_sequence_len=settings.DYNAMIC_FUSION_MAX_SEQUENCE,
-                    use_time_decay=settings.DYNAMIC_FUSION_TIME_DECAY
+                    use_time_decay=settings.DYNAMIC_FUSION_TIME_DECAY,
+                    user_sequence=user_sequence
                 )
-                # 检查是否实际使用了动态融合
-                user_sequence = await self.feature_store.get_user_sequence(user_id, 1)
-                used_dynamic = len(user_sequence) >= settings.DYNAMIC_FUSION_MIN_INTERACTIONS
             else:
                 user_embedding = await self.feature_store.get_user_embedding(
                     user_id, self.model_name
@@ -110,28 +158,31 @@ class EmbeddingRecall(BaseRecall):
                 self.logger.warning(f"No embedding found for user {user_id}")
                 return []
             
+            if settings.DEBUG:
+                # FeatureStore 统一返回 C 连续的 float32 向量，下游计算不再做类型转换
+                assert user_embedding.dtype == np.float32 and user_embedding.flags["C_CONTIGUOUS"]
+            
             # 使用 FAISS 进行搜索
             if self.use_faiss:
                 # 确保索引已初始化
                 if not await self._ensure_index_initialized():
                     # 如果初始化失败，回退到原始方法
-                    return await self._recall_legacy(user_id, top_k, exclude_played, **kwargs)
-                
-                # 获取用户已玩游戏（用于排除）
-                exclude_ids = None
-                if exclude_played:
-                    exclude_ids = await self.feature_store.get_user_sequence(user_id)
+                    return await self._recall_legacy(
+                        user_id, top_k, exclude_played, played_games=user_sequence, **kwargs
+                    )
                 
-                # 使用 FAISS 搜索
-                candidates = self.faiss_manager.search(
+                # 使用 FAISS 搜索（并发请求合并为一次批量搜索），排除已玩游戏
+                candidates = await self.faiss_manager.search_async(
                     user_embedding,
                     top_k=top_k,
-                    exclude_ids=exclude_ids
+                    exclude_ids=user_sequence if exclude_played else None
                 )
                 
             else:
                 # 使用原始方法（回退方案）
-                candidates = await self._recall_legacy(user_id, top_k, exclude_played, **kwargs)
+                candidates = await self._recall_legacy(
+                    user_id, top_k, exclude_played, played_games=user_sequence, **kwargs
+                )
             
             # 记录统计信息
             elapsed_time = time.time() - start_time
@@ -148,7 +199,9 @@ class EmbeddingRecall(BaseRecall):
             # 如果 FAISS 搜索失败，尝试回退到原始方法
             if self.use_faiss:
                 self.logger.warning("Falling back to legacy recall method")
-                return await self._recall_legacy(user_id, top_k, exclude_played, **kwargs)
+                return await self._recall_legacy(
+                    user_id, top_k, exclude_played, played_games=user_sequence, **kwargs
+                )
             return []
     
     async def _recall_legacy(
@@ -156,6 +209,7 @@ class EmbeddingRecall(BaseRecall):
         user_id: int,
         top_k: int,
         exclude_played: bool = True,
+        played_games: Optional[List[int]] = None,
         **kwargs
     ) -> List[Tuple[int, float]]:
         """
@@ -165,6 +219,7 @@ class EmbeddingRecall(BaseRecall):
             user_id: 用户ID
             top_k: 召回数量
             exclude_played: 是否排除已玩游戏
+            played_games: 调用方已获取的用户交互序列（None 时自行读取）
             
         Returns:
             候选集
@@ -181,43 +236,26 @@ class EmbeddingRecall(BaseRecall):
             # 获取候选物品（这里简化处理，实际应该有更智能的候选集生成）
             candidate_items = await self._get_candidate_items(user_id, top_k * 2)
             
-            if not candidate_items:
+            if len(candidate_items) == 0:
                 return []
             
-            # 获取候选物品的嵌入
-            item_embeddings = await self.feature_store.get_batch_item_embeddings(
-                candidate_items, self.model_name
-            )
-            
-            if not item_embeddings:
-                return []
-            
-            # 排除已玩游戏
-            if exclude_played:
-                played_games = set(await self.feature_store.get_user_sequence(user_id))
-                item_embeddings = {
-                    item_id: emb for item_id, emb in item_embeddings.items()
-                    if item_id not in played_games
-                }
-            
-            # 计算相似度分数
-            candidates = []
-            for item_id, item_embedding in item_embeddings.items():
-                # 计算余弦相似度
-                similarity = self._cosine_similarity(user_embedding, item_embedding)
-                candidates.append((item_id, float(similarity)))
+            # 已玩游戏在打分前用布尔掩码排除
+            if not exclude_played:
+                played_games = None
+            elif played_games is None:
+                played_games = await self.feature_store.get_user_sequence(user_id)
             
-            # 按相似度排序
-            candidates.sort(key=lambda x: x[1], reverse=True)
-            
-            # 取前top_k个
-            return candidates[:top_k]
+            # 基于预先归一化的物品矩阵计算余弦相似度
+            # 打分并取前top_k个（已按相似度降序）
+            return await self._score_candidates(
+                user_embedding, candidate_items, top_k=top_k, exclude_ids=played_games
+            )
             
         except Exception as e:
             self.logger.error(f"Legacy recall failed for user {user_id}: {e}")
             return []
     
-    async def _get_candidate_items(self, user_id: int, limit: int) -> List[int]:
+    async def _get_candidate_items(self, user_id: int, limit: int) -> np.ndarray:
         """
         获取候选物品集合
         
@@ -226,11 +264,10 @@ class EmbeddingRecall(BaseRecall):
             limit: 限制数量
             
         Returns:
-            候选物品ID列表
+            候选物品ID数组
         """
-        # 方法1: 从热门游戏中获取候选集
-        popular_games = await self.feature_store.get_popular_games(limit=limit)
-        candidate_items = [game_id for game_id, _ in popular_games]
+        # 方法1: 从热门游戏中获取候选集（数组形式，进程内缓存）
+        candidate_items, _ = await self.feature_store.get_popular_games_arrays(limit=limit)
         
         # 方法2: 可以添加基于用户历史的候选集扩展
         # user_history = await self.feature_store.get_user_sequence(user_id, 10)
@@ -238,27 +275,80 @@ class EmbeddingRecall(BaseRecall):
         
         return candidate_items
     
-    def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
+    async def _score_candidates(
+        self,
+        query_embedding: np.ndarray,
+        candidate_items: List[int],
+        top_k: Optional[int] = None,
+        exclude_ids: Optional[List[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        使用进程内缓存的归一化物品矩阵批量计算候选的余弦相似度
+        
+        Args:
+            query_embedding: 查询向量（用户或物品嵌入）
+            candidate_items: 候选物品ID列表
+            top_k: 若指定，只返回相似度最高的 top_k 个（按相似度降序）
+            exclude_ids: 要排除的物品ID列表
+            
+        Returns:
+            [(item_id, similarity)]，缺少嵌入的候选会被忽略
+        """
+        if len(candidate_items) == 0:
+            return []
+        
+        item_matrix = await self.feature_store.get_item_matrix(self.model_name)
+        if item_matrix is None:
+            return []
+        ids, mat_norm = item_matrix
+        
+        # ID -> 矩阵行号（ids 已升序排列）
+        candidate_ids, positions = _match_rows(ids, candidate_items)
+        
+        if exclude_ids:
+            keep = ~np.isin(candidate_ids, np.asarray(exclude_ids, dtype=np.int64))
+            candidate_ids = candidate_ids[keep]
+            positions = positions[keep]
+        
+        query_norm = np.linalg.norm(query_embedding)
+        if query_norm == 0:
+            scores = np.zeros(len(positions), dtype=np.float32)
+        elif mat_norm.dtype == np.int8:
+            # int8 量化矩阵：查询向量同样量化，int32 累加后还原到余弦相似度
+            query_q = np.round(query_embedding / query_norm * INT8_SCALE).astype(np.int32)
+            scores = (mat_norm[positions].astype(np.int32) @ query_q).astype(np.float32)
+            scores /= INT8_SCALE * INT8_SCALE
+        else:
+            scores = dot_scores(mat_norm[positions], query_embedding / query_norm)
+        
+        if top_k is not None:
+            order = topk_indices(scores, top_k)
+            candidate_ids = candidate_ids[order]
+            scores = scores[order]
+        
+        return list(zip(candidate_ids.tolist(), scores.tolist()))
+    
+    async def _lookup_item_vectors(self, item_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
         """
-        计算余弦相似度
+        从归一化物品矩阵中批量取出物品向量
         
         Args:
-            vec1: 向量1
-            vec2: 向量2
+            item_ids: 物品ID列表
             
         Returns:
-            余弦相似度
+            (found_ids, vectors)：有嵌入的物品ID及其 float32 归一化向量 (n, dim)
         """
-        # 计算向量的模长
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
+        item_matrix = await self.feature_store.get_item_matrix(self.model_name)
+        if item_matrix is None:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        ids, mat_norm = item_matrix
         
-        # 避免除零错误
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
+        found_ids, positions = _match_rows(ids, item_ids)
+        vectors = mat_norm[positions]
+        if vectors.dtype == np.int8:
+            vectors = vectors.astype(np.float32) / INT8_SCALE
         
-        # 计算余弦相似度
-        return np.dot(vec1, vec2) / (norm1 * norm2)
+        return found_ids, vectors
     
     async def recall_similar_items(
         self,
@@ -292,27 +382,16 @@ class EmbeddingRecall(BaseRecall):
                 # 排除目标物品本身
                 result = self.faiss_manager.search(
                     target_embedding,
-                    top_k=top_k + 1,  # 多取一个，然后过滤掉自己
+                    top_k=top_k,
                     exclude_ids=[item_id]
                 )
-                # 确保不超过 top_k
-                result = result[:top_k]
             else:
                 # 使用原始方法
                 candidate_items = await self._get_candidate_items(0, top_k * 2)
-                candidate_items = [cid for cid in candidate_items if cid != item_id]
                 
-                item_embeddings = await self.feature_store.get_batch_item_embeddings(
-                    candidate_items, self.model_name
+                result = await self._score_candidates(
+                    target_embedding, candidate_items, top_k=top_k, exclude_ids=[item_id]
                 )
-                
-                similarities = []
-                for candidate_id, candidate_embedding in item_embeddings.items():
-                    similarity = self._cosine_similarity(target_embedding, candidate_embedding)
-                    similarities.append((candidate_id, float(similarity)))
-                
-                similarities.sort(key=lambda x: x[1], reverse=True)
-                result = similarities[:top_k]
             
             elapsed_time = time.time() - start_time
             self.logger.info(
@@ -353,25 +432,36 @@ class EmbeddingRecall(BaseRecall):
                 self.logger.warning(f"No sequence found for user {user_id}")
                 return []
             
-            # 为序列中的每个物品找相似物品
-            all_candidates = {}
+            # 一次性取出序列物品的向量
+            seq_ids, seq_vectors = await self._lookup_item_vectors(user_sequence)
+            if len(seq_ids) == 0:
+                self.logger.warning(f"No embeddings found for sequence of user {user_id}")
+                return []
             
-            for item_id in user_sequence:
-                similar_items = await self.recall_similar_items(item_id, top_k // len(user_sequence))
-                
-                # 累积相似度分数
-                for similar_id, score in similar_items:
-                    if similar_id not in user_sequence:  # 排除已交互的物品
-                        if similar_id in all_candidates:
-                            all_candidates[similar_id] += score
-                        else:
-                            all_candidates[similar_id] = score
-            
-            # 转换为列表并排序
-            candidates = list(all_candidates.items())
-            candidates.sort(key=lambda x: x[1], reverse=True)
-            
-            return candidates[:top_k]
+            # 构建所有序列物品共享的候选池
+            if self.use_faiss and await self._ensure_index_initialized():
+                # (S, dim) 序列矩阵一次批量 ANN 查询（在线程池中执行），取各序列物品近邻的并集；
+                # 多取序列长度个结果，抵消随后排除的序列内物品
+                _, neighbor_ids = await asyncio.get_running_loop().run_in_executor(
+                    None, self.faiss_manager.search_arrays, seq_vectors, top_k + len(user_sequence)
+                )
+                candidate_pool = np.unique(neighbor_ids[neighbor_ids >= 0])
+            else:
+                candidate_pool = await self._get_candidate_items(user_id, top_k * 2)
+            
+            # 排除已交互的物品后再取向量
+            candidate_pool = candidate_pool[~np.isin(candidate_pool, user_sequence)]
+            cand_ids, cand_vectors = await self._lookup_item_vectors(candidate_pool)
+            if len(cand_ids) == 0:
+                return []
+            
+            # 与所有序列物品的相似度之和 = 与序列向量之和的内积，一次 GEMV 完成聚合
+            # （安装 numba 时走与 _score_candidates 相同的并行打分内核）
+            agg_scores = dot_scores(cand_vectors, seq_vectors.sum(axis=0))
+            
+            order = topk_indices(agg_scores, top_k)
+            
+            return list(zip(cand_ids[order].tolist(), agg_scores[order].tolist()))
             
         except Exception as e:
             self.logger.error(f"Sequence-based recall failed for user {user_id}: {e}")
@@ -3,17 +3,20 @@
 """
 
 import time
-from typing import List, Tuple, Set
+import asyncio
+import numpy as np
+from typing import List, Tuple, Set, Optional
 from backend.recall.base_recall import BaseRecall
-from backend.cache.feature_store import FeatureStore
+from backend.recall._numba_kernels import topk_indices
+from backend.cache.feature_store import FeatureStore, get_feature_store
 
 
 class PopularityRecall(BaseRecall):
     """流行度召回器"""
     
-    def __init__(self):
+    def __init__(self, feature_store: Optional[FeatureStore] = None):
         super().__init__("popularity")
-        self.feature_store = FeatureStore()
+        self.feature_store = feature_store or get_feature_store()
     
     async def recall(
         self, 
@@ -37,28 +40,24 @@ class PopularityRecall(BaseRecall):
         start_time = time.time()
         
         try:
-            # 获取热门游戏列表
-            popular_games = await self.feature_store.get_popular_games(limit=top_k * 2)
+            # 获取热门游戏列表（数组形式，进程内缓存）
+            popular_ids, popular_scores = await self.feature_store.get_popular_games_arrays(limit=top_k * 2)
             
-            if not popular_games:
+            if len(popular_ids) == 0:
                 self.logger.warning("No popular games found in cache")
                 return []
             
             # 如果需要排除已玩游戏
             if exclude_played:
                 # 获取用户已玩游戏（这里简化处理，实际应该从数据库获取）
-                played_games = set(await self.feature_store.get_user_sequence(user_id))
+                played_games = await self.feature_store.get_user_sequence(user_id)
                 
                 # 过滤已玩游戏
-                filtered_games = [
-                    (game_id, score) for game_id, score in popular_games
-                    if game_id not in played_games
-                ]
-            else:
-                filtered_games = popular_games
+                keep = ~np.isin(popular_ids, np.asarray(played_games, dtype=np.int64))
+                popular_ids, popular_scores = popular_ids[keep], popular_scores[keep]
             
             # 取前top_k个
-            candidates = filtered_games[:top_k]
+            candidates = list(zip(popular_ids[:top_k].tolist(), popular_scores[:top_k].tolist()))
             
             # 记录统计信息
             elapsed_time = time.time() - start_time
@@ -90,44 +89,47 @@ class PopularityRecall(BaseRecall):
         start_time = time.time()
         
         try:
-            candidates = []
+            if not preferred_genres:
+                return []
             
-            # 为每个偏好类型获取热门游戏
-            for genre in preferred_genres:
-                genre_games = await self.feature_store.get_games_by_genre(genre)
-                
+            # 热门游戏只获取一次（数组形式），供各类型共用
+            popular_ids, popular_scores = await self.feature_store.get_popular_games_arrays(limit=1000)
+            if len(popular_ids) == 0:
+                return []
+            
+            # 并发获取各偏好类型的游戏列表
+            genre_game_lists = await asyncio.gather(*[
+                self.feature_store.get_games_by_genre(genre) for genre in preferred_genres
+            ])
+            per_genre = top_k // len(preferred_genres)
+            
+            id_chunks = []
+            score_chunks = []
+            for genre_games in genre_game_lists:
                 if not genre_games:
                     continue
                 
-                # 获取这些游戏的流行度分数
-                popular_games = await self.feature_store.get_popular_games(limit=1000)
-                popular_dict = dict(popular_games)
-                
-                # 筛选该类型的热门游戏
-                genre_candidates = [
-                    (game_id, popular_dict.get(game_id, 0.0))
-                    for game_id in genre_games
-                    if game_id in popular_dict
-                ]
-                
-                # 按分数排序
-                genre_candidates.sort(key=lambda x: x[1], reverse=True)
+                # 筛选该类型的热门游戏：榜单已按分数降序排列，掩码筛选保持顺序，
+                # 前 per_genre 个即为该类型分数最高的游戏，无需再排序
+                mask = np.isin(popular_ids, np.asarray(genre_games, dtype=np.int64))
                 
                 # 添加到候选集
-                candidates.extend(genre_candidates[:top_k // len(preferred_genres)])
+                id_chunks.append(popular_ids[mask][:per_genre])
+                score_chunks.append(popular_scores[mask][:per_genre])
             
-            # 去重并按分数排序
-            unique_candidates = {}
-            for game_id, score in candidates:
-                if game_id not in unique_candidates or unique_candidates[game_id] < score:
-                    unique_candidates[game_id] = score
+            if not id_chunks:
+                return []
             
-            # 转换为列表并排序
-            final_candidates = list(unique_candidates.items())
-            final_candidates.sort(key=lambda x: x[1], reverse=True)
+            # 去重：同一游戏出现在多个类型中时取最高分
+            all_ids = np.concatenate(id_chunks)
+            all_scores = np.concatenate(score_chunks)
+            unique_ids, inverse = np.unique(all_ids, return_inverse=True)
+            unique_scores = np.full(len(unique_ids), -np.inf)
+            np.maximum.at(unique_scores, inverse, all_scores)
             
-            # 取前top_k个
-            result = final_candidates[:top_k]
+            # 按分数降序取前top_k个
+            order = topk_indices(unique_scores, top_k)
+            result = list(zip(unique_ids[order].tolist(), unique_scores[order].tolist()))
             
             # 记录统计信息
             elapsed_time = time.time() - start_time
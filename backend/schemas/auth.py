@@ -2,10 +2,25 @@
 认证相关的Pydantic模式
 """
 
+import re
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, EmailStr, field_validator
 
+# 用户名允许的字符：字母（含 Unicode 字母）、数字、下划线和连字符
+_USERNAME_CHARS_RE = re.compile(r'[\w-]+')
+
+
+def _check_username(v: str) -> str:
+    """校验用户名长度与字符集（单次正则匹配，不产生中间字符串）"""
+    if len(v) < 3:
+        raise ValueError('Username must be at least 3 characters long')
+    if len(v) > 50:
+        raise ValueError('Username must be less than 50 characters')
+    if not _USERNAME_CHARS_RE.fullmatch(v):
+        raise ValueError('Username can only contain letters, numbers, underscores and hyphens')
+    return v
+
 
 class UserCreate(BaseModel):
     """用户注册请求模式"""
@@ -16,13 +31,7 @@ class UserCreate(BaseModel):
     @field_validator('username')
     @classmethod
     def validate_username(cls, v):
-        if len(v) < 3:
-            raise ValueError('Username must be at least 3 characters long')
-        if len(v) > 50:
-            raise ValueError('Username must be less than 50 characters')
-        if not v.replace('_', '').replace('-', '').isalnum():
-            raise ValueError('Username can only contain letters, numbers, underscores and hyphens')
-        return v
+        return _check_username(v)
     
     @field_validator('password')
     @classmethod
@@ -73,10 +82,5 @@ class UserUpdate(BaseModel):
     @classmethod
     def validate_username(cls, v):
         if v is not None:
-            if len(v) < 3:
-                raise ValueError('Username must be at least 3 characters long')
-            if len(v) > 50:
-                raise ValueError('Username must be less than 50 characters')
-            if not v.replace('_', '').replace('-', '').isalnum():
-                raise ValueError('Username can only contain letters, numbers, underscores and hyphens')
+            _check_username(v)
         return v
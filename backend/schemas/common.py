@@ -2,12 +2,25 @@
 通用的 Pydantic 模型
 """
 
+import sys
 from typing import Any, Optional, Generic, TypeVar
 from pydantic import BaseModel, Field
 
 DataT = TypeVar('DataT')
 
 
+def intern_strings(value: Any) -> Any:
+    """
+    驻留字符串列表中的每个元素（用于 genres/tags 等取值高度重复的字段）
+    
+    相同的品类、标签在进程内只保留一个字符串对象，大量游戏缓存在内存时显著节省空间，
+    比较时也可先走身份判断。非列表输入原样返回，交给字段校验处理。
+    """
+    if isinstance(value, (list, tuple)):
+        return [sys.intern(item) if type(item) is str else item for item in value]
+    return value
+
+
 class ResponseModel(BaseModel, Generic[DataT]):
     """
     统一的 API 响应模型
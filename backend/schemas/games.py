@@ -2,9 +2,10 @@
 游戏相关的 Pydantic 模型
 """
 
-from typing import List, Optional
-from pydantic import BaseModel, Field
-from datetime import date
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
+
+from backend.schemas.common import PaginationModel, intern_strings
 
 
 class GameBase(BaseModel):
@@ -18,6 +19,8 @@ class GameBase(BaseModel):
     developer: Optional[str] = Field(None, description="开发商")
     publisher: Optional[str] = Field(None, description="发行商")
     release_date: Optional[str] = Field(None, description="发布日期")
+    
+    _intern_genres_tags = field_validator('genres', 'tags', mode='before')(intern_strings)
 
 
 class GameListItem(GameBase):
@@ -25,10 +28,16 @@ class GameListItem(GameBase):
     specs: List[str] = Field(default_factory=list, description="游戏特性")
     early_access: bool = Field(False, description="是否抢先体验")
     
+    _intern_specs = field_validator('specs', mode='before')(intern_strings)
+    
     class Config:
         from_attributes = True
 
 
+# 游戏列表批量校验器：整页数据一次性校验，避免逐条构造模型
+GameListItemList = TypeAdapter(List[GameListItem])
+
+
 class GameDetail(GameBase):
     """游戏详情模型"""
     description: Optional[str] = Field(None, description="详细描述")
@@ -40,15 +49,27 @@ class GameDetail(GameBase):
     reviews_url: Optional[str] = Field(None, description="评测链接")
     early_access: bool = Field(False, description="是否抢先体验")
     
+    _intern_specs_languages = field_validator('specs', 'languages', mode='before')(intern_strings)
+    
     class Config:
         from_attributes = True
 
 
+class GameListFilters(BaseModel):
+    """游戏列表已应用的筛选条件"""
+    genre: Optional[str] = Field(None, description="品类筛选")
+    tags: Optional[str] = Field(None, description="标签筛选（逗号分隔）")
+    search: Optional[str] = Field(None, description="搜索关键词")
+    sort_by: str = Field("popular", description="排序方式")
+    price_min: Optional[float] = Field(None, description="最低价格")
+    price_max: Optional[float] = Field(None, description="最高价格")
+
+
 class GameListResponse(BaseModel):
     """游戏列表响应模型"""
     games: List[GameListItem]
-    pagination: dict = Field(..., description="分页信息")
-    filters_applied: dict = Field(default_factory=dict, description="已应用的筛选条件")
+    pagination: PaginationModel = Field(..., description="分页信息")
+    filters_applied: GameListFilters = Field(default_factory=GameListFilters, description="已应用的筛选条件")
 
 
 class GenreItem(BaseModel):
@@ -75,11 +96,18 @@ class TagResponse(BaseModel):
     tags: List[TagItem]
 
 
+class ExplanationModel(BaseModel):
+    """推荐解释模型"""
+    factors: Dict[str, float] = Field(default_factory=dict, description="各推荐因素的贡献度")
+    similar_games: List[str] = Field(default_factory=list, description="相似的已玩游戏（App ID）")
+    summary: Optional[str] = Field(None, description="解释文本")
+
+
 class GameRecommendation(GameBase):
     """推荐游戏模型（包含推荐相关字段）"""
     match_score: int = Field(..., ge=0, le=100, description="匹配度分数")
     recommend_reason: str = Field(..., description="推荐理由")
-    explanation: dict = Field(..., description="推荐解释")
+    explanation: ExplanationModel = Field(..., description="推荐解释")
     
     class Config:
         from_attributes = True
@@ -3,8 +3,10 @@
 """
 
 from typing import List, Optional
-from pydantic import BaseModel, Field
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from datetime import date, datetime
+
+from backend.schemas.common import intern_strings
 
 
 class LibraryGameBase(BaseModel):
@@ -13,12 +15,14 @@ class LibraryGameBase(BaseModel):
     app_name: str = Field(..., description="游戏名称")
     genres: List[str] = Field(default_factory=list, description="游戏品类")
     tags: List[str] = Field(default_factory=list, description="游戏标签")
+    
+    _intern_genres_tags = field_validator('genres', 'tags', mode='before')(intern_strings)
 
 
 class LibraryGame(LibraryGameBase):
     """游戏库游戏模型（包含游玩数据）"""
     playtime_hours: float = Field(0.0, description="游玩时长（小时）")
-    last_played_at: Optional[str] = Field(None, description="最后游玩时间")
+    last_played_at: Optional[datetime] = Field(None, description="最后游玩时间")
     last_played_relative: Optional[str] = Field(None, description="相对时间描述")
     
     is_installed: bool = Field(False, description="是否已安装")
@@ -28,7 +32,7 @@ class LibraryGame(LibraryGameBase):
     achievements_unlocked: int = Field(0, description="已解锁成就数")
     achievements_total: int = Field(0, description="总成就数")
     
-    purchase_date: Optional[str] = Field(None, description="购买日期")
+    purchase_date: Optional[date] = Field(None, description="购买日期")
     purchase_price: Optional[float] = Field(None, description="购买价格")
     
     class Config:
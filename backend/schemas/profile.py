@@ -4,6 +4,7 @@
 
 from typing import List, Optional
 from pydantic import BaseModel, Field
+from datetime import datetime
 
 
 class GamerDNAStat(BaseModel):
@@ -34,7 +35,7 @@ class BentoStats(BaseModel):
 class RecentActivity(BaseModel):
     """最近活动"""
     last_played_game_id: Optional[str] = Field(None, description="最后游玩的游戏ID")
-    last_played_at: Optional[str] = Field(None, description="最后游玩时间")
+    last_played_at: Optional[datetime] = Field(None, description="最后游玩时间")
 
 
 class UserProfileResponse(BaseModel):
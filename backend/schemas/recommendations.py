@@ -2,28 +2,28 @@
 推荐相关的Pydantic模式
 """
 
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, validator
+from typing import Annotated, List, Literal, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
+
+from backend.schemas.common import intern_strings
+
+# 本模块模式的统一配置：忽略多余字段、赋值时不重新校验
+SCHEMA_CONFIG = ConfigDict(extra='ignore', validate_assignment=False)
 
 
 class RecommendationRequest(BaseModel):
     """推荐请求模式"""
+    model_config = SCHEMA_CONFIG
+    
     user_id: int
-    topk: Optional[int] = 10
+    topk: Optional[Annotated[int, Field(ge=1, le=100)]] = 10
     algorithm: Optional[str] = "auto"  # auto, embedding, popularity, content
-    
-    @validator('topk')
-    def validate_topk(cls, v):
-        if v is not None:
-            if v < 1:
-                raise ValueError('topk must be at least 1')
-            if v > 100:
-                raise ValueError('topk must be at most 100')
-        return v
 
 
 class GameInfo(BaseModel):
     """游戏信息模式（与 game_metadata 对齐）"""
+    model_config = ConfigDict(frozen=True, extra='ignore', validate_assignment=False)
+    
     product_id: int
     title: str
     app_name: Optional[str] = None
@@ -43,10 +43,14 @@ class GameInfo(BaseModel):
     reviews_url: Optional[str] = None
     early_access: Optional[bool] = None
     score: float  # 推荐分数
+    
+    _intern_lists = field_validator('genres', 'tags', 'specs', mode='before')(intern_strings)
 
 
 class RecommendationResponse(BaseModel):
     """推荐响应模式"""
+    model_config = SCHEMA_CONFIG
+    
     user_id: int
     recommendations: List[GameInfo]
     algorithm: str
@@ -58,12 +62,16 @@ class RecommendationResponse(BaseModel):
 
 class ExplanationRequest(BaseModel):
     """推荐解释请求模式"""
+    model_config = SCHEMA_CONFIG
+    
     user_id: int
     product_id: int
 
 
 class InfluentialGame(BaseModel):
     """影响推荐的游戏"""
+    model_config = SCHEMA_CONFIG
+    
     product_id: int
     title: str
     weight: float
@@ -71,6 +79,8 @@ class InfluentialGame(BaseModel):
 
 class ExplanationResponse(BaseModel):
     """推荐解释响应模式"""
+    model_config = SCHEMA_CONFIG
+    
     product_id: int
     explanation: str
     influential_games: List[InfluentialGame] = []
@@ -79,6 +89,8 @@ class ExplanationResponse(BaseModel):
 
 class InteractionData(BaseModel):
     """交互数据模式"""
+    model_config = SCHEMA_CONFIG
+    
     user_id: int
     product_id: int
     timestamp: Optional[int] = None
@@ -88,6 +100,8 @@ class InteractionData(BaseModel):
 
 class InteractionResponse(BaseModel):
     """交互响应模式"""
+    model_config = SCHEMA_CONFIG
+    
     status: str
     message: str
     interaction_id: Optional[int] = None
@@ -95,20 +109,18 @@ class InteractionResponse(BaseModel):
 
 class UserReviewCreate(BaseModel):
     """用户评价创建模式"""
+    model_config = SCHEMA_CONFIG
+    
     user_id: int
     product_id: int
-    rating: float
+    rating: Annotated[float, Field(ge=0, le=5)]
     review_text: Optional[str] = None
-    
-    @validator('rating')
-    def validate_rating(cls, v):
-        if v < 0 or v > 5:
-            raise ValueError('Rating must be between 0 and 5')
-        return v
 
 
 class UserReviewResponse(BaseModel):
     """用户评价响应模式"""
+    model_config = SCHEMA_CONFIG
+    
     review_id: int
     user_id: int
     product_id: int
@@ -119,6 +131,8 @@ class UserReviewResponse(BaseModel):
 
 class GameDetailResponse(BaseModel):
     """游戏详情响应模式"""
+    model_config = SCHEMA_CONFIG
+    
     product_id: int
     title: str
     app_name: Optional[str] = None
@@ -135,23 +149,24 @@ class GameDetailResponse(BaseModel):
 
 class FeedbackData(BaseModel):
     """用户反馈数据"""
+    model_config = SCHEMA_CONFIG
+    
     user_id: int
     product_id: int
-    feedback_type: str  # 'like', 'dislike', 'not_interested'
+    feedback_type: Literal['like', 'dislike', 'not_interested']
     recommendation_id: Optional[str] = None
-    
-    @validator('feedback_type')
-    def validate_feedback_type(cls, v):
-        allowed_types = ['like', 'dislike', 'not_interested']
-        if v not in allowed_types:
-            raise ValueError(f'feedback_type must be one of {allowed_types}')
-        return v
 
 
 class RecommendationStats(BaseModel):
     """推荐统计信息"""
+    model_config = SCHEMA_CONFIG
+    
     total_requests: int
     avg_response_time_ms: float
     cache_hit_rate: float
     algorithm_distribution: Dict[str, int]
     error_rate: float
+
+
+# 模块级校验器：schema 只构建一次，推荐接口直接复用
+RecommendationResponseAdapter = TypeAdapter(RecommendationResponse)
@@ -18,8 +18,11 @@
 
 import asyncio
 import logging
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
+import numpy as np
+
 from backend.cache.redis_client import init_redis
 from backend.cache.feature_store import FeatureStore
 from backend.database.connection import init_db, async_session_maker
@@ -34,6 +37,9 @@ METASCORE_WEIGHT = float(__import__('os').getenv("METASCORE_WEIGHT", "0.6"))
 SENTIMENT_WEIGHT = float(__import__('os').getenv("SENTIMENT_WEIGHT", "0.4"))
 TOP_POPULAR_COUNT = int(__import__('os').getenv("TOP_POPULAR_COUNT", "500"))
 
+# 流式读取时每次从服务端游标拉取的行数
+STREAM_YIELD_PER = 10000
+
 
 # Steam 用户评价情感到分数的映射
 SENTIMENT_SCORES = {
@@ -57,11 +63,38 @@ SENTIMENT_SCORES = {
     "": 50,
 }
 
+# 归一化（去空白、小写）后的 sentiment -> 分数，一次哈希查找代替逐个子串匹配
+SENT_NORM_LUT: Dict[str, float] = {
+    key.strip().lower(): float(score)
+    for key, score in SENTIMENT_SCORES.items()
+    if key is not None
+}
+
+# 查表未命中时的子串匹配规则（如 "Very Positive (1,234 reviews)"），按优先级排列
+SENT_SUBSTRING_RULES = (
+    ("overwhelmingly positive", 100.0),
+    ("very positive", 90.0),
+    ("mostly positive", 70.0),
+    ("positive", 80.0),
+    ("overwhelmingly negative", 0.0),
+    ("very negative", 10.0),
+    ("mostly negative", 30.0),
+    ("negative", 20.0),
+    ("mixed", 50.0),
+)
+
+# sentiment 分数档位查找表：get_sentiment_score 的所有可能取值，按编码索引
+SENT_LUT = np.array([0, 10, 20, 30, 50, 70, 80, 90, 100], dtype=np.float64)
+_SENT_LEVEL_TO_CODE = {float(level): code for code, level in enumerate(SENT_LUT)}
+
 
+@lru_cache(maxsize=256)
 def get_sentiment_score(sentiment: Optional[str]) -> float:
     """
     将 sentiment 字符串转换为分数
     
+    取值种类很少，结果按原始字符串缓存，重复值跳过 strip/lower 归一化。
+    
     Args:
         sentiment: Steam 评价情感字符串
         
@@ -71,34 +104,19 @@ def get_sentiment_score(sentiment: Optional[str]) -> float:
     if not sentiment:
         return 50.0
     
-    # 精确匹配
-    if sentiment in SENTIMENT_SCORES:
-        return float(SENTIMENT_SCORES[sentiment])
-    
-    # 模糊匹配（处理大小写和空格）
-    sentiment_lower = sentiment.lower().strip()
-    
-    if "overwhelmingly positive" in sentiment_lower:
-        return 100.0
-    elif "very positive" in sentiment_lower:
-        return 90.0
-    elif "mostly positive" in sentiment_lower:
-        return 70.0
-    elif "positive" in sentiment_lower:
-        return 80.0
-    elif "overwhelmingly negative" in sentiment_lower:
-        return 0.0
-    elif "very negative" in sentiment_lower:
-        return 10.0
-    elif "mostly negative" in sentiment_lower:
-        return 30.0
-    elif "negative" in sentiment_lower:
-        return 20.0
-    elif "mixed" in sentiment_lower:
-        return 50.0
+    # 归一化后查表
+    normalized = sentiment.strip().lower()
+    score = SENT_NORM_LUT.get(normalized)
+    if score is not None:
+        return score
     
-    # 默认值
-    return 50.0
+    # 未命中时回退到子串匹配，结果写回查找表；都不匹配（如 "3 user reviews"）按中性处理
+    score = next(
+        (rule_score for pattern, rule_score in SENT_SUBSTRING_RULES if pattern in normalized),
+        50.0
+    )
+    SENT_NORM_LUT[normalized] = score
+    return score
 
 
 def calculate_popularity_score(
@@ -147,27 +165,64 @@ async def compute_popular_games() -> List[Tuple[int, float]]:
         return []
     
     async with async_session_maker() as db:
-        # 查询所有游戏
-        stmt = select(GameMetadata)
-        result = await db.execute(stmt)
-        games = result.scalars().all()
+        # 只查询需要的列，通过服务端游标流式读取，不构造 ORM 对象
+        stmt = select(
+            GameMetadata.product_id, GameMetadata.metascore, GameMetadata.sentiment
+        ).execution_options(yield_per=STREAM_YIELD_PER)
+        result = await db.stream(stmt)
+        
+        # 按分块读取，每块直接写入预分配的 numpy 数组，内存中不会同时保留全部行对象；
+        # sentiment 字符串取值很少，每种只解析一次并编码为 SENT_LUT 下标
+        pid_chunks = []
+        meta_chunks = []
+        code_chunks = []
+        code_cache: Dict[Optional[str], int] = {}
+        
+        async for partition in result.partitions(STREAM_YIELD_PER):
+            size = len(partition)
+            chunk_pids = np.empty(size, dtype=np.int64)
+            chunk_meta = np.empty(size, dtype=np.float64)
+            chunk_codes = np.empty(size, dtype=np.int8)
+            
+            for i, (product_id, metascore, sentiment) in enumerate(partition):
+                code = code_cache.get(sentiment)
+                if code is None:
+                    code = _SENT_LEVEL_TO_CODE[get_sentiment_score(sentiment)]
+                    code_cache[sentiment] = code
+                
+                chunk_pids[i] = product_id
+                chunk_meta[i] = metascore if metascore is not None else np.nan
+                chunk_codes[i] = code
+            
+            pid_chunks.append(chunk_pids)
+            meta_chunks.append(chunk_meta)
+            code_chunks.append(chunk_codes)
         
-        logger.info(f"Found {len(games)} games in database")
+        if not pid_chunks:
+            logger.info("Found 0 games in database")
+            return []
         
-        # 计算每个游戏的热门度分数
-        game_scores = []
+        pids = np.concatenate(pid_chunks)
+        codes = np.concatenate(code_chunks)
+        meta = np.concatenate(meta_chunks)
         
-        for game in games:
-            score = calculate_popularity_score(game.metascore, game.sentiment)
-            game_scores.append((game.product_id, score))
+        logger.info(f"Found {len(pids)} games in database")
         
-        # 按分数降序排序
-        game_scores.sort(key=lambda x: x[1], reverse=True)
+        # 向量化计算热门度：metascore 缺失取 50，并限制在 0-100
+        meta = np.clip(np.where(np.isnan(meta), 50.0, meta), 0.0, 100.0)
+        scores = METASCORE_WEIGHT * meta + SENTIMENT_WEIGHT * SENT_LUT[codes]
         
-        # 只保留前 N 个
-        top_games = game_scores[:TOP_POPULAR_COUNT]
+        # 只保留前 N 个：线性选择求出第 N 名的分数，取所有不低于该分数的游戏（包括与之并列的），
+        # 候选下标按原查询顺序排列后再稳定排序，并列时保持数据库顺序，结果与全量稳定排序一致
+        n = min(TOP_POPULAR_COUNT, len(scores))
+        if n <= 0:
+            return []
+        threshold = scores[np.argpartition(-scores, n - 1)[n - 1]]
+        candidates = np.flatnonzero(scores >= threshold)
+        top_idx = candidates[np.argsort(-scores[candidates], kind="stable")[:n]]
+        top_games = list(zip(pids[top_idx].tolist(), scores[top_idx].tolist()))
         
-        logger.info(f"Computed popularity scores for {len(game_scores)} games")
+        logger.info(f"Computed popularity scores for {len(scores)} games")
         logger.info(f"Top 5 games: {top_games[:5]}")
         
         return top_games
@@ -3,6 +3,7 @@
 
 使用说明：
     python -m backend.tasks.compute_user_profiles
+    python -m backend.tasks.compute_user_profiles --export-fp16   # 离线生成 .fp16.npy 半精度副本
 
 可配置项（环境变量，可选）：
     USER_EMB_PATH        默认 D:\\学科实践\\exported_with_id\\user_embeddings.npy
@@ -10,8 +11,11 @@
     USER_MAP_PATH        默认 D:\\学科实践\\exported_with_id\\user_id_map.json
     ITEM_MAP_PATH        默认 D:\\学科实践\\exported_with_id\\item_id_map.json
     MODEL_NAME           默认 lightgcn
-    BATCH_SIZE           默认 100（每批处理的用户数）
+    BATCH_SIZE           默认 100（每批处理并写入数据库的用户数）
+    MAX_PENDING_WRITES   默认 2（同时进行中的写库批次上限）
     TOP_K_GAMES          默认 50（用于分析的游戏数量）
+    USE_FP16_EMBEDDINGS  默认 0（设为 1 时优先加载 .fp16.npy 副本，打分时分块转回 float32；
+                         副本比 float32 文件旧或形状不一致时视为过期，回退到 float32 文件）
 
 计算内容：
     1. 用户喜好的游戏类型（favorite_genres）
@@ -24,10 +28,10 @@ import json
 import os
 import logging
 from typing import Dict, List, Tuple, Optional
-from collections import defaultdict
 from datetime import datetime
 
 import numpy as np
+import orjson
 
 from backend.cache.redis_client import init_redis
 from backend.database.connection import init_db, get_db_session
@@ -45,6 +49,67 @@ MODEL_NAME = os.getenv("MODEL_NAME", "lightgcn")
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", "100"))
 TOP_K_GAMES = int(os.getenv("TOP_K_GAMES", "50"))
 
+# 同时进行中的写库批次上限（计算下一批时允许上一批仍在写入）
+MAX_PENDING_WRITES = int(os.getenv("MAX_PENDING_WRITES", "2"))
+
+# 流式读取游戏元数据时每次从服务端游标拉取的行数
+METADATA_YIELD_PER = 10000
+
+USE_FP16_EMBEDDINGS = os.getenv("USE_FP16_EMBEDDINGS", "0").lower() not in ("0", "false", "")
+
+# user_profiles 中只有 ORM 端默认值（default=）的列（level、exp、各项统计等，均为数值常量）。
+# COPY + 原生 SQL 写入绕过了 ORM，新插入的画像需显式带上这些默认值，否则为 NULL
+_PROFILE_COLUMN_DEFAULTS = {
+    column.name: column.default.arg
+    for column in UserProfile.__table__.columns
+    if column.default is not None and column.default.is_scalar
+}
+
+# 打分时每次转回 float32 的物品行数（限制半精度矩阵上转的临时内存）
+ITEM_SCORE_CHUNK = 65536
+
+
+def _fp16_path(path: str) -> str:
+    """float32 嵌入文件对应的半精度副本路径：xxx.npy -> xxx.fp16.npy"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.fp16{ext or '.npy'}"
+
+
+def _load_embedding_matrix(path: str) -> np.ndarray:
+    """
+    以内存映射方式加载嵌入矩阵
+    
+    启用 USE_FP16_EMBEDDINGS 且半精度副本有效（修改时间不早于 float32 文件、形状一致）时使用副本；
+    嵌入重新导出后副本即过期，记录警告并回退到 float32 文件。
+    """
+    embeddings = np.load(path, mmap_mode="r")
+    fp16_path = _fp16_path(path)
+    if not (USE_FP16_EMBEDDINGS and os.path.exists(fp16_path)):
+        return embeddings
+    
+    if os.path.getmtime(fp16_path) < os.path.getmtime(path):
+        logger.warning(f"Ignoring stale float16 embeddings (older than {path}): {fp16_path}")
+        return embeddings
+    
+    fp16_embeddings = np.load(fp16_path, mmap_mode="r")
+    if fp16_embeddings.shape != embeddings.shape:
+        logger.warning(
+            f"Ignoring float16 embeddings with mismatched shape "
+            f"{fp16_embeddings.shape} != {embeddings.shape}: {fp16_path}"
+        )
+        return embeddings
+    
+    logger.info(f"Using float16 embeddings: {fp16_path}")
+    return fp16_embeddings
+
+
+def export_fp16_embeddings() -> None:
+    """离线把用户/物品嵌入另存为 float16 副本（体积和内存带宽减半）"""
+    for path in (USER_EMB_PATH, ITEM_EMB_PATH):
+        embeddings = np.load(path, mmap_mode="r")
+        np.save(_fp16_path(path), embeddings.astype(np.float16))
+        logger.info(f"Exported {_fp16_path(path)} {embeddings.shape}")
+
 
 # 游戏类型到 Gamer DNA 属性的映射权重
 GENRE_TO_DNA_MAPPING = {
@@ -122,6 +187,103 @@ PLAYER_TYPES = {
     "竞技": "竞技者"
 }
 
+# Gamer DNA 属性的固定顺序（item_dna_weights 的列顺序）
+ATTR_NAMES = ("策略", "反应", "探索", "社交", "收集", "竞技")
+PLAYER_TYPE_ARR = tuple(PLAYER_TYPES[attr] for attr in ATTR_NAMES)
+_ATTR_INDEX = {attr: i for i, attr in enumerate(ATTR_NAMES)}
+
+
+def _build_category_dna_vectors() -> Dict[str, np.ndarray]:
+    """将 GENRE_TO_DNA_MAPPING 转换为 类型/标签 -> 6 维权重向量"""
+    vectors = {}
+    for category, mapping in GENRE_TO_DNA_MAPPING.items():
+        vec = np.zeros(len(ATTR_NAMES), dtype=np.float32)
+        for attr, weight in mapping.items():
+            vec[_ATTR_INDEX[attr]] = weight
+        vectors[category] = vec
+    return vectors
+
+
+CATEGORY_DNA_VECTORS = _build_category_dna_vectors()
+
+
+class CategoryCSR:
+    """
+    物品 -> 类型/标签 的 CSR 稀疏表示（纯 NumPy）
+    
+    第 i 个物品的类别编码为 indices[indptr[i]:indptr[i + 1]]，
+    按分数加权汇总时用一次 np.bincount 完成，不再逐个字符串累加。
+    """
+    
+    def __init__(self, item_categories: List[List[str]]):
+        vocab: Dict[str, int] = {}
+        indptr = np.zeros(len(item_categories) + 1, dtype=np.int64)
+        codes: List[int] = []
+        
+        for i, categories in enumerate(item_categories):
+            for category in categories:
+                codes.append(vocab.setdefault(category, len(vocab)))
+            indptr[i + 1] = len(codes)
+        
+        self.indptr = indptr
+        self.indices = np.asarray(codes, dtype=np.int64)
+        self.vocab_inv = list(vocab)
+    
+    def top_categories(self, rows: np.ndarray, weights: np.ndarray, n: int) -> List[Tuple[str, float]]:
+        """
+        按权重汇总给定物品的类别分数，返回分数最高的 n 个 (类别, 分数)
+        
+        Args:
+            rows: 物品索引
+            weights: 对应的分数
+            n: 返回数量
+        """
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return []
+        
+        # 拼接所选物品的类别编码：每段起点 + 段内偏移
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        codes = self.indices[offsets + np.arange(total)]
+        
+        sums = np.bincount(codes, weights=np.repeat(weights.astype(np.float64), lengths))
+        
+        # 只在出现过的类别中排序：分数降序，同分时按首次出现的先后
+        present, first_pos = np.unique(codes, return_index=True)
+        present_scores = sums[present]
+        order = np.lexsort((first_pos, -present_scores))[:n]
+        
+        return [
+            (self.vocab_inv[code], score)
+            for code, score in zip(present[order].tolist(), present_scores[order].tolist())
+        ]
+
+
+def _top_k_desc(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    分数降序的前 k 个下标
+    
+    同分时下标大者在前（与稳定排序后的 np.argsort(scores)[::-1] 一致）。先线性选择出第 k 名的分数，
+    再取所有不低于该分数的下标排序，并列跨越第 k 名时入选的物品也是确定的。
+    """
+    if k < len(scores):
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        candidates = np.flatnonzero(scores >= threshold)[::-1]
+    else:
+        candidates = np.arange(len(scores))[::-1]
+    return candidates[np.argsort(-scores[candidates], kind="stable")[:k]]
+
+
+def _id_array(id_to_index: Dict[int, int], size: int) -> np.ndarray:
+    """original_id -> index 映射转为长度为 size 的数组，未映射的位置为 -1"""
+    arr = np.full(size, -1, dtype=np.int64)
+    for orig_id, idx in id_to_index.items():
+        if 0 <= idx < size:
+            arr[idx] = orig_id
+    return arr
+
 
 class UserProfileComputer:
     """用户画像计算器"""
@@ -137,14 +299,25 @@ class UserProfileComputer:
         # 反向映射：original_id -> index
         self.user_id_to_index: Dict[int, int] = {}
         self.item_id_to_index: Dict[int, int] = {}
+        
+        # 正向映射的数组形式：index -> original_id（[PAD] 或无效ID为 -1）
+        self.user_id_arr: Optional[np.ndarray] = None
+        self.item_id_arr: Optional[np.ndarray] = None
+        
+        # 物品索引 -> 6 维 DNA 权重（由类型和标签累加，加载元数据后构建）
+        self.item_dna_weights: Optional[np.ndarray] = None
+        
+        # 物品索引 -> 类型/标签（CSR，加载元数据后构建）
+        self.genre_csr: Optional[CategoryCSR] = None
+        self.tag_csr: Optional[CategoryCSR] = None
     
     def load_embeddings(self) -> None:
         """加载嵌入向量和ID映射"""
         logger.info("Loading embeddings and ID maps...")
         
-        # 加载嵌入向量
-        self.user_embeddings = np.load(USER_EMB_PATH)
-        self.item_embeddings = np.load(ITEM_EMB_PATH)
+        # 以内存映射方式加载嵌入向量：只有实际访问到的行才会被读入内存
+        self.user_embeddings = _load_embedding_matrix(USER_EMB_PATH)
+        self.item_embeddings = _load_embedding_matrix(ITEM_EMB_PATH)
         
         logger.info(f"User embeddings shape: {self.user_embeddings.shape}")
         logger.info(f"Item embeddings shape: {self.item_embeddings.shape}")
@@ -173,14 +346,19 @@ class UserProfileComputer:
                 except ValueError:
                     pass
         
+        self._build_id_arrays()
+        
         logger.info(f"Loaded {len(self.user_id_to_index)} users, {len(self.item_id_to_index)} items")
     
+    def _build_id_arrays(self) -> None:
+        """由反向映射构建 index -> original_id 的 int64 数组，供 top-K 结果直接按下标翻译"""
+        self.user_id_arr = _id_array(self.user_id_to_index, self.user_embeddings.shape[0])
+        self.item_id_arr = _id_array(self.item_id_to_index, self.item_embeddings.shape[0])
+    
     async def load_game_metadata(self) -> None:
         """从数据库加载游戏元数据（类型、标签）"""
         logger.info("Loading game metadata from database...")
         
-        from sqlalchemy import select
-        from sqlalchemy.ext.asyncio import AsyncSession
         from backend.database.connection import async_session_maker
         
         if not async_session_maker:
@@ -188,30 +366,105 @@ class UserProfileComputer:
             return
         
         async with async_session_maker() as db:
-            stmt = select(GameMetadata)
-            result = await db.execute(stmt)
-            games = result.scalars().all()
-            
-            for game in games:
-                product_id = game.product_id
-                
+            loaded = False
+            if db.get_bind().dialect.name == "postgresql":
+                loaded = await self._load_category_arrays(db)
+            if not loaded:
+                await self._load_category_strings(db)
+        
+        logger.info(f"Loaded metadata for {len(self.item_genres)} games")
+        
+        self._build_item_arrays()
+    
+    async def _load_category_arrays(self, db) -> bool:
+        """
+        PostgreSQL：读取 genres_array / tags_array（TEXT[]）列
+        
+        数组列由 migrations/add_game_metadata_array_columns.sql 添加并由触发器维护，
+        asyncpg 直接解码为 Python 列表，无需逐行 split。列不存在时返回 False。
+        """
+        from sqlalchemy import text
+        from sqlalchemy.exc import DBAPIError
+        
+        stmt = text(
+            "SELECT product_id, "
+            "COALESCE(genres_array, split_category_list(genres)), "
+            "COALESCE(tags_array, split_category_list(tags)) "
+            "FROM game_metadata"
+        ).execution_options(yield_per=METADATA_YIELD_PER)
+        
+        try:
+            result = await db.stream(stmt)
+            async for partition in result.partitions(METADATA_YIELD_PER):
+                for product_id, genres, tags in partition:
+                    self.item_genres[product_id] = genres or []
+                    self.item_tags[product_id] = tags or []
+            return True
+        except DBAPIError as e:
+            logger.info(f"Array columns unavailable, falling back to string parsing: {e.orig}")
+            await db.rollback()
+            self.item_genres.clear()
+            self.item_tags.clear()
+            return False
+    
+    async def _load_category_strings(self, db) -> None:
+        """通用路径：读取逗号分隔的 genres / tags 字符串并解析"""
+        from sqlalchemy import select
+        
+        # 只查询需要的列，通过服务端游标流式读取，不构造 ORM 对象
+        stmt = select(
+            GameMetadata.product_id, GameMetadata.genres, GameMetadata.tags
+        ).execution_options(yield_per=METADATA_YIELD_PER)
+        result = await db.stream(stmt)
+        
+        # 按分块取行，每块只在内存中保留 METADATA_YIELD_PER 行
+        async for partition in result.partitions(METADATA_YIELD_PER):
+            for product_id, genres, tags in partition:
                 # 解析类型
-                if game.genres:
+                if genres:
                     self.item_genres[product_id] = [
-                        g.strip() for g in game.genres.split(",") if g.strip()
+                        g.strip() for g in genres.split(",") if g.strip()
                     ]
                 else:
                     self.item_genres[product_id] = []
                 
                 # 解析标签
-                if game.tags:
+                if tags:
                     self.item_tags[product_id] = [
-                        t.strip() for t in game.tags.split(",") if t.strip()
+                        t.strip() for t in tags.split(",") if t.strip()
                     ]
                 else:
                     self.item_tags[product_id] = []
+    
+    def _build_item_arrays(self) -> None:
+        """
+        构建按物品索引排列的派生矩阵
         
-        logger.info(f"Loaded metadata for {len(self.item_genres)} games")
+        item_dna_weights[idx] 为该物品全部类型和标签对应的 DNA 权重之和，
+        计算 Gamer DNA 时只需一次 (K,) @ (K, 6) 的乘法；
+        genre_csr / tag_csr 为按物品索引排列的类型、标签稀疏矩阵。
+        """
+        if self.item_embeddings is None:
+            return
+        
+        num_items = self.item_embeddings.shape[0]
+        dna_weights = np.zeros((num_items, len(ATTR_NAMES)), dtype=np.float32)
+        item_genres: List[List[str]] = [[] for _ in range(num_items)]
+        item_tags: List[List[str]] = [[] for _ in range(num_items)]
+        
+        for product_id, idx in self.item_id_to_index.items():
+            if idx >= num_items:
+                continue
+            item_genres[idx] = self.item_genres.get(product_id, [])
+            item_tags[idx] = self.item_tags.get(product_id, [])
+            for category in item_genres[idx] + item_tags[idx]:
+                vec = CATEGORY_DNA_VECTORS.get(category)
+                if vec is not None:
+                    dna_weights[idx] += vec
+        
+        self.item_dna_weights = dna_weights
+        self.genre_csr = CategoryCSR(item_genres)
+        self.tag_csr = CategoryCSR(item_tags)
     
     def get_user_top_games(self, user_id: int, top_k: int = 50) -> List[Tuple[int, float]]:
         """
@@ -219,40 +472,132 @@ class UserProfileComputer:
         
         通过用户向量与所有游戏向量的内积计算偏好分数
         """
+        top_indices, top_scores = self._compute_top_k(user_id, top_k)
+        
+        # 转换为 (product_id, score) 列表
+        return self._indices_to_top_games(top_indices, top_scores)
+    
+    def _compute_top_k(self, user_id: int, top_k: int = 50) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算单个用户的 top-K 物品
+        
+        Returns:
+            (物品索引, 分数)，按分数降序；用户无嵌入向量时为两个空数组
+        """
         if user_id not in self.user_id_to_index:
-            return []
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
         
         user_idx = self.user_id_to_index[user_id]
-        user_vec = self.user_embeddings[user_idx]
         
         # 计算与所有物品的内积
-        scores = np.dot(self.item_embeddings, user_vec)
+        scores = self._score_items(self.user_embeddings[[user_idx]])[0]
         
-        # 获取 top_k 索引
-        top_indices = np.argsort(scores)[::-1][:top_k]
+        # 获取 top_k 索引：线性选择出 top_k，再只对选中部分排序
+        k = min(top_k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top_indices = _top_k_desc(scores, k)
         
-        # 转换为 (product_id, score) 列表
-        results = []
-        for idx in top_indices:
-            if idx in self.item_id_map:
-                orig_id = self.item_id_map[idx]
-                if orig_id != "[PAD]":
-                    try:
-                        product_id = int(orig_id)
-                        results.append((product_id, float(scores[idx])))
-                    except ValueError:
-                        pass
+        return top_indices, scores[top_indices]
+    
+    def compute_all_scores_batch(
+        self,
+        user_ids: List[int],
+        top_k: int = 50
+    ) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        """
+        批量计算一批用户最偏好的游戏
         
-        return results
-
+        整批用户向量堆叠为 (B, D) 矩阵，与全部物品向量做一次矩阵乘法，
+        再逐行用 _top_k_desc 线性选择 top_k，只对选中部分排序（同分规则与单用户路径一致）。
+        
+        Args:
+            user_ids: 用户ID列表（没有嵌入向量的用户会被跳过）
+            top_k: 每个用户保留的游戏数量
+            
+        Returns:
+            (有效用户ID列表, top_indices (B, K) 物品索引, top_scores (B, K) 分数)，按分数降序
+        """
+        valid_ids = [uid for uid in user_ids if uid in self.user_id_to_index]
+        k = min(top_k, self.item_embeddings.shape[0])
+        if not valid_ids or k <= 0:
+            return [], np.empty((0, 0), dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        
+        user_indices = np.fromiter(
+            (self.user_id_to_index[uid] for uid in valid_ids), dtype=np.int64, count=len(valid_ids)
+        )
+        
+        # 花式索引会把本批用户行从内存映射中复制出来，得到连续内存供 BLAS 使用
+        scores = self._score_items(self.user_embeddings[user_indices])
+        
+        # 每行只做线性选择，再对选中的候选排序
+        top_indices = np.stack([_top_k_desc(row, k) for row in scores])
+        top_scores = np.take_along_axis(scores, top_indices, axis=1)
+        
+        return valid_ids, top_indices, top_scores
+    
+    def _score_items(self, user_vectors: np.ndarray) -> np.ndarray:
+        """
+        计算一组用户向量与全部物品的内积
+        
+        物品矩阵为 float32 时直接做一次 (B, D) @ (D, N)；为 float16 副本时按
+        ITEM_SCORE_CHUNK 行分块转回 float32 再乘，半精度矩阵本身保持映射不常驻。
+        
+        Args:
+            user_vectors: (B, D) 用户向量
+            
+        Returns:
+            (B, N) float32 分数矩阵
+        """
+        user_vectors = user_vectors.astype(np.float32, copy=False)
+        items = self.item_embeddings
+        
+        if items.dtype == np.float32:
+            return np.matmul(user_vectors, items.T)
+        
+        num_items = items.shape[0]
+        scores = np.empty((user_vectors.shape[0], num_items), dtype=np.float32)
+        for start in range(0, num_items, ITEM_SCORE_CHUNK):
+            end = min(start + ITEM_SCORE_CHUNK, num_items)
+            np.matmul(user_vectors, items[start:end].astype(np.float32).T, out=scores[:, start:end])
+        return scores
+    
+    def _indices_to_top_games(self, top_indices: np.ndarray, top_scores: np.ndarray) -> List[Tuple[int, float]]:
+        """将物品索引与分数转换为 (product_id, score) 列表，跳过 [PAD] 和无效ID"""
+        if self.item_id_arr is None:
+            self._build_id_arrays()
+        
+        product_ids = self.item_id_arr[top_indices]
+        valid = product_ids >= 0
+        return list(zip(product_ids[valid].tolist(), top_scores[valid].tolist()))
+    
+    def _has_valid_items(self, top_indices: np.ndarray) -> bool:
+        """top-K 中是否有有效物品（[PAD] 和无效ID不参与统计）"""
+        if len(top_indices) == 0:
+            return False
+        if self.item_id_arr is None:
+            self._build_id_arrays()
+        return bool((self.item_id_arr[top_indices] >= 0).any())
     
     def compute_user_preferences(self, user_id: int, top_k: int = 50) -> Dict:
         """
         计算用户偏好（喜爱的类型和标签）
+        
+        Args:
+            user_id: 用户ID
+            top_k: 用于分析的游戏数量
+        """
+        return self.compute_user_preferences_from_top(*self._compute_top_k(user_id, top_k))
+    
+    def compute_user_preferences_from_top(self, top_indices: np.ndarray, top_scores: np.ndarray) -> Dict:
         """
-        top_games = self.get_user_top_games(user_id, top_k)
+        由已计算好的 top-K 物品统计用户偏好
         
-        if not top_games:
+        Args:
+            top_indices: 物品索引，按分数降序
+            top_scores: 对应的偏好分数
+        """
+        if not self._has_valid_items(top_indices):
             return {
                 "favorite_genres": [],
                 "favorite_tags": [],
@@ -260,22 +605,12 @@ class UserProfileComputer:
                 "tag_scores": {}
             }
         
-        # 统计类型和标签分布（加权）
-        genre_scores = defaultdict(float)
-        tag_scores = defaultdict(float)
+        if self.genre_csr is None:
+            self._build_item_arrays()
         
-        for product_id, score in top_games:
-            genres = self.item_genres.get(product_id, [])
-            tags = self.item_tags.get(product_id, [])
-            
-            for genre in genres:
-                genre_scores[genre] += score
-            for tag in tags:
-                tag_scores[tag] += score
-        
-        # 排序
-        sorted_genres = sorted(genre_scores.items(), key=lambda x: x[1], reverse=True)
-        sorted_tags = sorted(tag_scores.items(), key=lambda x: x[1], reverse=True)
+        # 统计类型和标签分布（加权），按分数降序
+        sorted_genres = self.genre_csr.top_categories(top_indices, top_scores, 10)
+        sorted_tags = self.tag_csr.top_categories(top_indices, top_scores, 15)
         
         return {
             "favorite_genres": [g[0] for g in sorted_genres[:5]],
@@ -287,61 +622,55 @@ class UserProfileComputer:
     def compute_gamer_dna(self, user_id: int, top_k: int = 50) -> Dict:
         """
         计算用户的 Gamer DNA（6维属性）
+        
+        Args:
+            user_id: 用户ID
+            top_k: 用于分析的游戏数量
         """
-        top_games = self.get_user_top_games(user_id, top_k)
+        return self.compute_gamer_dna_from_top(*self._compute_top_k(user_id, top_k))
+    
+    def compute_gamer_dna_from_top(self, top_indices: np.ndarray, top_scores: np.ndarray) -> Dict:
+        """
+        由已计算好的 top-K 物品计算 Gamer DNA
         
-        if not top_games:
+        Args:
+            top_indices: 物品索引，按分数降序
+            top_scores: 对应的偏好分数
+        """
+        if not self._has_valid_items(top_indices):
             return self._get_default_gamer_dna()
         
-        # 计算6维属性分数
-        dna_scores = {
-            "策略": 0.0,
-            "反应": 0.0,
-            "探索": 0.0,
-            "社交": 0.0,
-            "收集": 0.0,
-            "竞技": 0.0
-        }
+        if self.item_dna_weights is None:
+            self._build_item_arrays()
         
-        for product_id, score in top_games:
-            genres = self.item_genres.get(product_id, [])
-            tags = self.item_tags.get(product_id, [])
-            
-            # 合并类型和标签
-            all_categories = genres + tags
-            
-            for category in all_categories:
-                if category in GENRE_TO_DNA_MAPPING:
-                    mapping = GENRE_TO_DNA_MAPPING[category]
-                    for attr, weight in mapping.items():
-                        dna_scores[attr] += score * weight
-        
-        # 归一化到 0-100
-        max_score = max(dna_scores.values()) if dna_scores.values() else 1
-        if max_score > 0:
-            for attr in dna_scores:
-                dna_scores[attr] = int((dna_scores[attr] / max_score) * 100)
+        # 计算6维属性分数：(K,) @ (K, 6)
+        raw = (top_scores @ self.item_dna_weights[top_indices]).astype(np.float64)
         
-        # 确保最低值不低于20
-        for attr in dna_scores:
-            dna_scores[attr] = max(20, dna_scores[attr])
+        # 归一化到 0-100（截断取整），并确保最低值不低于20；
+        # 最大值不为正时所有属性都不超过 0，直接取下限
+        max_score = raw.max()
+        if max_score > 0:
+            dna = np.maximum(20, (raw / max_score * 100).astype(np.int64))
+        else:
+            dna = np.full(len(ATTR_NAMES), 20, dtype=np.int64)
+        dna_values = dna.tolist()  # 按 ATTR_NAMES 顺序
         
         # 构建返回数据
         stats = [
-            {"name": attr, "value": score, "max": 100}
-            for attr, score in dna_scores.items()
+            {"name": attr, "value": value, "max": 100}
+            for attr, value in zip(ATTR_NAMES, dna_values)
         ]
         
-        # 确定主要和次要类型
-        sorted_attrs = sorted(dna_scores.items(), key=lambda x: x[1], reverse=True)
-        primary_type = PLAYER_TYPES.get(sorted_attrs[0][0], "探索者")
-        secondary_type = PLAYER_TYPES.get(sorted_attrs[1][0], "策略家")
+        # 确定主要和次要类型（同分时保持属性顺序）
+        order = np.argsort(-dna, kind="stable")
+        primary_type = PLAYER_TYPE_ARR[order[0]]
+        secondary_type = PLAYER_TYPE_ARR[order[1]]
         
         return {
             "stats": stats,
             "primary_type": primary_type,
             "secondary_type": secondary_type,
-            "raw_scores": dna_scores
+            "raw_scores": dict(zip(ATTR_NAMES, dna_values))
         }
     
     def _get_default_gamer_dna(self) -> Dict:
@@ -361,51 +690,175 @@ class UserProfileComputer:
         }
 
     
+    @staticmethod
+    def _build_profile_row(user_id: int, preferences: Dict, gamer_dna: Dict) -> Dict:
+        """构造一条待写入 user_profiles 的记录"""
+        return {
+            "user_id": user_id,
+            "gamer_dna_stats": orjson.dumps(gamer_dna["stats"]).decode(),
+            "primary_type": gamer_dna["primary_type"],
+            "secondary_type": gamer_dna["secondary_type"],
+            "favorite_genres": orjson.dumps(preferences["favorite_genres"]).decode(),
+        }
+    
     async def save_user_profile(self, user_id: int, preferences: Dict, gamer_dna: Dict) -> bool:
         """
         保存用户画像到数据库
         """
-        from sqlalchemy import select, update
+        row = self._build_profile_row(user_id, preferences, gamer_dna)
+        return await self.save_user_profiles_batch([row]) == 1
+    
+    async def save_user_profiles_batch(self, rows: List[Dict]) -> int:
+        """
+        批量保存用户画像（整批一个事务）
+        
+        PostgreSQL 下通过 COPY 写入临时表，再用一条 INSERT ... ON CONFLICT 合并到
+        user_profiles；其他数据库在同一会话内逐条写入，最后统一提交。
+        
+        Args:
+            rows: _build_profile_row 构造的记录列表
+            
+        Returns:
+            成功保存的记录数（失败时整批回滚，返回 0）
+        """
         from backend.database.connection import async_session_maker
         
+        if not rows:
+            return 0
+        
         if not async_session_maker:
             logger.error("Database not initialized")
-            return False
+            return 0
         
         try:
             async with async_session_maker() as db:
-                # 检查是否存在
-                stmt = select(UserProfile).where(UserProfile.user_id == user_id)
-                result = await db.execute(stmt)
-                profile = result.scalar_one_or_none()
-                
-                gamer_dna_stats_json = json.dumps(gamer_dna["stats"], ensure_ascii=False)
-                favorite_genres_json = json.dumps(preferences["favorite_genres"], ensure_ascii=False)
-                
-                if profile:
-                    # 更新现有记录
-                    profile.gamer_dna_stats = gamer_dna_stats_json
-                    profile.primary_type = gamer_dna["primary_type"]
-                    profile.secondary_type = gamer_dna["secondary_type"]
-                    profile.favorite_genres = favorite_genres_json
+                if db.get_bind().dialect.name == "postgresql":
+                    await self._copy_upsert_profiles(db, rows)
                 else:
-                    # 创建新记录
-                    profile = UserProfile(
-                        user_id=user_id,
-                        member_since=datetime.now().date(),
-                        gamer_dna_stats=gamer_dna_stats_json,
-                        primary_type=gamer_dna["primary_type"],
-                        secondary_type=gamer_dna["secondary_type"],
-                        favorite_genres=favorite_genres_json
-                    )
-                    db.add(profile)
+                    await self._save_profiles_in_session(db, rows)
                 
                 await db.commit()
-                return True
+                return len(rows)
                 
         except Exception as e:
-            logger.error(f"Failed to save profile for user {user_id}: {e}")
-            return False
+            logger.error(f"Failed to save profiles for {len(rows)} users: {e}")
+            return 0
+    
+    @staticmethod
+    async def _copy_upsert_profiles(db, rows: List[Dict]) -> None:
+        """PostgreSQL：COPY 到临时表后一次性 UPSERT"""
+        from sqlalchemy import text
+        
+        # 先经由 SQLAlchemy 执行，确保事务已开启；临时表在提交时清空
+        await db.execute(text(
+            "CREATE TEMP TABLE IF NOT EXISTS user_profiles_staging ("
+            "user_id INTEGER, gamer_dna_stats TEXT, primary_type VARCHAR(50), "
+            "secondary_type VARCHAR(50), favorite_genres TEXT, member_since DATE"
+            ") ON COMMIT DELETE ROWS"
+        ))
+        
+        today = datetime.now().date()
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "user_profiles_staging",
+            records=[
+                (
+                    row["user_id"], row["gamer_dna_stats"], row["primary_type"],
+                    row["secondary_type"], row["favorite_genres"], today
+                )
+                for row in rows
+            ],
+            columns=[
+                "user_id", "gamer_dna_stats", "primary_type",
+                "secondary_type", "favorite_genres", "member_since"
+            ]
+        )
+        
+        # 仅在插入新画像时写入默认值；已有画像冲突更新时不覆盖这些列
+        default_columns = "".join(f", {name}" for name in _PROFILE_COLUMN_DEFAULTS)
+        default_values = "".join(f", {value!r}" for value in _PROFILE_COLUMN_DEFAULTS.values())
+        await db.execute(text(
+            "INSERT INTO user_profiles "
+            "(user_id, gamer_dna_stats, primary_type, secondary_type, favorite_genres, member_since"
+            f"{default_columns}) "
+            "SELECT user_id, gamer_dna_stats, primary_type, secondary_type, favorite_genres, member_since"
+            f"{default_values} "
+            "FROM user_profiles_staging "
+            "ON CONFLICT (user_id) DO UPDATE SET "
+            "gamer_dna_stats = EXCLUDED.gamer_dna_stats, "
+            "primary_type = EXCLUDED.primary_type, "
+            "secondary_type = EXCLUDED.secondary_type, "
+            "favorite_genres = EXCLUDED.favorite_genres, "
+            "updated_at = now()"
+        ))
+    
+    @staticmethod
+    async def _save_profiles_in_session(db, rows: List[Dict]) -> None:
+        """通用路径：一次查询已有记录，再分别批量插入/更新，由调用方统一提交"""
+        from sqlalchemy import select, insert, update
+        
+        # 一次查出本批已存在的画像（user_id -> profile_id）
+        stmt = select(UserProfile.user_id, UserProfile.profile_id).where(
+            UserProfile.user_id.in_([row["user_id"] for row in rows])
+        )
+        result = await db.execute(stmt)
+        existing = {user_id: profile_id for user_id, profile_id in result.all()}
+        
+        today = datetime.now().date()
+        to_update = [
+            {"profile_id": existing[row["user_id"]], **row}
+            for row in rows if row["user_id"] in existing
+        ]
+        to_insert = [
+            {"member_since": today, **row}
+            for row in rows if row["user_id"] not in existing
+        ]
+        
+        # ORM 批量更新（按主键）与批量插入
+        if to_update:
+            await db.execute(update(UserProfile), to_update)
+        if to_insert:
+            await db.execute(insert(UserProfile), to_insert)
+    
+    def _compute_batch_rows(self, batch: List[int]) -> Tuple[List[Dict], int]:
+        """
+        计算一批用户的画像记录
+        
+        Args:
+            batch: 用户ID列表
+            
+        Returns:
+            (待写入的记录列表, 计算失败的用户数)
+        """
+        batch_rows = []
+        failed = 0
+        
+        # 整批用户一次矩阵乘法得到 top-K，偏好和 Gamer DNA 共用同一份结果
+        valid_ids, top_indices, top_scores = self.compute_all_scores_batch(batch, TOP_K_GAMES)
+        batch_top_items = {
+            uid: (top_indices[row], top_scores[row])
+            for row, uid in enumerate(valid_ids)
+        }
+        no_items = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        
+        for user_id in batch:
+            try:
+                top_indices, top_scores = batch_top_items.get(user_id, no_items)
+                
+                # 计算偏好
+                preferences = self.compute_user_preferences_from_top(top_indices, top_scores)
+                
+                # 计算 Gamer DNA
+                gamer_dna = self.compute_gamer_dna_from_top(top_indices, top_scores)
+                
+                batch_rows.append(self._build_profile_row(user_id, preferences, gamer_dna))
+                    
+            except Exception as e:
+                logger.error(f"Error computing profile for user {user_id}: {e}")
+                failed += 1
+        
+        return batch_rows, failed
     
     async def compute_all_users(self, limit: Optional[int] = None) -> Dict:
         """
@@ -417,7 +870,11 @@ class UserProfileComputer:
         Returns:
             统计信息
         """
-        user_ids = list(self.user_id_to_index.keys())
+        if self.user_id_arr is None:
+            self._build_id_arrays()
+        
+        # 按嵌入行号顺序取全部有效用户
+        user_ids = self.user_id_arr[self.user_id_arr >= 0].tolist()
         
         if limit:
             user_ids = user_ids[:limit]
@@ -428,31 +885,37 @@ class UserProfileComputer:
         
         logger.info(f"Starting to compute profiles for {total} users...")
         
+        # 计算与写库流水线：当前批在线程中计算时，上一批仍可在写数据库
+        write_semaphore = asyncio.Semaphore(MAX_PENDING_WRITES)
+        pending_writes = []
+        
+        async def _write_batch(batch_rows: List[Dict], processed: int, batch_size: int) -> int:
+            try:
+                batch_success = await self.save_user_profiles_batch(batch_rows)
+            finally:
+                write_semaphore.release()
+            
+            progress = processed / total * 100
+            logger.info(f"Progress: {progress:.1f}% ({processed}/{total}), batch success: {batch_success}/{batch_size}")
+            return batch_success
+        
         for i in range(0, total, BATCH_SIZE):
             batch = user_ids[i:i + BATCH_SIZE]
-            batch_success = 0
             
-            for user_id in batch:
-                try:
-                    # 计算偏好
-                    preferences = self.compute_user_preferences(user_id, TOP_K_GAMES)
-                    
-                    # 计算 Gamer DNA
-                    gamer_dna = self.compute_gamer_dna(user_id, TOP_K_GAMES)
-                    
-                    # 保存到数据库
-                    if await self.save_user_profile(user_id, preferences, gamer_dna):
-                        success_count += 1
-                        batch_success += 1
-                    else:
-                        failed_count += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error computing profile for user {user_id}: {e}")
-                    failed_count += 1
+            # NumPy 计算放到线程中执行，不阻塞事件循环上的写库任务
+            batch_rows, batch_failed = await asyncio.to_thread(self._compute_batch_rows, batch)
+            failed_count += batch_failed
             
-            progress = (i + len(batch)) / total * 100
-            logger.info(f"Progress: {progress:.1f}% ({i + len(batch)}/{total}), batch success: {batch_success}/{len(batch)}")
+            # 限制同时进行的写库批次数
+            await write_semaphore.acquire()
+            pending_writes.append(
+                (len(batch_rows), asyncio.create_task(_write_batch(batch_rows, i + len(batch), len(batch))))
+            )
+        
+        for row_count, task in pending_writes:
+            batch_success = await task
+            success_count += batch_success
+            failed_count += row_count - batch_success
         
         return {
             "total": total,
@@ -503,6 +966,10 @@ if __name__ == "__main__":
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
     
+    if "--export-fp16" in sys.argv:
+        export_fp16_embeddings()
+        sys.exit(0)
+    
     # 可选：从命令行参数获取限制数量
     limit = None
     if len(sys.argv) > 1:
@@ -11,20 +11,24 @@ Demo 导入脚本：导入前 20 个用户向量 + 全量物品向量，并重
     USER_MAP_PATH        默认 D:\\学科实践\\exported_with_id\\user_id_map.json
     ITEM_MAP_PATH        默认 D:\\学科实践\\exported_with_id\\item_id_map.json
     MODEL_NAME           默认 lightgcn
+    FAISS_INDEX_TYPE     默认 HNSW（见 settings），也可为 IVF 或 index_factory 描述串，如 "IVF{nlist},Flat"
+    FAISS_NPROBE         IVF 类索引的探查聚类数，0 表示按 nlist/32 自动取值
 """
 
 import asyncio
-import json
+import heapq
 import os
 import pickle
 import logging
-from typing import Dict, List
+from typing import Dict, Iterable, List, Tuple
 
 import numpy as np
+import orjson
 
 from backend.cache.feature_store import FeatureStore
 from backend.cache.redis_client import init_redis
 from backend.cache.faiss_index import get_faiss_index_manager
+from backend.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -41,8 +45,8 @@ MODEL_NAME = os.getenv("MODEL_NAME", "lightgcn")
 
 def _load_id_map(path: str) -> Dict[int, str]:
     """加载索引->原始ID 映射，key 为 int。"""
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    with open(path, "rb") as f:
+        data = orjson.loads(f.read())
     return {int(k): v for k, v in data.items()}
 
 
@@ -51,16 +55,30 @@ def _select_demo_users(id_map: Dict[int, str], count: int) -> List[int]:
     选择前 count 个真实用户的索引（跳过 index 0 的 [PAD]）。
     返回值是 numpy 数组行号（即内部索引）。
     """
-    selected = []
-    for idx in sorted(id_map.keys()):
-        if idx == 0:  # 跳过 PAD
+    # 只需要最小的 count 个索引：堆选择 O(N log count)，不对全部 key 排序
+    return heapq.nsmallest(
+        count,
+        (idx for idx, orig_id in id_map.items() if idx != 0 and orig_id != "[PAD]"),  # 跳过 PAD
+    )
+
+
+def _parse_ids(pairs: Iterable[Tuple[int, str]], kind: str) -> Tuple[List[int], np.ndarray]:
+    """
+    解析 (内部索引, 原始ID) 对，跳过 [PAD] 和非整数 ID。
+    返回 (原始ID列表, 对应的 numpy 行号数组)，供一次性花式索引取向量。
+    """
+    ids: List[int] = []
+    rows: List[int] = []
+    for idx, orig_id in pairs:
+        if orig_id == "[PAD]":
             continue
-        if id_map[idx] == "[PAD]":
+        try:
+            ids.append(int(orig_id))
+        except ValueError:
+            logger.warning("Skip non-int %s id: %s", kind, orig_id)
             continue
-        selected.append(idx)
-        if len(selected) >= count:
-            break
-    return selected
+        rows.append(idx)
+    return ids, np.asarray(rows, dtype=np.int64)
 
 
 async def main() -> None:
@@ -76,31 +94,20 @@ async def main() -> None:
     logger.info("Selected indices: %s", demo_user_indices)
 
     logger.info("Loading embeddings...")
-    user_emb = np.load(USER_EMB_PATH)  # shape: (N_user, dim)
-    item_emb = np.load(ITEM_EMB_PATH)  # shape: (N_item, dim)
+    # 内存映射读取：只有实际访问的行才会从磁盘载入，用户矩阵只用到少数几行
+    user_emb = np.load(USER_EMB_PATH, mmap_mode="r")  # shape: (N_user, dim)
+    item_emb = np.load(ITEM_EMB_PATH, mmap_mode="r")  # shape: (N_item, dim)
 
     # 构造用户字典：原始ID -> 向量
-    user_dict: Dict[int, np.ndarray] = {}
-    for idx in demo_user_indices:
-        orig_id = user_id_map[idx]
-        try:
-            uid = int(orig_id)
-        except ValueError:
-            logger.warning("Skip non-int user id: %s", orig_id)
-            continue
-        user_dict[uid] = user_emb[idx]
+    user_ids, user_rows = _parse_ids(((idx, user_id_map[idx]) for idx in demo_user_indices), "user")
+    # 花式索引一次取出所有行，结果是独立数组，与内存映射脱离
+    user_dict: Dict[int, np.ndarray] = dict(zip(user_ids, user_emb[user_rows]))
 
-    # 构造物品字典：原始ID -> 向量（全量）
-    item_dict: Dict[int, np.ndarray] = {}
-    for idx, orig_id in item_id_map.items():
-        if orig_id == "[PAD]":
-            continue
-        try:
-            iid = int(orig_id)
-        except ValueError:
-            logger.warning("Skip non-int item id: %s", orig_id)
-            continue
-        item_dict[iid] = item_emb[idx]
+    # 构造物品矩阵（全量）：一次花式索引得到连续的 (N, dim) 矩阵，
+    # 写入缓存的字典只持有各行视图，构建 FAISS 索引时直接复用该矩阵
+    item_ids, item_rows = _parse_ids(item_id_map.items(), "item")
+    item_mat = item_emb[item_rows]
+    item_dict: Dict[int, np.ndarray] = dict(zip(item_ids, item_mat))
 
     logger.info("Writing embeddings to Redis... (users=%d, items=%d)", len(user_dict), len(item_dict))
     await fs.cache_embeddings(
@@ -110,8 +117,9 @@ async def main() -> None:
     )
 
     logger.info("Building FAISS index...")
-    manager = get_faiss_index_manager(model_name=MODEL_NAME, index_type="IVF")
-    success = await manager.build_index(force_rebuild=True)
+    # 索引类型与搜索参数（nprobe / efSearch）在构建时即按 settings 设置好
+    manager = get_faiss_index_manager(model_name=MODEL_NAME, index_type=settings.FAISS_INDEX_TYPE)
+    success = await manager.build_index_from_arrays(np.asarray(item_ids, dtype=np.int64), item_mat)
     if success:
         logger.info("FAISS index built, size=%d", manager.get_index_size())
     else:
@@ -2,7 +2,7 @@
 导入游戏原始元数据到数据库的脚本。
 
 功能：
-- 逐行读取原始游戏数据文件（本地为 `steam_games copy.json`，每行一个 Python 风格字典）。
+- 逐行读取原始游戏数据文件（本地为 `steam_games copy.json`，每行一个 Python 风格字典，也支持 JSON 行）。
 - 可选读取 item_id_map.json，仅导入在映射内的游戏，保证与向量 ID 对齐。
 - 批量插入到 `game_metadata` 表（如已存在同 product_id 则跳过）。
 
@@ -12,19 +12,28 @@
 环境变量（可选）：
     GAME_JSON_PATH   默认 d:\\学科实践\\steam_games copy.json
     ITEM_MAP_PATH    如果提供，则仅导入映射内的 product_id（索引->原始ID）
-    DB_BATCH_SIZE    默认 1000
+    DB_BATCH_SIZE    默认 10000，每批写入的行数
+    COMMIT_EVERY_BATCHES  默认 5，每写入多少批提交一次事务
+    PARSE_WORKERS    默认 CPU 核数，并行解析原始行的进程数
+    PARSE_CHUNK_BYTES  默认 16777216（16MB），每个解析任务覆盖的字节数（按行边界对齐）
 """
 
 import asyncio
 import ast
 import json
 import logging
+import mmap
 import os
-from typing import Dict, Iterable, List, Optional, Set
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from sqlalchemy import select
+import orjson
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 import backend.database.connection as db_conn
 from backend.database.models import GameMetadata
@@ -33,7 +42,14 @@ logger = logging.getLogger(__name__)
 
 GAME_JSON_PATH = os.getenv("GAME_JSON_PATH", r"d:\学科实践\steam_games copy.json")
 ITEM_MAP_PATH = os.getenv("ITEM_MAP_PATH", "")
-DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "1000"))
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "10000"))
+COMMIT_EVERY_BATCHES = max(1, int(os.getenv("COMMIT_EVERY_BATCHES", "5")))
+PARSE_WORKERS = max(1, int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1))))
+PARSE_CHUNK_BYTES = int(os.getenv("PARSE_CHUNK_BYTES", str(16 * 1024 * 1024)))
+
+# 解析工作进程内的状态（由 _init_parse_worker 设置）
+_worker_allowed_ids: Set[int] = set()
+_worker_mmap: Optional[mmap.mmap] = None
 UPSERT_EXISTING = os.getenv("UPSERT_EXISTING", "").lower() not in ("", "0", "false")
 
 
@@ -55,15 +71,37 @@ def _load_item_map(path: str) -> Set[int]:
     return ids
 
 
+def _parse_line(line: str) -> Dict:
+    """
+    解析一行原始数据。
+
+    JSON 格式的行（以 `{"` 开头）走 orjson 快速路径；Python 风格字典（单引号、
+    True/None 等）或 JSON 解析失败时回退到 ast.literal_eval。
+    """
+    if line.startswith('{"'):
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass
+    return ast.literal_eval(line)
+
+
 def _to_comma_str(value: Optional[Iterable[str]]) -> Optional[str]:
     if not value:
         return None
-    return ",".join([str(v).strip() for v in value if str(v).strip()])
+    # 每个元素只做一次 str/strip
+    return ",".join([s for s in (str(v).strip() for v in value) if s])
 
 
 def _parse_price(raw_price) -> Optional[float]:
     if raw_price is None:
         return None
+    # 常见情况：已是数值
+    raw_type = type(raw_price)
+    if raw_type is float:
+        return raw_price
+    if raw_type is int:
+        return float(raw_price)
     # 字符串里含 Free/Free to Play 等视为 0
     if isinstance(raw_price, str):
         lower = raw_price.lower()
@@ -107,7 +145,8 @@ def _normalize_record(raw: Dict, allowed_ids: Set[int]) -> Optional[Dict]:
     将原始行转换为 GameMetadata 可接受的字段字典。
     如果不在 allowed_ids 且 allowed_ids 非空，则返回 None。
     """
-    pid_raw = raw.get("id")
+    get = raw.get
+    pid_raw = get("id")
     if pid_raw is None:
         return None
     try:
@@ -118,134 +157,210 @@ def _normalize_record(raw: Dict, allowed_ids: Set[int]) -> Optional[Dict]:
     if allowed_ids and product_id not in allowed_ids:
         return None
 
-    title = raw.get("title") or raw.get("app_name") or str(product_id)
-    app_name = raw.get("app_name") or title
-    genres = _to_comma_str(raw.get("genres"))
-    tags = _to_comma_str(raw.get("tags"))
-    developer = raw.get("developer")
-    publisher = raw.get("publisher")
-    metascore = _parse_metascore(raw.get("metascore"))
-    sentiment = raw.get("sentiment")
-    release_date = _normalize_release_date(raw.get("release_date"))
-    price = _parse_price(raw.get("price"))
-    discount_price = _parse_price(raw.get("discount_price"))
-    description = raw.get("description")
-    short_description = raw.get("short_description")
-    specs = _to_comma_str(raw.get("specs"))
-    url = raw.get("url")
-    reviews_url = raw.get("reviews_url")
-    early_access = bool(raw.get("early_access")) if raw.get("early_access") is not None else None
+    app_name = get("app_name")
+    title = get("title") or app_name or str(product_id)
+    early_access = get("early_access")
 
     return {
         "product_id": product_id,
         "title": title,
-        "app_name": app_name,
-        "genres": genres,
-        "tags": tags,
-        "developer": developer,
-        "publisher": publisher,
-        "metascore": metascore,
-        "sentiment": sentiment,
-        "release_date": release_date,
-        "price": price,
-        "discount_price": discount_price,
-        "description": description,
-        "short_description": short_description,
-        "specs": specs,
-        "url": url,
-        "reviews_url": reviews_url,
-        "early_access": early_access,
+        "app_name": app_name or title,
+        "genres": _to_comma_str(get("genres")),
+        "tags": _to_comma_str(get("tags")),
+        "developer": get("developer"),
+        "publisher": get("publisher"),
+        "metascore": _parse_metascore(get("metascore")),
+        "sentiment": get("sentiment"),
+        "release_date": _normalize_release_date(get("release_date")),
+        "price": _parse_price(get("price")),
+        "discount_price": _parse_price(get("discount_price")),
+        "description": get("description"),
+        "short_description": get("short_description"),
+        "specs": _to_comma_str(get("specs")),
+        "url": get("url"),
+        "reviews_url": get("reviews_url"),
+        "early_access": bool(early_access) if early_access is not None else None,
     }
 
 
-async def _load_existing_ids(session: AsyncSession) -> Set[int]:
-    stmt = select(GameMetadata.product_id)
-    result = await session.execute(stmt)
-    return set(result.scalars().all())
+def _insert_ignore_stmt(session: AsyncSession):
+    """
+    构造"主键已存在则跳过"的 INSERT 语句，由数据库在主键索引上直接判重：
+    MySQL 用 INSERT IGNORE，PostgreSQL / SQLite 用 ON CONFLICT DO NOTHING。
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        return mysql_insert(GameMetadata).prefix_with("IGNORE")
+    if dialect == "postgresql":
+        return pg_insert(GameMetadata).on_conflict_do_nothing(index_elements=["product_id"])
+    if dialect == "sqlite":
+        return sqlite_insert(GameMetadata).on_conflict_do_nothing(index_elements=["product_id"])
+    return insert(GameMetadata)
 
 
 async def _bulk_insert(session: AsyncSession, rows: List[Dict]) -> int:
+    """
+    批量插入，已存在的 product_id 由数据库跳过；返回实际插入的行数。
+    insert() 配合参数列表，由驱动合并为多行 VALUES，不为每行构造 ORM 对象。
+    不提交事务，由调用方按 COMMIT_EVERY_BATCHES 统一提交。
+    """
     if not rows:
         return 0
-    session.add_all([GameMetadata(**row) for row in rows])
-    await session.commit()
-    return len(rows)
+    result = await session.execute(_insert_ignore_stmt(session), rows)
+    # 部分驱动的 executemany 不返回影响行数，此时按全部插入计
+    return result.rowcount if result.rowcount >= 0 else len(rows)
 
 
 async def _bulk_upsert(session: AsyncSession, rows: List[Dict]) -> int:
     """
     使用 MySQL ON DUPLICATE KEY UPDATE 进行批量插入/更新。
+    以参数列表执行，驱动按 max_allowed_packet 以内的长度拆成若干条多行 VALUES，
+    大批量时不会拼出超长的单条语句。不提交事务，由调用方统一提交。
     """
     if not rows:
         return 0
-    stmt = mysql_insert(GameMetadata).values(rows)
+    stmt = mysql_insert(GameMetadata)
     update_cols = {
         c.name: stmt.inserted[c.name]
         for c in GameMetadata.__table__.columns
         if c.name != "product_id"
     }
     upsert_stmt = stmt.on_duplicate_key_update(**update_cols)
-    await session.execute(upsert_stmt)
-    await session.commit()
+    await session.execute(upsert_stmt, rows)
     return len(rows)
 
 
+def _init_parse_worker(allowed_ids: Set[int], path: str) -> None:
+    """
+    解析进程初始化：allowed_ids 每个进程只传一次，不随每个分块重复序列化；
+    数据文件在进程内只读映射一次，任务只需传递字节区间。
+    """
+    global _worker_allowed_ids, _worker_mmap
+    _worker_allowed_ids = allowed_ids
+    with open(path, "rb") as f:
+        _worker_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _parse_and_normalize_chunk(lines: List[str]) -> Tuple[List[Dict], int, int]:
+    """
+    在工作进程中解析并规范化一块原始行。
+
+    Returns:
+        (规范化后的记录列表, 被过滤/无效的行数, 解析失败的行数)
+    """
+    records: List[Dict] = []
+    skipped_filter = 0
+    parse_errors = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            raw = _parse_line(line)
+        except Exception:
+            parse_errors += 1
+            continue
+
+        record = _normalize_record(raw, _worker_allowed_ids)
+        if not record:
+            skipped_filter += 1
+            continue
+        records.append(record)
+    return records, skipped_filter, parse_errors
+
+
+def _parse_and_normalize_range(start: int, end: int) -> Tuple[List[Dict], int, int]:
+    """在工作进程中解析映射文件 [start, end) 字节区间内的行。"""
+    lines = _worker_mmap[start:end].decode("utf-8").split("\n")
+    return _parse_and_normalize_chunk(lines)
+
+
+def _iter_line_ranges(path: str, chunk_bytes: int) -> Iterator[Tuple[int, int]]:
+    """
+    将文件切分为约 chunk_bytes 大小、以换行结尾的字节区间。
+
+    只读映射文件后用 mmap.find 定位每个区间后的第一个换行（C 层 memchr），
+    主进程不逐行读取、也不复制文件内容。
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            newline = mm.find(b"\n", min(start + chunk_bytes, size) - 1)
+            end = size if newline < 0 else newline + 1
+            yield start, end
+            start = end
+
+
 async def main() -> None:
     logging.basicConfig(level=logging.INFO)
-    logger.info("Starting import from %s", GAME_JSON_PATH)
+    logger.info("Starting import from %s (parse_workers=%d)", GAME_JSON_PATH, PARSE_WORKERS)
     await db_conn.init_db()
 
     allowed_ids = _load_item_map(ITEM_MAP_PATH)
+    loop = asyncio.get_running_loop()
 
     async with db_conn.async_session_maker() as session:
-        existing_ids: Set[int] = set()
-        if not UPSERT_EXISTING:
-            existing_ids = await _load_existing_ids(session)
-            logger.info("Existing rows in game_metadata: %d", len(existing_ids))
-
         to_write: List[Dict] = []
         inserted = 0
         updated = 0
         skipped_existing = 0
         skipped_filter = 0
         parse_errors = 0
+        pending_batches = 0
 
-        with open(GAME_JSON_PATH, "r", encoding="utf-8") as f:
-            for line_no, line in enumerate(f, start=1):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    raw = ast.literal_eval(line)
-                except Exception:
-                    parse_errors += 1
-                    continue
-
-                record = _normalize_record(raw, allowed_ids)
-                if not record:
-                    skipped_filter += 1
-                    continue
-
-                pid = record["product_id"]
-                if not UPSERT_EXISTING and pid in existing_ids:
-                    skipped_existing += 1
-                    continue
-
-                to_write.append(record)
-
-                if len(to_write) >= DB_BATCH_SIZE:
-                    if UPSERT_EXISTING:
-                        updated += await _bulk_upsert(session, to_write)
-                    else:
-                        inserted += await _bulk_insert(session, to_write)
-                        existing_ids.update([r["product_id"] for r in to_write])
-                    to_write = []
-
-        if to_write:
+        async def write_batch(rows: List[Dict]) -> None:
+            nonlocal inserted, updated, skipped_existing, pending_batches
             if UPSERT_EXISTING:
-                updated += await _bulk_upsert(session, to_write)
+                updated += await _bulk_upsert(session, rows)
             else:
-                inserted += await _bulk_insert(session, to_write)
+                written = await _bulk_insert(session, rows)
+                inserted += written
+                skipped_existing += len(rows) - written
+
+            # 多批合并提交，减少事务提交（刷盘）次数
+            pending_batches += 1
+            if pending_batches >= COMMIT_EVERY_BATCHES:
+                await session.commit()
+                pending_batches = 0
+
+        # 解析与规范化交给进程池并行执行；主协程写库期间，工作进程继续解析后续分块。
+        # 在途分块数限制为进程数的两倍，避免解析结果在内存中堆积。
+        with ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            initializer=_init_parse_worker,
+            initargs=(allowed_ids, GAME_JSON_PATH),
+        ) as executor:
+            ranges = _iter_line_ranges(GAME_JSON_PATH, PARSE_CHUNK_BYTES)
+            in_flight: Deque[asyncio.Future] = deque()
+
+            def submit_next() -> None:
+                byte_range = next(ranges, None)
+                if byte_range is not None:
+                    in_flight.append(loop.run_in_executor(executor, _parse_and_normalize_range, *byte_range))
+
+            for _ in range(PARSE_WORKERS * 2):
+                submit_next()
+
+            # 按提交顺序取回结果，保持与文件相同的写入顺序
+            while in_flight:
+                records, chunk_skipped, chunk_errors = await in_flight.popleft()
+                submit_next()
+
+                skipped_filter += chunk_skipped
+                parse_errors += chunk_errors
+                to_write.extend(records)
+
+                while len(to_write) >= DB_BATCH_SIZE:
+                    await write_batch(to_write[:DB_BATCH_SIZE])
+                    del to_write[:DB_BATCH_SIZE]
+
+        if to_write:
+            await write_batch(to_write)
+
+        await session.commit()
 
         logger.info(
             "Import finished. inserted=%d, updated_or_upserted=%d, skipped_existing=%d, skipped_filter_or_invalid=%d, parse_errors=%d",
@@ -259,4 +374,3 @@ async def main() -> None:
 
 if __name__ == "__main__":
     asyncio.run(main())
-
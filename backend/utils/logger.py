@@ -3,6 +3,7 @@
 提供便捷的日志记录方法
 """
 
+import asyncio
 import logging
 import time
 import functools
@@ -11,6 +12,15 @@ from contextlib import contextmanager
 
 from backend.logging_config import get_logger
 
+# 各日志辅助函数使用的记录器，导入时获取一次，避免每次调用都经过 getLogger 的加锁查找
+_PERF_LOGGER = get_logger(__name__)
+_REQUEST_LOGGER = get_logger('backend.api.request')
+_SLOW_REQUEST_LOGGER = get_logger('backend.api.slow_request')
+_DB_LOGGER = get_logger('backend.database.operation')
+_CACHE_LOGGER = get_logger('backend.cache.operation')
+_RECOMMENDATION_LOGGER = get_logger('backend.recommendation')
+_AUTH_LOGGER = get_logger('backend.auth.audit')
+
 
 class LoggerMixin:
     """日志混入类，可以添加到任何类中"""
@@ -32,32 +42,37 @@ def log_function_call(log_args: bool = False, log_result: bool = False, log_dura
     """
     def decorator(func: Callable) -> Callable:
         logger = get_logger(func.__module__)
+        func_name = f"{func.__module__}.{func.__name__}"
         
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
-            start_time = time.time()
-            func_name = f"{func.__module__}.{func.__name__}"
+            start_ns = time.perf_counter_ns()
+            
+            # 调试日志关闭时跳过参数、返回值的格式化，只保留失败日志
+            debug = logger.isEnabledFor(logging.DEBUG)
             
             try:
-                if log_args:
-                    # 脱敏敏感参数
-                    safe_kwargs = {k: v for k, v in kwargs.items() if k not in ['password', 'password_hash']}
-                    logger.debug(f"Calling {func_name} with args={args}, kwargs={safe_kwargs}")
-                else:
-                    logger.debug(f"Calling {func_name}")
+                if debug:
+                    if log_args:
+                        # 脱敏敏感参数
+                        safe_kwargs = {k: v for k, v in kwargs.items() if k not in ['password', 'password_hash']}
+                        logger.debug(f"Calling {func_name} with args={args}, kwargs={safe_kwargs}")
+                    else:
+                        logger.debug(f"Calling {func_name}")
                 
                 result = await func(*args, **kwargs)
                 
-                if log_duration:
-                    duration = (time.time() - start_time) * 1000
-                    logger.debug(f"{func_name} completed in {duration:.2f}ms")
-                
-                if log_result:
-                    logger.debug(f"{func_name} returned: {result}")
+                if debug:
+                    if log_duration:
+                        duration = (time.perf_counter_ns() - start_ns) / 1e6
+                        logger.debug(f"{func_name} completed in {duration:.2f}ms")
+                    
+                    if log_result:
+                        logger.debug(f"{func_name} returned: {result}")
                 
                 return result
             except Exception as e:
-                duration = (time.time() - start_time) * 1000
+                duration = (time.perf_counter_ns() - start_ns) / 1e6
                 logger.error(
                     f"{func_name} failed after {duration:.2f}ms: {str(e)}",
                     exc_info=True
@@ -66,36 +81,41 @@ def log_function_call(log_args: bool = False, log_result: bool = False, log_dura
         
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
-            start_time = time.time()
-            func_name = f"{func.__module__}.{func.__name__}"
+            start_ns = time.perf_counter_ns()
+            
+            # 调试日志关闭时跳过参数、返回值的格式化，只保留失败日志
+            debug = logger.isEnabledFor(logging.DEBUG)
             
             try:
-                if log_args:
-                    safe_kwargs = {k: v for k, v in kwargs.items() if k not in ['password', 'password_hash']}
-                    logger.debug(f"Calling {func_name} with args={args}, kwargs={safe_kwargs}")
-                else:
-                    logger.debug(f"Calling {func_name}")
+                if debug:
+                    if log_args:
+                        # 脱敏敏感参数
+                        safe_kwargs = {k: v for k, v in kwargs.items() if k not in ['password', 'password_hash']}
+                        logger.debug(f"Calling {func_name} with args={args}, kwargs={safe_kwargs}")
+                    else:
+                        logger.debug(f"Calling {func_name}")
                 
                 result = func(*args, **kwargs)
                 
-                if log_duration:
-                    duration = (time.time() - start_time) * 1000
-                    logger.debug(f"{func_name} completed in {duration:.2f}ms")
-                
-                if log_result:
-                    logger.debug(f"{func_name} returned: {result}")
+                if debug:
+                    if log_duration:
+                        duration = (time.perf_counter_ns() - start_ns) / 1e6
+                        logger.debug(f"{func_name} completed in {duration:.2f}ms")
+                    
+                    if log_result:
+                        logger.debug(f"{func_name} returned: {result}")
                 
                 return result
             except Exception as e:
-                duration = (time.time() - start_time) * 1000
+                duration = (time.perf_counter_ns() - start_ns) / 1e6
                 logger.error(
                     f"{func_name} failed after {duration:.2f}ms: {str(e)}",
                     exc_info=True
                 )
                 raise
         
-        # 判断是否为异步函数
-        if hasattr(func, '__code__') and 'async' in str(func.__code__.co_flags):
+        # 判断是否为异步函数（装饰时判断一次）
+        if asyncio.iscoroutinefunction(func):
             return async_wrapper
         else:
             return sync_wrapper
@@ -114,15 +134,15 @@ def log_performance(operation_name: str, logger: Optional[logging.Logger] = None
             result = await db.query(...)
     """
     if logger is None:
-        logger = get_logger(__name__)
+        logger = _PERF_LOGGER
     
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     logger.info(f"Starting {operation_name}", extra=extra_fields)
     
     try:
         yield
     except Exception as e:
-        duration = (time.time() - start_time) * 1000
+        duration = (time.perf_counter_ns() - start_ns) / 1e6
         logger.error(
             f"{operation_name} failed after {duration:.2f}ms: {str(e)}",
             exc_info=True,
@@ -130,7 +150,7 @@ def log_performance(operation_name: str, logger: Optional[logging.Logger] = None
         )
         raise
     else:
-        duration = (time.time() - start_time) * 1000
+        duration = (time.perf_counter_ns() - start_ns) / 1e6
         logger.info(
             f"{operation_name} completed in {duration:.2f}ms",
             extra={**extra_fields, 'duration_ms': duration}
@@ -160,7 +180,7 @@ def log_request(
         request_id: 请求ID
         **kwargs: 其他字段
     """
-    logger = get_logger('backend.api.request')
+    logger = _REQUEST_LOGGER
     
     extra = {
         'method': method,
@@ -177,12 +197,13 @@ def log_request(
     if request_id:
         extra['request_id'] = request_id
     
+    # %-风格参数由 logging 延迟格式化，记录被级别过滤时不构造消息字符串
     if status_code >= 500:
-        logger.error(f"{method} {path} - {status_code} - {duration_ms:.2f}ms", extra=extra)
+        logger.error("%s %s - %s - %.2fms", method, path, status_code, duration_ms, extra=extra)
     elif status_code >= 400:
-        logger.warning(f"{method} {path} - {status_code} - {duration_ms:.2f}ms", extra=extra)
+        logger.warning("%s %s - %s - %.2fms", method, path, status_code, duration_ms, extra=extra)
     else:
-        logger.info(f"{method} {path} - {status_code} - {duration_ms:.2f}ms", extra=extra)
+        logger.info("%s %s - %s - %.2fms", method, path, status_code, duration_ms, extra=extra)
 
 
 def log_slow_request(
@@ -203,9 +224,9 @@ def log_slow_request(
         **kwargs: 其他字段
     """
     if duration_ms > threshold:
-        logger = get_logger('backend.api.slow_request')
+        logger = _SLOW_REQUEST_LOGGER
         logger.warning(
-            f"Slow request: {method} {path} took {duration_ms:.2f}ms (threshold: {threshold}ms)",
+            "Slow request: %s %s took %.2fms (threshold: %sms)", method, path, duration_ms, threshold,
             extra={'method': method, 'path': path, 'duration_ms': duration_ms, **kwargs}
         )
 
@@ -229,7 +250,7 @@ def log_database_operation(
         error: 错误信息
         **kwargs: 其他字段
     """
-    logger = get_logger('backend.database.operation')
+    logger = _DB_LOGGER
     
     extra = {
         'operation': operation,
@@ -240,9 +261,9 @@ def log_database_operation(
     }
     
     if success:
-        logger.debug(f"DB {operation} on {table} - {duration_ms:.2f}ms", extra=extra)
+        logger.debug("DB %s on %s - %.2fms", operation, table, duration_ms, extra=extra)
     else:
-        logger.error(f"DB {operation} on {table} failed: {error}", extra=extra)
+        logger.error("DB %s on %s failed: %s", operation, table, error, extra=extra)
 
 
 def log_cache_operation(
@@ -262,7 +283,7 @@ def log_cache_operation(
         duration_ms: 操作耗时（毫秒）
         **kwargs: 其他字段
     """
-    logger = get_logger('backend.cache.operation')
+    logger = _CACHE_LOGGER
     
     extra = {
         'operation': operation,
@@ -276,10 +297,9 @@ def log_cache_operation(
         extra['duration_ms'] = duration_ms
     
     if operation == 'GET' and hit is not None:
-        status = "HIT" if hit else "MISS"
-        logger.debug(f"Cache {operation} {key} - {status}", extra=extra)
+        logger.debug("Cache %s %s - %s", operation, key, "HIT" if hit else "MISS", extra=extra)
     else:
-        logger.debug(f"Cache {operation} {key}", extra=extra)
+        logger.debug("Cache %s %s", operation, key, extra=extra)
 
 
 def log_recommendation(
@@ -305,7 +325,7 @@ def log_recommendation(
         from_cache: 是否来自缓存
         **kwargs: 其他字段
     """
-    logger = get_logger('backend.recommendation')
+    logger = _RECOMMENDATION_LOGGER
     
     extra = {
         'user_id': user_id,
@@ -321,10 +341,9 @@ def log_recommendation(
     if ranking_time_ms is not None:
         extra['ranking_time_ms'] = ranking_time_ms
     
-    cache_status = "cache" if from_cache else "compute"
     logger.info(
-        f"Recommendation for user {user_id} using {algorithm} ({cache_status}): "
-        f"{recommendations_count} items in {total_time_ms:.2f}ms",
+        "Recommendation for user %s using %s (%s): %s items in %.2fms",
+        user_id, algorithm, "cache" if from_cache else "compute", recommendations_count, total_time_ms,
         extra=extra
     )
 
@@ -350,7 +369,7 @@ def log_auth_event(
         reason: 失败原因
         **kwargs: 其他字段
     """
-    logger = get_logger('backend.auth.audit')
+    logger = _AUTH_LOGGER
     
     extra = {
         'event_type': event_type,
@@ -0,0 +1,58 @@
+-- 数据库迁移脚本：为 game_metadata 添加类型/标签数组列（仅 PostgreSQL）
+-- 说明: genres/tags 以逗号分隔字符串存储，离线任务每次运行都要在 Python 中 split/strip。
+--       新增 genres_array / tags_array (TEXT[]) 列，由触发器在写入时自动维护，
+--       asyncpg 可直接把 TEXT[] 解码为 Python 列表。
+
+-- ============================================
+-- 1. 添加数组列
+-- ============================================
+ALTER TABLE game_metadata ADD COLUMN IF NOT EXISTS genres_array TEXT[];
+ALTER TABLE game_metadata ADD COLUMN IF NOT EXISTS tags_array TEXT[];
+
+-- ============================================
+-- 2. 逗号分隔字符串 -> 去空白、去空项的数组
+-- ============================================
+CREATE OR REPLACE FUNCTION split_category_list(value TEXT)
+RETURNS TEXT[] AS $$
+    SELECT COALESCE(
+        ARRAY(
+            SELECT btrim(item)
+            FROM unnest(string_to_array(value, ',')) WITH ORDINALITY AS t(item, ord)
+            WHERE btrim(item) <> ''
+            ORDER BY ord
+        ),
+        ARRAY[]::TEXT[]
+    );
+$$ LANGUAGE sql IMMUTABLE;
+
+-- ============================================
+-- 3. 触发器：写入 genres/tags 时同步数组列
+-- ============================================
+CREATE OR REPLACE FUNCTION sync_game_metadata_arrays()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.genres_array = split_category_list(NEW.genres);
+    NEW.tags_array = split_category_list(NEW.tags);
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS sync_game_metadata_arrays ON game_metadata;
+CREATE TRIGGER sync_game_metadata_arrays
+    BEFORE INSERT OR UPDATE OF genres, tags ON game_metadata
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_game_metadata_arrays();
+
+-- ============================================
+-- 4. 回填已有数据
+-- ============================================
+UPDATE game_metadata
+SET genres_array = split_category_list(genres),
+    tags_array = split_category_list(tags);
+
+-- ============================================
+-- 5. 验证
+-- ============================================
+SELECT product_id, genres, genres_array, tags_array
+FROM game_metadata
+LIMIT 5;
@@ -7,113 +7,200 @@ import sys
 import random
 import time
 import logging
+from functools import lru_cache
 from typing import List, Dict
 from pathlib import Path
 import numpy as np
+from sqlalchemy import insert, select
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from backend.database.connection import init_db, get_db_session
-from backend.database.crud.user_crud import create_user, create_user_interaction
+import backend.database.connection as db_conn
+from backend.database.connection import init_db
+from backend.database.models import User, UserInteraction
 from backend.cache.redis_client import init_redis
 from backend.cache.feature_store import FeatureStore
-from backend.auth.password_utils import hash_password
+from backend.auth.password_utils import pwd_context
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 交互数据每批写入的行数
+INTERACTION_BATCH_SIZE = 5000
+
+# 用户写入的并发块数上限（需不超过数据库连接池大小）及每块最少行数
+USER_INSERT_CONCURRENCY = 4
+USER_INSERT_MIN_CHUNK = 1000
+
+# 热门榜单保留的游戏数
+POPULAR_GAMES_LIMIT = 500
+
+# 示例数据的随机种子：各生成函数各自持有以此播种的随机数生成器，
+# 多次运行（以及各阶段并发执行时）生成的数据保持一致
+SAMPLE_SEED = 42
+
+# 示例用户的统一密码及其 bcrypt 轮数（仅用于开发/示例数据，取 bcrypt 允许的最小值；
+# 正式注册流程仍使用 password_utils 的默认轮数）
+SAMPLE_PASSWORD = "password123"
+SAMPLE_BCRYPT_ROUNDS = 4
+
+
+@lru_cache(maxsize=None)
+def sample_password_hash() -> str:
+    """示例用户的密码哈希（仅限开发/示例数据：低轮数 bcrypt，进程内只计算一次）"""
+    return pwd_context.copy(bcrypt__rounds=SAMPLE_BCRYPT_ROUNDS).hash(SAMPLE_PASSWORD)
+
 
 async def create_sample_users(db_session, num_users: int = 100) -> List[int]:
-    """创建示例用户"""
+    """
+    创建示例用户
+    
+    所有示例用户密码相同，密码哈希只计算一次（见 sample_password_hash）；已存在的用户名跳过，
+    其余用户切分为至多 USER_INSERT_CONCURRENCY 块，每块在连接池的独立会话中
+    批量 INSERT 并取回新用户的 ID，各块并发执行。
+    """
     logger.info(f"Creating {num_users} sample users...")
     
-    user_ids = []
+    password_hash = sample_password_hash()
+    usernames = [f"user_{i+1:04d}" for i in range(num_users)]
     
-    for i in range(num_users):
-        try:
-            user = await create_user(
-                db=db_session,
-                username=f"user_{i+1:04d}",
-                email=f"user{i+1:04d}@example.com",
-                password_hash=hash_password("password123")
-            )
-            user_ids.append(user.user_id)
-            
-            if (i + 1) % 20 == 0:
-                logger.info(f"Created {i + 1} users...")
-                
-        except Exception as e:
-            logger.error(f"Failed to create user {i+1}: {e}")
+    # 已存在的示例用户（重复运行脚本时）跳过，不为其重复生成交互数据
+    result = await db_session.execute(select(User.username).where(User.username.in_(usernames)))
+    existing = set(result.scalars())
+    if existing:
+        logger.info(f"Skipping {len(existing)} existing users")
+    
+    rows = [
+        {
+            "username": username,
+            "email": f"user{i+1:04d}@example.com",
+            "password_hash": password_hash,
+        }
+        for i, username in enumerate(usernames)
+        if username not in existing
+    ]
+    if not rows:
+        return []
+    
+    # 块数不超过并发上限，每块至少 USER_INSERT_MIN_CHUNK 行（小数据量时只有一块）
+    chunk_size = max(USER_INSERT_MIN_CHUNK, -(-len(rows) // USER_INSERT_CONCURRENCY))
+    chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+    
+    results = await asyncio.gather(*(_insert_user_chunk(chunk) for chunk in chunks))
+    user_ids = sorted(user_id for chunk_ids in results for user_id in chunk_ids)
     
     logger.info(f"Successfully created {len(user_ids)} users")
     return user_ids
 
 
+async def _insert_user_chunk(rows: List[Dict]) -> List[int]:
+    """在独立会话中批量写入一块用户并返回其 ID"""
+    async with db_conn.async_session_maker() as session:
+        try:
+            await session.execute(insert(User), rows)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Failed to create {len(rows)} sample users: {e}")
+            return []
+        
+        usernames = [row["username"] for row in rows]
+        result = await session.execute(select(User.user_id).where(User.username.in_(usernames)))
+        return list(result.scalars())
+
+
 async def create_sample_interactions(db_session, user_ids: List[int], num_games: int = 1000):
     """创建示例交互数据"""
     logger.info(f"Creating sample interactions for {len(user_ids)} users and {num_games} games...")
     
+    rng = np.random.default_rng(SAMPLE_SEED)
     current_time = int(time.time())
     interaction_count = 0
+    rows: List[Dict] = []
     
-    for user_id in user_ids:
-        # 每个用户随机交互5-50个游戏
-        num_interactions = random.randint(5, 50)
+    # 进度日志按总量的 5% 输出一次，不再每 10 个用户一次
+    report_every = max(1, len(user_ids) // 20)
+    log_progress = logger.isEnabledFor(logging.INFO)
+    
+    try:
+        for idx, user_id in enumerate(user_ids, 1):
+            # 每个用户随机交互5-50个游戏
+            num_interactions = int(rng.integers(5, 50, endpoint=True))
+            
+            # 随机选择游戏（不放回），并整体生成该用户的各列随机值
+            interacted_games = rng.choice(num_games, size=num_interactions, replace=False) + 1
+            
+            # 生成随机时间戳（过去30天内），第 i 条交互顺延 i 小时
+            timestamps = (
+                current_time
+                - rng.integers(0, 30 * 24 * 3600, size=num_interactions, endpoint=True)
+                + np.arange(num_interactions) * 3600
+            )
+            
+            # 生成随机游玩时长
+            play_hours = rng.uniform(0.5, 100.0, size=num_interactions)
+            early_access = rng.random(num_interactions) < 0.5
+            
+            rows.extend(
+                {
+                    "user_id": user_id,
+                    "product_id": game_id,
+                    "timestamp": timestamp,
+                    "play_hours": hours,
+                    "early_access": flag,
+                }
+                for game_id, timestamp, hours, flag in zip(
+                    interacted_games.tolist(), timestamps.tolist(),
+                    play_hours.tolist(), early_access.tolist()
+                )
+            )
+            
+            # 攒够一批再写入：每批一条多行 INSERT，整个过程只提交一次
+            if len(rows) >= INTERACTION_BATCH_SIZE:
+                await db_session.execute(insert(UserInteraction), rows)
+                interaction_count += len(rows)
+                rows = []
+            
+            if log_progress and idx % report_every == 0:
+                logger.info("Created interactions for %d/%d users...", idx, len(user_ids))
         
-        # 随机选择游戏
-        interacted_games = random.sample(range(1, num_games + 1), num_interactions)
+        if rows:
+            await db_session.execute(insert(UserInteraction), rows)
+            interaction_count += len(rows)
         
-        for i, game_id in enumerate(interacted_games):
-            try:
-                # 生成随机时间戳（过去30天内）
-                timestamp = current_time - random.randint(0, 30 * 24 * 3600) + i * 3600
-                
-                # 生成随机游玩时长
-                play_hours = random.uniform(0.5, 100.0)
-                
-                await create_user_interaction(
-                    db=db_session,
-                    user_id=user_id,
-                    product_id=game_id,
-                    timestamp=timestamp,
-                    play_hours=play_hours,
-                    early_access=random.choice([True, False])
-                )
-                
-                interaction_count += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to create interaction for user {user_id}, game {game_id}: {e}")
+        await db_session.commit()
         
-        if user_id % 10 == 0:
-            logger.info(f"Created interactions for {user_id} users...")
+    except Exception as e:
+        await db_session.rollback()
+        logger.error(f"Failed to create sample interactions: {e}")
+        return
     
     logger.info(f"Successfully created {interaction_count} interactions")
 
 
+def _random_unit_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    """生成 (count, dim) 的随机 float32 矩阵，每行 L2 归一化"""
+    matrix = rng.normal(0, 0.1, size=(count, dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
 async def load_sample_embeddings(feature_store: FeatureStore, num_users: int, num_games: int):
     """加载示例嵌入向量"""
     logger.info(f"Loading sample embeddings for {num_users} users and {num_games} games...")
     
     embedding_dim = 64
     
-    # 生成用户嵌入
-    user_embeddings = {}
-    for user_id in range(1, num_users + 1):
-        # 生成随机嵌入向量
-        embedding = np.random.normal(0, 0.1, embedding_dim).astype(np.float32)
-        # 归一化
-        embedding = embedding / np.linalg.norm(embedding)
-        user_embeddings[user_id] = embedding
+    # 生成用户嵌入：整个矩阵一次生成并按行归一化，字典的值为矩阵各行的视图
+    rng = np.random.default_rng(SAMPLE_SEED)
+    user_matrix = _random_unit_vectors(rng, num_users, embedding_dim)
+    user_embeddings = dict(zip(range(1, num_users + 1), user_matrix))
     
     # 生成物品嵌入
-    item_embeddings = {}
-    for item_id in range(1, num_games + 1):
-        embedding = np.random.normal(0, 0.1, embedding_dim).astype(np.float32)
-        embedding = embedding / np.linalg.norm(embedding)
-        item_embeddings[item_id] = embedding
+    item_matrix = _random_unit_vectors(rng, num_games, embedding_dim)
+    item_embeddings = dict(zip(range(1, num_games + 1), item_matrix))
     
     # 缓存嵌入向量
     await feature_store.cache_embeddings(
@@ -130,17 +217,17 @@ async def load_sample_popular_games(feature_store: FeatureStore, num_games: int)
     logger.info("Loading sample popular games...")
     
     # 生成热门游戏列表（基于随机分数）
-    popular_games = []
-    for game_id in range(1, num_games + 1):
-        # 使用幂律分布生成分数，使得少数游戏非常热门
-        score = random.paretovariate(1.5) * 1000
-        popular_games.append((game_id, score))
+    # 使用幂律分布生成分数，使得少数游戏非常热门（numpy 的 pareto 为 Lomax 分布，加 1 即 Pareto）
+    rng = np.random.default_rng(SAMPLE_SEED)
+    scores = (rng.pareto(1.5, size=num_games) + 1) * 1000
     
-    # 按分数排序
-    popular_games.sort(key=lambda x: x[1], reverse=True)
+    # 只保留前500个：先 O(N) 部分选择，再仅对这 500 个按分数降序排序
+    top = np.arange(num_games)
+    if num_games > POPULAR_GAMES_LIMIT:
+        top = np.argpartition(-scores, POPULAR_GAMES_LIMIT)[:POPULAR_GAMES_LIMIT]
+    top = top[np.argsort(-scores[top])]
     
-    # 只保留前500个
-    popular_games = popular_games[:500]
+    popular_games = list(zip((top + 1).tolist(), scores[top].tolist()))
     
     await feature_store.update_popular_games(popular_games)
     
@@ -151,24 +238,27 @@ async def load_sample_game_metadata(feature_store: FeatureStore, num_games: int)
     """加载示例游戏元数据"""
     logger.info(f"Loading sample game metadata for {num_games} games...")
     
+    rng = random.Random(SAMPLE_SEED)
     genres = ["Action", "Adventure", "RPG", "Strategy", "Simulation", "Sports", "Racing", "Puzzle"]
     developers = ["Studio A", "Studio B", "Studio C", "Indie Dev", "Big Corp", "Creative Team"]
     
+    metadata_by_game = {}
     for game_id in range(1, min(num_games + 1, 100)):  # 只为前100个游戏加载元数据
-        metadata = {
+        metadata_by_game[game_id] = {
             "title": f"Awesome Game {game_id}",
             "app_name": f"awesome_game_{game_id}",
-            "genres": random.sample(genres, random.randint(1, 3)),
+            "genres": rng.sample(genres, rng.randint(1, 3)),
             "tags": ["Singleplayer", "Multiplayer", "Story Rich"],
-            "developer": random.choice(developers),
-            "publisher": random.choice(developers),
-            "metascore": random.randint(60, 95),
-            "sentiment": random.choice(["Very Positive", "Positive", "Mixed", "Negative"]),
-            "release_date": f"202{random.randint(0, 3)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
-            "price": round(random.uniform(9.99, 59.99), 2)
+            "developer": rng.choice(developers),
+            "publisher": rng.choice(developers),
+            "metascore": rng.randint(60, 95),
+            "sentiment": rng.choice(["Very Positive", "Positive", "Mixed", "Negative"]),
+            "release_date": f"202{rng.randint(0, 3)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "price": round(rng.uniform(9.99, 59.99), 2)
         }
-        
-        await feature_store.cache_game_metadata(game_id, metadata)
+    
+    # 全部元数据一次批量写入
+    await feature_store.cache_batch_game_metadata(metadata_by_game)
     
     logger.info("Sample game metadata loaded")
 
@@ -177,13 +267,14 @@ async def build_sample_genre_index(feature_store: FeatureStore):
     """构建示例类型索引"""
     logger.info("Building sample genre index...")
     
+    rng = random.Random(SAMPLE_SEED)
     genres = ["Action", "Adventure", "RPG", "Strategy", "Simulation", "Sports", "Racing", "Puzzle"]
     
     genre_games = {}
     for genre in genres:
         # 每个类型随机分配一些游戏
-        game_count = random.randint(50, 200)
-        games = random.sample(range(1, 1001), game_count)
+        game_count = rng.randint(50, 200)
+        games = rng.sample(range(1, 1001), game_count)
         genre_games[genre] = games
     
     await feature_store.build_genre_index(genre_games)
@@ -191,6 +282,16 @@ async def build_sample_genre_index(feature_store: FeatureStore):
     logger.info("Genre index built successfully")
 
 
+async def load_sample_db_data(num_users: int, num_games: int):
+    """创建示例用户及其交互数据（交互依赖新用户ID，两步顺序执行）"""
+    async with db_conn.async_session_maker() as db:
+        # 1. 创建示例用户
+        user_ids = await create_sample_users(db, num_users=num_users)
+        
+        # 2. 创建示例交互数据
+        await create_sample_interactions(db, user_ids, num_games=num_games)
+
+
 async def main():
     """主函数"""
     try:
@@ -201,25 +302,19 @@ async def main():
         # 创建FeatureStore实例
         feature_store = FeatureStore()
         
-        # 获取数据库会话
-        async with get_db_session() as db:
-            # 1. 创建示例用户
-            user_ids = await create_sample_users(db, num_users=50)
-            
-            # 2. 创建示例交互数据
-            await create_sample_interactions(db, user_ids, num_games=500)
-        
-        # 3. 加载示例嵌入向量
-        await load_sample_embeddings(feature_store, num_users=50, num_games=500)
-        
-        # 4. 加载热门游戏数据
-        await load_sample_popular_games(feature_store, num_games=500)
-        
-        # 5. 加载游戏元数据
-        await load_sample_game_metadata(feature_store, num_games=500)
-        
-        # 6. 构建类型索引
-        await build_sample_genre_index(feature_store)
+        # 数据库写入与各项 Redis 写入互不依赖，并发执行，总耗时取最慢的一项
+        await asyncio.gather(
+            # 1-2. 创建示例用户及交互数据
+            load_sample_db_data(num_users=50, num_games=500),
+            # 3. 加载示例嵌入向量
+            load_sample_embeddings(feature_store, num_users=50, num_games=500),
+            # 4. 加载热门游戏数据
+            load_sample_popular_games(feature_store, num_games=500),
+            # 5. 加载游戏元数据
+            load_sample_game_metadata(feature_store, num_games=500),
+            # 6. 构建类型索引
+            build_sample_genre_index(feature_store),
+        )
         
         logger.info("Sample data loading completed successfully!")
         
@@ -229,4 +324,11 @@ async def main():
 
 
 if __name__ == "__main__":
+    # 有 uvloop 时替换默认事件循环（uvicorn[standard] 已依赖 uvloop，Windows 下不可用）
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     asyncio.run(main())
@@ -9,6 +9,8 @@ import subprocess
 import logging
 from pathlib import Path
 
+from dotenv import load_dotenv
+
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
@@ -44,8 +46,12 @@ def check_environment():
         "JWT_SECRET_KEY"
     ]
     
+    # 必要变量已在环境中（如由 shell 或容器注入）时无需再解析 .env 文件
+    if all(os.getenv(var) for var in required_vars):
+        logger.info("Environment configuration OK")
+        return True
+    
     # 加载.env文件
-    from dotenv import load_dotenv
     load_dotenv(env_file)
     
     missing_vars = []
@@ -131,8 +137,12 @@ def start_server():
         "--log-level", "info"
     ]
     
+    # OpenMP 工作线程空闲时让出 CPU 而不是自旋（须在服务进程启动前设置）
+    env = dict(os.environ)
+    env.setdefault("OMP_WAIT_POLICY", "PASSIVE")
+    
     try:
-        subprocess.run(cmd, cwd=project_root)
+        subprocess.run(cmd, cwd=project_root, env=env)
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
@@ -174,4 +184,11 @@ async def main():
 
 
 if __name__ == "__main__":
+    # 有 uvloop 时替换默认事件循环（uvicorn[standard] 已依赖 uvloop，Windows 下不可用）
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     asyncio.run(main())
@@ -31,7 +31,7 @@ RECO_PATH = os.getenv("RECO_PATH", "/api/v1/recommendations")
 
 async def register(client: httpx.AsyncClient):
     try:
-        r = await client.post(f"{BASE_URL}{REGISTER_PATH}", json={
+        r = await client.post(REGISTER_PATH, json={
             "username": USERNAME,
             "email": f"{USERNAME}@example.com",
             "password": PASSWORD
@@ -42,7 +42,7 @@ async def register(client: httpx.AsyncClient):
 
 
 async def login(client: httpx.AsyncClient) -> str:
-    r = await client.post(f"{BASE_URL}{LOGIN_PATH}", json={
+    r = await client.post(LOGIN_PATH, json={
         "username": USERNAME,
         "password": PASSWORD
     })
@@ -57,19 +57,19 @@ async def login(client: httpx.AsyncClient) -> str:
 
 
 async def call_health(client: httpx.AsyncClient):
-    r = await client.get(f"{BASE_URL}/health")
+    r = await client.get("/health")
     print("Health:", r.status_code, r.text[:200])
 
 
 async def call_games(client: httpx.AsyncClient):
-    r = await client.get(f"{BASE_URL}{GAMES_PATH}", params={"limit": 3})
+    r = await client.get(GAMES_PATH, params={"limit": 3})
     print("Games:", r.status_code, r.text[:200])
 
 
 async def call_reco(client: httpx.AsyncClient, token: str):
     headers = {"Authorization": f"Bearer {token}"}
     r = await client.get(
-        f"{BASE_URL}{RECO_PATH}",
+        RECO_PATH,
         params={"user_id": 1, "topk": 5, "algorithm": "embedding"},
         headers=headers
     )
@@ -77,12 +77,19 @@ async def call_reco(client: httpx.AsyncClient, token: str):
 
 
 async def main():
-    async with httpx.AsyncClient(timeout=10) as client:
-        await call_health(client)
-        await register(client)
-        token = await login(client)
-        await call_games(client)
-        await call_reco(client, token)
+    # 所有请求共用一个带 base_url 的客户端，keep-alive 连接池在各次调用间复用，避免重复建连
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        timeout=10,
+        limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30),
+    ) as client:
+        # 健康检查、游戏列表与认证无关，和注册/登录并发执行；推荐接口需等登录拿到 token
+        async def auth_then_reco():
+            await register(client)
+            token = await login(client)
+            await call_reco(client, token)
+
+        await asyncio.gather(call_health(client), call_games(client), auth_then_reco())
 
 
 if __name__ == "__main__":
@@ -2,25 +2,46 @@
 API接口测试
 """
 
+import asyncio
+
+import httpx
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
 from backend.main import app
 
-client = TestClient(app)
+# 模块内的测试全部为异步测试，共用同一个事件循环与客户端
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    """模块级事件循环（模块级异步夹具需要与之同作用域的事件循环）"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture(scope="module")
+async def client():
+    """直接在进程内调用 ASGI 应用的异步客户端，所有测试共用（不经过 TestClient 的线程转发）"""
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as async_client:
+        yield async_client
 
 
-def test_root():
+async def test_root(client):
     """测试根路径"""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     data = response.json()
     assert "message" in data
     assert data["message"] == "Welcome to FilmSense API"
 
 
-def test_health_check():
+async def test_health_check(client):
     """测试健康检查"""
-    response = client.get("/health")
+    response = await client.get("/health")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "healthy"
@@ -31,7 +52,7 @@ def test_health_check():
 class TestAuth:
     """认证相关测试"""
     
-    def test_register_user(self):
+    async def test_register_user(self, client):
         """测试用户注册"""
         user_data = {
             "username": "testuser",
@@ -39,13 +60,13 @@ class TestAuth:
             "password": "testpassword123"
         }
         
-        response = client.post("/api/v1/auth/register", json=user_data)
+        response = await client.post("/api/v1/auth/register", json=user_data)
         
         # 注意：由于没有真实数据库，这个测试可能会失败
         # 在实际测试中，应该使用测试数据库
         assert response.status_code in [201, 500]  # 201成功或500数据库错误
     
-    def test_register_invalid_data(self):
+    async def test_register_invalid_data(self, client):
         """测试无效注册数据"""
         user_data = {
             "username": "ab",  # 太短
@@ -53,37 +74,37 @@ class TestAuth:
             "password": "123"  # 太短
         }
         
-        response = client.post("/api/v1/auth/register", json=user_data)
+        response = await client.post("/api/v1/auth/register", json=user_data)
         assert response.status_code == 422  # 验证错误
 
 
 class TestRecommendations:
     """推荐相关测试"""
     
-    def test_get_recommendations_without_auth(self):
+    async def test_get_recommendations_without_auth(self, client):
         """测试无认证获取推荐"""
-        response = client.get("/api/v1/recommendations?user_id=1")
+        response = await client.get("/api/v1/recommendations?user_id=1")
         
         # 由于没有数据库连接，可能返回500错误
         assert response.status_code in [200, 500]
     
-    def test_get_popular_games(self):
+    async def test_get_popular_games(self, client):
         """测试获取热门游戏"""
-        response = client.get("/api/v1/recommendations/popular?limit=10")
+        response = await client.get("/api/v1/recommendations/popular?limit=10")
         
         # 由于没有Redis连接，可能返回500错误
         assert response.status_code in [200, 500]
     
-    def test_get_recommendations_invalid_params(self):
+    async def test_get_recommendations_invalid_params(self, client):
         """测试无效参数"""
-        response = client.get("/api/v1/recommendations?user_id=1&topk=200")  # topk太大
+        response = await client.get("/api/v1/recommendations?user_id=1&topk=200")  # topk太大
         assert response.status_code in [400, 422, 500]
 
 
 class TestInteractions:
     """交互相关测试"""
     
-    def test_record_interaction_without_auth(self):
+    async def test_record_interaction_without_auth(self, client):
         """测试无认证记录交互"""
         interaction_data = {
             "user_id": 1,
@@ -91,33 +112,32 @@ class TestInteractions:
             "play_hours": 2.5
         }
         
-        response = client.post("/api/v1/interactions/interact", json=interaction_data)
+        response = await client.post("/api/v1/interactions/interact", json=interaction_data)
         
         # 由于没有数据库连接，可能返回500错误
         assert response.status_code in [200, 500]
 
 
-@pytest.mark.asyncio
 async def test_async_operations():
     """测试异步操作"""
     # 这里可以测试一些异步功能
     pass
 
 
-def test_cors_headers():
+async def test_cors_headers(client):
     """测试CORS头"""
-    response = client.options("/api/v1/recommendations")
+    response = await client.options("/api/v1/recommendations")
     
     # 检查是否有CORS头（如果配置了的话）
     assert response.status_code in [200, 405]  # OPTIONS可能不被支持
 
 
-def test_api_documentation():
+async def test_api_documentation(client):
     """测试API文档"""
-    response = client.get("/docs")
+    response = await client.get("/docs")
     assert response.status_code == 200
     
-    response = client.get("/redoc")
+    response = await client.get("/redoc")
     assert response.status_code == 200
 
 
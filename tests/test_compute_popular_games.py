@@ -0,0 +1,30 @@
+"""
+热门游戏计算测试
+"""
+
+import pytest
+
+from backend.tasks.compute_popular_games import SENT_NORM_LUT, get_sentiment_score
+
+
+class TestSentimentScore:
+    """sentiment 分数映射测试"""
+
+    @pytest.mark.parametrize("sentiment, expected", [
+        ("Very Positive", 90.0),
+        ("  mostly negative ", 30.0),
+        ("Very Positive (1,234 reviews)", 90.0),
+        ("Mostly Positive - 85% of reviews", 70.0),
+        ("Overwhelmingly Negative!", 0.0),
+        ("3 user reviews", 50.0),
+        ("", 50.0),
+        (None, 50.0),
+    ])
+    def test_get_sentiment_score(self, sentiment, expected):
+        """测试规范取值查表、非规范取值子串匹配和未知取值"""
+        assert get_sentiment_score(sentiment) == expected
+
+    def test_substring_fallback_is_cached_in_lut(self):
+        """测试子串匹配结果写回查找表"""
+        get_sentiment_score("Positive (12 reviews)")
+        assert SENT_NORM_LUT["positive (12 reviews)"] == 80.0
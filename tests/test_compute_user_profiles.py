@@ -0,0 +1,190 @@
+"""
+用户画像计算测试
+
+以逐用户、逐字符串累加的参考实现（与向量化改写前的算法一致）为基准，
+校验批量路径（compute_all_scores_batch + *_from_top）与单用户路径的结果完全相同。
+嵌入取小整数、DNA 相关类别只用权重可精确表示的类别，保证浮点结果逐位一致，
+并列分数与空类别都会出现。
+"""
+
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from backend.tasks.compute_user_profiles import (
+    GENRE_TO_DNA_MAPPING,
+    PLAYER_TYPES,
+    UserProfileComputer,
+)
+
+# DNA 权重为 1.0 / 0.5 的类别，以及不参与 DNA 的类别
+CATEGORY_POOL = [
+    "Exploration", "Visual Novel", "Massively Multiplayer", "eSports",
+    "Free to Play", "Early Access", "Singleplayer",
+]
+
+NUM_USERS = 12
+NUM_ITEMS = 40
+DIM = 4
+
+
+def _make_computer(seed: int = 7, with_categories: bool = True) -> UserProfileComputer:
+    """构造小规模合成数据的计算器：索引 0 为 [PAD]，另有一个无效物品ID"""
+    rng = np.random.default_rng(seed)
+    computer = UserProfileComputer()
+
+    computer.user_embeddings = rng.integers(-2, 3, size=(NUM_USERS, DIM)).astype(np.float32)
+    computer.item_embeddings = rng.integers(-2, 3, size=(NUM_ITEMS, DIM)).astype(np.float32)
+    # 一个全零用户：所有物品同分
+    computer.user_embeddings[3] = 0
+    # 一个只偏好 [PAD] 的用户
+    computer.item_embeddings[0] = 50
+    computer.user_embeddings[5] = 1
+
+    computer.user_id_map = {0: "[PAD]", **{i: str(100 + i) for i in range(1, NUM_USERS)}}
+    computer.item_id_map = {0: "[PAD]", 1: "bad", **{i: str(1000 + i) for i in range(2, NUM_ITEMS)}}
+    computer.user_id_to_index = {100 + i: i for i in range(1, NUM_USERS)}
+    computer.item_id_to_index = {1000 + i: i for i in range(2, NUM_ITEMS)}
+    computer._build_id_arrays()
+
+    for i in range(2, NUM_ITEMS):
+        product_id = 1000 + i
+        if not with_categories or i % 7 == 0:
+            # 没有类别的物品（部分物品完全不在元数据中）
+            if i % 2 == 0:
+                computer.item_genres[product_id] = []
+                computer.item_tags[product_id] = []
+            continue
+        computer.item_genres[product_id] = list(rng.choice(CATEGORY_POOL[:4], size=rng.integers(0, 3), replace=False))
+        computer.item_tags[product_id] = list(rng.choice(CATEGORY_POOL, size=rng.integers(0, 4), replace=False))
+
+    computer._build_item_arrays()
+    return computer
+
+
+def _reference_top_games(computer: UserProfileComputer, user_id: int, top_k: int):
+    """参考实现：全量稳定排序取 top_k，再跳过 [PAD] 和无效ID"""
+    if user_id not in computer.user_id_to_index:
+        return []
+    scores = np.dot(computer.item_embeddings, computer.user_embeddings[computer.user_id_to_index[user_id]])
+    results = []
+    for idx in np.argsort(scores, kind="stable")[::-1][:top_k]:
+        orig_id = computer.item_id_map.get(int(idx))
+        if orig_id is None or orig_id == "[PAD]":
+            continue
+        try:
+            results.append((int(orig_id), float(scores[idx])))
+        except ValueError:
+            pass
+    return results
+
+
+def _reference_profile(computer: UserProfileComputer, user_id: int, top_k: int):
+    """参考实现：逐个类别字符串累加偏好分数和 DNA 分数"""
+    top_games = _reference_top_games(computer, user_id, top_k)
+    if not top_games:
+        preferences = {"favorite_genres": [], "favorite_tags": [], "genre_scores": {}, "tag_scores": {}}
+        return top_games, preferences, computer._get_default_gamer_dna()
+
+    genre_scores = defaultdict(float)
+    tag_scores = defaultdict(float)
+    dna_scores = {attr: 0.0 for attr in ("策略", "反应", "探索", "社交", "收集", "竞技")}
+    for product_id, score in top_games:
+        genres = computer.item_genres.get(product_id, [])
+        tags = computer.item_tags.get(product_id, [])
+        for genre in genres:
+            genre_scores[genre] += score
+        for tag in tags:
+            tag_scores[tag] += score
+        for category in genres + tags:
+            for attr, weight in GENRE_TO_DNA_MAPPING.get(category, {}).items():
+                dna_scores[attr] += score * weight
+
+    sorted_genres = sorted(genre_scores.items(), key=lambda x: x[1], reverse=True)
+    sorted_tags = sorted(tag_scores.items(), key=lambda x: x[1], reverse=True)
+    preferences = {
+        "favorite_genres": [g[0] for g in sorted_genres[:5]],
+        "favorite_tags": [t[0] for t in sorted_tags[:10]],
+        "genre_scores": dict(sorted_genres[:10]),
+        "tag_scores": dict(sorted_tags[:15]),
+    }
+
+    max_score = max(dna_scores.values())
+    if max_score > 0:
+        dna_scores = {attr: int(value / max_score * 100) for attr, value in dna_scores.items()}
+    dna_scores = {attr: max(20, value) for attr, value in dna_scores.items()}
+    sorted_attrs = sorted(dna_scores.items(), key=lambda x: x[1], reverse=True)
+    gamer_dna = {
+        "stats": [{"name": attr, "value": value, "max": 100} for attr, value in dna_scores.items()],
+        "primary_type": PLAYER_TYPES[sorted_attrs[0][0]],
+        "secondary_type": PLAYER_TYPES[sorted_attrs[1][0]],
+        "raw_scores": dna_scores,
+    }
+    return top_games, preferences, gamer_dna
+
+
+ALL_USER_IDS = [100 + i for i in range(1, NUM_USERS)] + [999]  # 999 没有嵌入向量
+
+
+class TestUserProfileComputer:
+    """用户画像计算测试"""
+
+    @pytest.mark.parametrize("top_k", [1, 5, 12, NUM_ITEMS + 10])
+    @pytest.mark.parametrize("with_categories", [True, False])
+    def test_batch_and_single_paths_match_reference(self, top_k, with_categories):
+        """测试批量路径、单用户路径与参考实现结果完全一致（含并列分数、空类别、[PAD]）"""
+        computer = _make_computer(with_categories=with_categories)
+
+        valid_ids, top_indices, top_scores = computer.compute_all_scores_batch(ALL_USER_IDS, top_k)
+        assert valid_ids == ALL_USER_IDS[:-1]
+        batch_top = dict(zip(valid_ids, zip(top_indices, top_scores)))
+        empty_top = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+
+        for user_id in ALL_USER_IDS:
+            expected_games, expected_prefs, expected_dna = _reference_profile(computer, user_id, top_k)
+            indices, scores = batch_top.get(user_id, empty_top)
+
+            assert computer._indices_to_top_games(indices, scores) == expected_games
+            assert computer.get_user_top_games(user_id, top_k) == expected_games
+
+            assert computer.compute_user_preferences_from_top(indices, scores) == expected_prefs
+            assert computer.compute_user_preferences(user_id, top_k) == expected_prefs
+
+            assert computer.compute_gamer_dna_from_top(indices, scores) == expected_dna
+            assert computer.compute_gamer_dna(user_id, top_k) == expected_dna
+
+    def test_batch_rows_match_single_user_rows(self, monkeypatch):
+        """测试按批构造的写库记录与逐用户计算的记录一致"""
+        import backend.tasks.compute_user_profiles as module
+        monkeypatch.setattr(module, "TOP_K_GAMES", 5)
+        computer = _make_computer()
+
+        rows, failed = computer._compute_batch_rows(ALL_USER_IDS)
+
+        assert failed == 0
+        assert rows == [
+            computer._build_profile_row(
+                user_id,
+                computer.compute_user_preferences(user_id, 5),
+                computer.compute_gamer_dna(user_id, 5),
+            )
+            for user_id in ALL_USER_IDS
+        ]
+
+    def test_fixture_exercises_edge_cases(self):
+        """确认合成数据确实覆盖并列分数、[PAD] 置顶和无类别用户"""
+        computer = _make_computer(with_categories=False)
+
+        # 全零用户：所有物品同分
+        _, scores = computer._compute_top_k(103, NUM_ITEMS)
+        assert np.all(scores == 0)
+
+        # [PAD] 置顶：top-1 只有 [PAD]，按无有效物品处理
+        indices, _ = computer._compute_top_k(105, 1)
+        assert indices.tolist() == [0]
+        assert computer.compute_gamer_dna(105, 1) == computer._get_default_gamer_dna()
+
+        # 无类别：所有 DNA 分数取下限
+        dna = computer.compute_gamer_dna(101, 5)
+        assert [stat["value"] for stat in dna["stats"]] == [20] * 6
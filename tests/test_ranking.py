@@ -7,7 +7,7 @@ import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 from backend.ranking.base_ranker import BaseRanker
-from backend.ranking.rule_ranker import RuleBasedRanker
+from backend.ranking.rule_ranker import RuleBasedRanker, _genre_mask
 from backend.ranking.business_filter import BusinessFilter
 from backend.ranking.diversity_controller import DiversityController
 from backend.ranking.ranking_strategy import RankingStrategy
@@ -34,13 +34,17 @@ class TestRuleBasedRanker:
         
         # Mock feature store
         ranker.feature_store = AsyncMock()
+        ranker.feature_store.get_cached_user_preferences.return_value = None
         ranker.feature_store.get_user_sequence.return_value = [1, 2, 3]
-        ranker.feature_store.get_game_metadata.return_value = {
+        metadata = {
             "genres": ["Action", "Adventure"],
             "metascore": 85,
             "developer": "Test Studio",
             "release_date": "2023-01-01"
         }
+        ranker.feature_store.get_batch_game_metadata.return_value = {
+            1: metadata, 2: metadata, 3: metadata
+        }
         
         candidates = [(1, 0.8), (2, 0.6), (3, 0.7)]
         
@@ -50,6 +54,68 @@ class TestRuleBasedRanker:
         assert len(result) == 3
         assert all(isinstance(item_id, int) and isinstance(score, float) 
                   for item_id, score in result)
+        assert [item_id for item_id, _ in result] == [1, 3, 2]
+        
+        # 元数据应批量获取，而不是逐个候选查询
+        ranker.feature_store.get_game_metadata.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_user_preferences_cache_hit(self):
+        """测试用户偏好缓存命中时不再读取行为序列"""
+        ranker = RuleBasedRanker()
+        
+        ranker.feature_store = AsyncMock()
+        cached = {"favorite_genres": ["Action"], "avg_rating": 80.0}
+        ranker.feature_store.get_cached_user_preferences.return_value = cached
+        
+        result = await ranker._get_user_preferences(user_id=1)
+        
+        assert result == cached
+        ranker.feature_store.get_user_sequence.assert_not_called()
+        ranker.feature_store.cache_user_preferences.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_user_preferences_cache_miss(self):
+        """测试用户偏好缓存未命中时计算并回写"""
+        ranker = RuleBasedRanker()
+        
+        ranker.feature_store = AsyncMock()
+        ranker.feature_store.get_cached_user_preferences.return_value = None
+        ranker.feature_store.get_user_sequence.return_value = [1, 2]
+        ranker.feature_store.get_batch_game_metadata.return_value = {
+            1: {"genres": ["Action", "RPG"], "metascore": 90},
+            2: {"genres": ["Action"], "metascore": 70},
+        }
+        
+        result = await ranker._get_user_preferences(user_id=1)
+        
+        assert result["favorite_genres"][0] == "Action"
+        assert result["avg_rating"] == 80.0
+        ranker.feature_store.cache_user_preferences.assert_awaited_once_with(1, result)
+    
+    def test_genre_match_score(self):
+        """测试类型匹配度（JSON 字符串与列表两种格式）"""
+        ranker = RuleBasedRanker()
+        user_mask = _genre_mask(["Action", "RPG"])
+        
+        assert ranker._calculate_genre_match_score(
+            {"genres": '["Action", "Adventure"]'}, user_mask
+        ) == pytest.approx(1 / 3)
+        assert ranker._calculate_genre_match_score({"genres": ["RPG", "Action"]}, user_mask) == 1.0
+        assert ranker._calculate_genre_match_score({"genres": ["Puzzle"]}, user_mask) == 0.0
+        assert ranker._calculate_genre_match_score({}, user_mask) == 0.0
+    
+    def test_time_decay_table(self):
+        """测试按年份查表的时间衰减与直接计算一致"""
+        ranker = RuleBasedRanker()
+        
+        assert ranker._apply_time_decay(1.0, {"release_year": 2021}) == pytest.approx(0.95 ** 2)
+        assert ranker._apply_time_decay(1.0, {"release_date": "2021-05-01"}) == pytest.approx(0.95 ** 2)
+        assert ranker._apply_time_decay(1.0, {"release_date": "1998-01-01"}) == pytest.approx(0.7)
+        assert ranker._apply_time_decay(1.0, {"release_date": "unknown"}) == 1.0
+        
+        ranker.update_parameters(time_decay_factor=0.9)
+        assert ranker._apply_time_decay(1.0, {"release_year": 2022}) == pytest.approx(0.9)
     
     def test_update_weights(self):
         """测试更新权重"""
@@ -84,10 +150,11 @@ class TestBusinessFilter:
         # Mock feature store
         filter_obj.feature_store = AsyncMock()
         filter_obj.feature_store.get_user_sequence.return_value = [1, 2]  # 用户已玩游戏
-        filter_obj.feature_store.get_game_metadata.return_value = {
+        metadata = {
             "developer": "Test Studio",
             "genres": ["Action"]
         }
+        filter_obj.feature_store.get_batch_game_metadata.return_value = {1: metadata, 2: metadata, 3: metadata}
         
         candidates = [(1, 0.8), (2, 0.6), (3, 0.7)]  # 游戏1和2已玩过
         
@@ -128,11 +195,14 @@ class TestDiversityController:
         
         # Mock feature store
         controller.feature_store = AsyncMock()
-        controller.feature_store.get_game_metadata.return_value = {
-            "genres": ["Action"],
-            "developer": "Test Studio",
-            "price": 29.99,
-            "release_date": "2023-01-01"
+        controller.feature_store.get_batch_game_metadata.return_value = {
+            item_id: {
+                "genres": ["Action"],
+                "developer": "Test Studio",
+                "price": 29.99,
+                "release_date": "2023-01-01"
+            }
+            for item_id in (1, 2)
         }
         
         candidates = [(1, 0.8), (2, 0.6)]
@@ -220,6 +290,76 @@ class TestRankingStrategy:
         for strat in strategies:
             result = await strategy.rank_and_filter(candidates, user_id=1, strategy=strat)
             assert len(result) == 2
+            
+            # 策略权重按调用传入，不修改共享排序器
+            _, call_kwargs = strategy.rule_ranker.rank.call_args
+            assert call_kwargs["weights"] == RankingStrategy.STRATEGY_WEIGHTS[strat]
+        strategy.rule_ranker.update_weights.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_rank_and_filter_shares_metadata(self):
+        """测试元数据只预取一次并传给排序、过滤和多样性三个阶段"""
+        strategy = RankingStrategy()
+        
+        strategy.rule_ranker = AsyncMock()
+        strategy.business_filter = AsyncMock()
+        strategy.diversity_controller = AsyncMock()
+        strategy.feature_store = AsyncMock()
+        
+        candidates = [(1, 0.8), (2, 0.6)]
+        metadata_map = {1: {"genres": ["Action"]}, 2: {"genres": ["RPG"]}}
+        strategy.feature_store.get_cached_ranking_result.return_value = None
+        strategy.feature_store.get_batch_game_metadata.return_value = metadata_map
+        strategy.rule_ranker.rank.return_value = candidates
+        strategy.business_filter.filter.return_value = candidates
+        strategy.diversity_controller.apply_diversity_control.return_value = candidates
+        
+        await strategy.rank_and_filter(candidates, user_id=1)
+        
+        strategy.feature_store.get_batch_game_metadata.assert_awaited_once()
+        assert strategy.rule_ranker.rank.call_args.kwargs["metadata_map"] is metadata_map
+        assert strategy.business_filter.filter.call_args.kwargs["metadata_map"] is metadata_map
+        assert strategy.diversity_controller.apply_diversity_control.call_args.kwargs["metadata_map"] is metadata_map
+    
+    @pytest.mark.asyncio
+    async def test_rank_and_filter_cache_hit(self):
+        """测试排序结果缓存命中时跳过排序流程，配置更新后缓存键改变"""
+        strategy = RankingStrategy()
+        
+        strategy.rule_ranker = AsyncMock()
+        strategy.business_filter = AsyncMock()
+        strategy.diversity_controller = AsyncMock()
+        strategy.feature_store = AsyncMock()
+        
+        candidates = [(1, 0.8), (2, 0.6)]
+        strategy.feature_store.get_cached_ranking_result.return_value = [(2, 0.9), (1, 0.5)]
+        
+        result = await strategy.rank_and_filter(candidates, user_id=1)
+        
+        assert result == [(2, 0.9), (1, 0.5)]
+        strategy.rule_ranker.rank.assert_not_called()
+        
+        digest = strategy._ranking_cache_digest(candidates, 1, "default", {})
+        assert digest == strategy._ranking_cache_digest(list(candidates), 1, "default", {})
+        assert digest != strategy._ranking_cache_digest(candidates, 1, "quality_focused", {})
+    
+    def test_ranking_cache_digest_follows_effective_config(self):
+        """测试缓存摘要只取决于生效配置：配置相同的实例（进程）摘要一致，配置变化后摘要改变"""
+        candidates = [(1, 0.8), (2, 0.6)]
+        strategy = RankingStrategy(feature_store=MagicMock())
+        other = RankingStrategy(feature_store=MagicMock())
+        
+        digest = strategy._ranking_cache_digest(candidates, 1, "default", {})
+        assert digest == other._ranking_cache_digest(candidates, 1, "default", {})
+        
+        strategy.update_ranking_config(ranking_weights={"recall_score": 0.6})
+        assert digest != strategy._ranking_cache_digest(candidates, 1, "default", {})
+        
+        other.rule_ranker.update_parameters(time_decay_factor=0.9)
+        assert digest != other._ranking_cache_digest(candidates, 1, "default", {})
+        
+        strategy.update_ranking_config(ranking_weights={"recall_score": 0.5})
+        assert digest == strategy._ranking_cache_digest(candidates, 1, "default", {})
     
     def test_update_ranking_config(self):
         """测试更新排序配置"""
@@ -0,0 +1,337 @@
+"""
+召回模块测试
+"""
+
+import pytest
+import numpy as np
+from unittest.mock import AsyncMock, MagicMock
+
+from backend.recall.embedding_recall import EmbeddingRecall
+from backend.recall.popularity_recall import PopularityRecall
+from backend.recall._numba_kernels import topk_cosine
+from backend.cache.faiss_index import FaissIndexManager
+
+
+def _item_matrix(vectors):
+    """构造 (ids, mat_norm)，与 FeatureStore.get_item_matrix 的返回格式一致"""
+    ids = np.array(sorted(vectors.keys()), dtype=np.int64)
+    matrix = np.vstack([vectors[i] for i in ids]).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return ids, matrix
+
+
+def _popular_arrays(games):
+    """构造 (ids, scores)，与 FeatureStore.get_popular_games_arrays 的返回格式一致"""
+    return (
+        np.array([game_id for game_id, _ in games], dtype=np.int64),
+        np.array([score for _, score in games], dtype=np.float64),
+    )
+
+
+class TestEmbeddingRecall:
+    """嵌入召回器测试"""
+
+    @pytest.mark.asyncio
+    async def test_legacy_recall_uses_item_matrix(self):
+        """测试回退召回基于归一化物品矩阵打分并排除已玩游戏"""
+        recall = EmbeddingRecall(use_faiss=False)
+
+        recall.feature_store = AsyncMock()
+        recall.feature_store.get_user_embedding.return_value = np.array([1.0, 0.0], dtype=np.float32)
+        recall.feature_store.get_popular_games_arrays.return_value = _popular_arrays(
+            [(1, 9.0), (2, 8.0), (3, 7.0), (4, 6.0)]
+        )
+        recall.feature_store.get_user_sequence.return_value = [1]
+        recall.feature_store.get_item_matrix.return_value = _item_matrix({
+            1: np.array([1.0, 0.0]),
+            2: np.array([0.0, 1.0]),
+            3: np.array([2.0, 2.0]),
+            # 物品 4 没有嵌入
+        })
+
+        result = await recall._recall_legacy(user_id=1, top_k=10)
+
+        assert [item_id for item_id, _ in result] == [3, 2]
+        assert result[0][1] == pytest.approx(np.sqrt(0.5))
+        assert result[1][1] == pytest.approx(0.0)
+        recall.feature_store.get_batch_item_embeddings.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_recall_reads_sequence_once(self):
+        """测试一次召回只读取一次用户序列，动态融合与已玩排除共用"""
+        recall = EmbeddingRecall(use_faiss=False)
+        
+        recall.feature_store = AsyncMock()
+        recall.feature_store.get_user_sequence.return_value = [1, 2, 3]
+        recall.feature_store.get_dynamic_user_embedding.return_value = np.array([1.0, 0.0], dtype=np.float32)
+        recall.feature_store.get_user_embedding.return_value = np.array([1.0, 0.0], dtype=np.float32)
+        recall.feature_store.get_popular_games_arrays.return_value = _popular_arrays([(i, 1.0) for i in range(1, 6)])
+        recall.feature_store.get_item_matrix.return_value = _item_matrix({
+            i: np.array([1.0, i * 0.1]) for i in range(1, 6)
+        })
+        
+        result = await recall.recall(user_id=1, top_k=3)
+        
+        assert [item_id for item_id, _ in result] == [4, 5]
+        recall.feature_store.get_user_sequence.assert_awaited_once()
+        kwargs = recall.feature_store.get_dynamic_user_embedding.call_args.kwargs
+        assert kwargs["user_sequence"] == [1, 2, 3]
+    
+    @pytest.mark.asyncio
+    async def test_recall_skips_fusion_for_cold_user(self):
+        """测试交互次数不足阈值时不做动态融合，不需要排除时只读取序列长度"""
+        recall = EmbeddingRecall(use_faiss=False)
+        
+        recall.feature_store = AsyncMock()
+        recall.feature_store.get_user_sequence_length.return_value = 1
+        recall.feature_store.get_user_embedding.return_value = np.array([1.0, 0.0], dtype=np.float32)
+        recall.feature_store.get_popular_games_arrays.return_value = _popular_arrays([(1, 1.0), (2, 1.0)])
+        recall.feature_store.get_item_matrix.return_value = _item_matrix({
+            1: np.array([1.0, 0.0]),
+            2: np.array([0.0, 1.0]),
+        })
+        
+        result = await recall.recall(user_id=1, top_k=2, exclude_played=False)
+        
+        assert [item_id for item_id, _ in result] == [1, 2]
+        recall.feature_store.get_dynamic_user_embedding.assert_not_called()
+        recall.feature_store.get_user_sequence.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_score_candidates_int8_matrix(self):
+        """测试 int8 量化矩阵的打分与 float32 结果一致（误差在量化噪声内）"""
+        recall = EmbeddingRecall(use_faiss=False)
+
+        rng = np.random.default_rng(0)
+        vectors = {i: rng.normal(size=16) for i in range(1, 51)}
+        ids, mat_norm = _item_matrix(vectors)
+        query = rng.normal(size=16).astype(np.float32)
+
+        recall.feature_store = AsyncMock()
+        recall.feature_store.get_item_matrix.return_value = (ids, mat_norm)
+        expected = dict(await recall._score_candidates(query, ids.tolist()))
+
+        mat_q = np.round(mat_norm * 127.0).astype(np.int8)
+        recall.feature_store.get_item_matrix.return_value = (ids, mat_q)
+        quantized = dict(await recall._score_candidates(query, ids.tolist()))
+
+        assert quantized.keys() == expected.keys()
+        for item_id, score in expected.items():
+            assert quantized[item_id] == pytest.approx(score, abs=0.02)
+
+    @pytest.mark.asyncio
+    async def test_score_candidates_without_matrix(self):
+        """测试没有物品矩阵时返回空结果"""
+        recall = EmbeddingRecall(use_faiss=False)
+
+        recall.feature_store = AsyncMock()
+        recall.feature_store.get_item_matrix.return_value = None
+
+        result = await recall._score_candidates(np.ones(2, dtype=np.float32), [1, 2])
+        assert result == []
+
+    @pytest.mark.asyncio
+    async def test_sequence_recall_shared_pool(self):
+        """测试序列召回使用共享候选池一次性打分并排除序列内物品"""
+        recall = EmbeddingRecall(use_faiss=False)
+        
+        recall.feature_store = AsyncMock()
+        recall.feature_store.get_user_sequence.return_value = [1, 2]
+        recall.feature_store.get_popular_games_arrays.return_value = _popular_arrays([(i, 1.0) for i in range(1, 6)])
+        recall.feature_store.get_item_matrix.return_value = _item_matrix({
+            1: np.array([1.0, 0.0]),
+            2: np.array([0.0, 1.0]),
+            3: np.array([1.0, 1.0]),
+            4: np.array([1.0, 0.1]),
+            5: np.array([-1.0, 0.0]),
+        })
+        
+        result = await recall.recall_by_user_sequence(user_id=1, sequence_length=2, top_k=4)
+        
+        # 每个候选的分数为与所有序列物品相似度之和
+        assert [item_id for item_id, _ in result] == [3, 4, 5]
+        assert result[0][1] == pytest.approx(2 * np.sqrt(0.5))
+        assert result[2][1] == pytest.approx(-1.0)
+        recall.feature_store.get_popular_games_arrays.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_sequence_recall_faiss_pool(self):
+        """测试 FAISS 路径下序列召回一次批量搜索构建候选池，结果与全量打分一致"""
+        rng = np.random.default_rng(4)
+        ids, mat_norm = _item_matrix({i: rng.normal(size=64) for i in range(1, 201)})
+        
+        manager = FaissIndexManager("test_sequence", "Flat")
+        manager.feature_store = AsyncMock()
+        manager.feature_store.get_item_matrix.return_value = (ids, mat_norm)
+        assert await manager.build_index()
+        
+        recall = EmbeddingRecall(use_faiss=False)
+        recall.use_faiss = True
+        recall.faiss_manager = manager
+        recall.feature_store = AsyncMock()
+        recall.feature_store.get_user_sequence.return_value = [1, 2, 3]
+        recall.feature_store.get_item_matrix.return_value = (ids, mat_norm)
+        
+        result = await recall.recall_by_user_sequence(user_id=1, sequence_length=3, top_k=5)
+        
+        # 期望：候选池为各序列物品的 top-(5+3) 近邻并集，按与序列物品的相似度之和排序
+        similarities = mat_norm @ mat_norm[:3].T
+        pool = np.unique(np.argsort(-similarities, axis=0)[:8].ravel())
+        pool = pool[pool >= 3]
+        scores = similarities[pool].sum(axis=1)
+        expected = ids[pool[np.argsort(-scores)[:5]]]
+        assert [item_id for item_id, _ in result] == expected.tolist()
+        assert result[0][1] == pytest.approx(scores.max(), rel=1e-5)
+    
+    @pytest.mark.asyncio
+    async def test_batch_recall_keeps_order(self):
+        """测试并发批量召回保持输入顺序，单个用户失败时返回空列表"""
+        recall = EmbeddingRecall(use_faiss=False)
+        
+        async def fake_recall(user_id, top_k=500, **kwargs):
+            if user_id == 2:
+                raise RuntimeError("boom")
+            return [(user_id * 10, 1.0)]
+        
+        recall.recall = fake_recall
+        
+        result = await recall.batch_recall([1, 2, 3], top_k=5, concurrency=2)
+        assert result == [[(10, 1.0)], [], [(30, 1.0)]]
+
+
+class TestPopularityRecall:
+    """流行度召回器测试"""
+    
+    @pytest.mark.asyncio
+    async def test_recall_by_genre(self):
+        """测试按类型召回：热门列表只获取一次，每个类型取前 top_k/类型数 个并去重"""
+        recall = PopularityRecall(feature_store=AsyncMock())
+        recall.feature_store.get_popular_games_arrays.return_value = _popular_arrays(
+            [(i, float(10 - i)) for i in range(1, 10)]
+        )
+        genre_games = {"Action": [1, 3, 5, 7, 20], "RPG": [2, 3, 4], "Indie": []}
+        recall.feature_store.get_games_by_genre.side_effect = lambda genre: genre_games[genre]
+        
+        result = await recall.recall_by_genre(user_id=1, preferred_genres=["Action", "RPG", "Indie"], top_k=6)
+        
+        assert result == [(1, 9.0), (2, 8.0), (3, 7.0)]
+        recall.feature_store.get_popular_games_arrays.assert_awaited_once()
+
+
+def test_topk_cosine_matches_numpy():
+    """测试打分内核的 top-k 结果与 NumPy 全排序一致"""
+    rng = np.random.default_rng(1)
+    _, mat_norm = _item_matrix({i: rng.normal(size=32) for i in range(200)})
+    query = rng.normal(size=32).astype(np.float32)
+    query /= np.linalg.norm(query)
+    
+    indices, scores = topk_cosine(mat_norm, query, 10)
+    
+    expected_scores = mat_norm @ query
+    expected = np.argsort(-expected_scores)[:10]
+    assert indices.tolist() == expected.tolist()
+    np.testing.assert_allclose(scores, expected_scores[expected], rtol=1e-5)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("index_type", ["HNSW", "IVF", "IVFPQ", "SQ8", "IVFSQ8", "Flat", "IVF{nlist},Flat"])
+async def test_faiss_index_returns_cosine_scores(index_type):
+    """测试 FAISS 索引基于物品矩阵构建，且返回内积（余弦）相似度"""
+    rng = np.random.default_rng(2)
+    ids, mat_norm = _item_matrix({i: rng.normal(size=64) for i in range(1, 301)})
+    
+    manager = FaissIndexManager("test", index_type)
+    manager.feature_store = AsyncMock()
+    manager.feature_store.invalidate_item_matrix = MagicMock()
+    manager.feature_store.get_item_matrix.return_value = (ids, mat_norm)
+    
+    assert await manager.build_index(force_rebuild=True)
+    assert manager.get_index_size() == 300
+    
+    result = manager.search(mat_norm[9], top_k=1)
+    assert result[0][0] == ids[9]
+    # 量化索引的分数带有量化误差
+    tolerance = 1e-2 if "SQ" in index_type or "PQ" in index_type else 1e-5
+    assert result[0][1] == pytest.approx(1.0, abs=tolerance)
+
+
+@pytest.mark.asyncio
+async def test_faiss_concurrent_build_runs_once():
+    """测试并发构建索引时只读取一次物品矩阵"""
+    import asyncio
+    
+    rng = np.random.default_rng(5)
+    ids, mat_norm = _item_matrix({i: rng.normal(size=64) for i in range(1, 51)})
+    
+    async def slow_item_matrix(model_name):
+        await asyncio.sleep(0.01)
+        return ids, mat_norm
+    
+    manager = FaissIndexManager("test_build_lock", "Flat")
+    manager.feature_store = AsyncMock()
+    manager.feature_store.get_item_matrix.side_effect = slow_item_matrix
+    
+    results = await asyncio.gather(*[manager.build_index() for _ in range(5)])
+    
+    assert all(results)
+    manager.feature_store.get_item_matrix.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_faiss_search_async_coalesces_queries():
+    """测试并发查询被合并为一次批量搜索，结果与逐条搜索一致"""
+    import asyncio
+    
+    rng = np.random.default_rng(3)
+    ids, mat_norm = _item_matrix({i: rng.normal(size=64) for i in range(1, 101)})
+    
+    manager = FaissIndexManager("test_batch", "Flat")
+    manager.feature_store = AsyncMock()
+    manager.feature_store.get_item_matrix.return_value = (ids, mat_norm)
+    assert await manager.build_index()
+    
+    queries = [mat_norm[i] for i in range(4)]
+    excludes = [None, [int(ids[1])], None, [int(ids[3]), int(ids[0])]]
+    expected = [manager.search(q, top_k=3 + i, exclude_ids=ex) for i, (q, ex) in enumerate(zip(queries, excludes))]
+    
+    manager.batch_search = MagicMock(wraps=manager.batch_search)
+    results = await asyncio.gather(*[
+        manager.search_async(q, top_k=3 + i, exclude_ids=ex)
+        for i, (q, ex) in enumerate(zip(queries, excludes))
+    ])
+    
+    assert manager.batch_search.call_count == 1
+    for got, want in zip(results, expected):
+        assert [item_id for item_id, _ in got] == [item_id for item_id, _ in want]
+
+
+@pytest.mark.asyncio
+async def test_faiss_batch_search_sizes_k_per_exclusion_group():
+    """测试批量搜索按各查询的排除项数量分组确定 k，大排除列表不拉高其他查询的 k"""
+    rng = np.random.default_rng(5)
+    ids, mat_norm = _item_matrix({i: rng.normal(size=64) for i in range(1, 201)})
+    
+    manager = FaissIndexManager("test_batch_groups", "Flat")
+    manager.feature_store = AsyncMock()
+    manager.feature_store.get_item_matrix.return_value = (ids, mat_norm)
+    assert await manager.build_index()
+    
+    queries = mat_norm[:4]
+    excludes = [None, [int(ids[0])], [int(i) for i in ids[:150]], [int(ids[2]), int(ids[5]), int(ids[7])]]
+    expected = [manager.search(q, top_k=5, exclude_ids=ex) for q, ex in zip(queries, excludes)]
+    
+    index = manager.index
+    manager.index = MagicMock(wraps=index)
+    manager.index.ntotal = index.ntotal
+    results = manager.batch_search(queries, top_k=5, exclude_ids_list=excludes)
+    
+    # 多取数量 0/1/3/150 分别取到 0/1/4/256，最后一组以索引大小 200 为上限
+    searched_k = sorted((len(call.args[0]), call.args[1]) for call in manager.index.search.call_args_list)
+    assert searched_k == [(1, 5), (1, 6), (1, 9), (1, 200)]
+    for got, want in zip(results, expected):
+        assert [item_id for item_id, _ in got] == [item_id for item_id, _ in want]
+        assert len(got) == 5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -9,13 +9,15 @@
     TOP_K          默认 10
     USER_COUNT     默认 20
     MODEL_NAME     默认 lightgcn
+    CONCURRENCY    默认 8（同时进行的推荐请求数）
 """
 
 import asyncio
-import json
 import os
+import sys
 from typing import Dict, List
 
+import orjson
 import backend.database.connection as db_conn
 from backend.api.pipeline import RecommendationPipeline
 from backend.database.models import GameMetadata
@@ -26,18 +28,16 @@ USER_MAP_PATH = os.getenv("USER_MAP_PATH", r"D:\学科实践\exported_with_id\us
 TOP_K = int(os.getenv("TOP_K", "10"))
 USER_COUNT = int(os.getenv("USER_COUNT", "20"))
 MODEL_NAME = os.getenv("MODEL_NAME", "lightgcn")
+CONCURRENCY = int(os.getenv("CONCURRENCY", "8"))
 
 
 def _load_user_ids(path: str, count: int) -> List[int]:
-    with open(path, "r", encoding="utf-8") as f:
-        data: Dict[str, str] = json.load(f)
+    with open(path, "rb") as f:
+        data: Dict[str, str] = orjson.loads(f.read())
+    # 索引 "0" 为 [PAD]；按整数索引排序，取前 count 个有效用户ID
+    entries = sorted((int(k), uid) for k, uid in data.items() if k != "0" and uid != "[PAD]")
     ids = []
-    for k in sorted(data.keys(), key=lambda x: int(x)):
-        if k == "0":
-            continue  # [PAD]
-        uid = data[k]
-        if uid == "[PAD]":
-            continue
+    for _, uid in entries:
         try:
             ids.append(int(uid))
         except ValueError:
@@ -51,8 +51,9 @@ async def fetch_metadata(session, product_ids: List[int]) -> Dict[int, GameMetad
     if not product_ids:
         return {}
     stmt = select(GameMetadata).where(GameMetadata.product_id.in_(product_ids))
-    result = await session.execute(stmt)
-    return {g.product_id: g for g in result.scalars().all()}
+    # 流式读取（服务端游标），边接收边构建映射，不再先缓冲成完整列表
+    result = await session.stream(stmt)
+    return {g.product_id: g async for g in result.scalars()}
 
 
 async def main():
@@ -65,23 +66,35 @@ async def main():
     print(f"Loaded test users: {user_ids}")
 
     pipeline = RecommendationPipeline()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
 
-    async with db_conn.async_session_maker() as session:
-        for uid in user_ids:
-            result = await pipeline.recommend(
+    async def recommend_one(uid: int) -> Dict:
+        async with semaphore:
+            return await pipeline.recommend(
                 user_id=uid,
                 top_k=TOP_K,
                 algorithm="embedding",
                 ranking_strategy="default",
             )
-            rec_ids = result.get("recommendations", [])
-            meta_map = await fetch_metadata(session, rec_ids)
-
-            print(f"\nUser {uid} -> {len(rec_ids)} recs (alg={result.get('algorithm')})")
-            for pid in rec_ids:
-                meta = meta_map.get(pid)
-                title = meta.title if meta else f"Game {pid}"
-                print(f"  {pid}\t{title}")
+
+    # 各用户的推荐并发执行（最多 CONCURRENCY 个同时进行），结果按用户顺序返回
+    results = await asyncio.gather(*(recommend_one(uid) for uid in user_ids))
+
+    # 所有用户的推荐游戏合并为一次元数据查询
+    all_rec_ids = list({pid for result in results for pid in result.get("recommendations", [])})
+    async with db_conn.async_session_maker() as session:
+        meta_map = await fetch_metadata(session, all_rec_ids)
+
+    for uid, result in zip(user_ids, results):
+        rec_ids = result.get("recommendations", [])
+
+        # 每个用户的结果拼成一块文本，一次写出
+        lines = [f"\nUser {uid} -> {len(rec_ids)} recs (alg={result.get('algorithm')})"]
+        for pid in rec_ids:
+            meta = meta_map.get(pid)
+            title = meta.title if meta else f"Game {pid}"
+            lines.append(f"  {pid}\t{title}")
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 if __name__ == "__main__":